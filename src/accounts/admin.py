@@ -1,11 +1,13 @@
 from django.contrib import admin
+
+from common.admin import LargeTableAdminMixin
 from .models import User, Vendor, Customer
 from .models import Admin, VendorProfile, CustomerProfile, AdminProfile
 
 
 # Register your models here.
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("email", "user_type", "is_active", "is_staff", "date_joined")
     search_fields = ("email",)
     list_filter = ("user_type", "is_active", "is_staff")
@@ -13,7 +15,7 @@ class UserAdmin(admin.ModelAdmin):
 
 
 @admin.register(Vendor)
-class VendorAdmin(admin.ModelAdmin):
+class VendorAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("email", "user_type", "is_active", "is_staff", "date_joined")
     search_fields = ("email",)
     list_filter = ("user_type", "is_active", "is_staff")
@@ -21,7 +23,7 @@ class VendorAdmin(admin.ModelAdmin):
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("email", "user_type", "is_active", "is_staff", "date_joined")
     search_fields = ("email",)
     list_filter = ("user_type", "is_active", "is_staff")
@@ -29,7 +31,7 @@ class CustomerAdmin(admin.ModelAdmin):
 
 
 @admin.register(Admin)
-class AdminAdmin(admin.ModelAdmin):
+class AdminAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("email", "user_type", "is_active", "is_staff", "date_joined")
     search_fields = ("email",)
     list_filter = ("user_type", "is_active", "is_staff")
@@ -37,7 +39,7 @@ class AdminAdmin(admin.ModelAdmin):
 
 
 @admin.register(VendorProfile)
-class VendorProfileAdmin(admin.ModelAdmin):
+class VendorProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "created_at")
     search_fields = ("user__email",)
     list_filter = ("created_at",)
@@ -45,7 +47,7 @@ class VendorProfileAdmin(admin.ModelAdmin):
 
 
 @admin.register(CustomerProfile)
-class CustomerProfileAdmin(admin.ModelAdmin):
+class CustomerProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "created_at")
     search_fields = ("user__email",)
     list_filter = ("created_at",)
@@ -53,7 +55,7 @@ class CustomerProfileAdmin(admin.ModelAdmin):
 
 
 @admin.register(AdminProfile)
-class AdminProfileAdmin(admin.ModelAdmin):
+class AdminProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("user", "created_at")
     search_fields = ("user__email",)
     list_filter = ("created_at",)
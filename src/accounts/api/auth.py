@@ -1,8 +1,12 @@
 import os
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from ninja import PatchDict, Query, Router
 from ninja.errors import AuthenticationError, AuthorizationError, HttpError
@@ -18,24 +22,41 @@ from accounts.schema.auth import (
 	UserFilter,
 	UserIn,
 	UserOut,
+	UserOutSparse,
 	UserUpdate,
 )
 from common.account_manager import signing_dumps, verify_signed_data
+from common.export import ExportFormat, export_response
+from common.fieldsets import parse_fields
+from common.pagination import CursorPage, CursorPagination
 from common.schema import APIResponse, APIResponseWithData, make_data_response, make_response
+from middlewares.jwt.auth import AsyncHttpJwtAuth
 from middlewares.jwt.token import (
 	TokenTypes,
+	arotate_refresh_token,
 	blacklist_all_tokens,
 	blacklist_token,
 	decode_token,
-	get_access_token_from_refresh_token,
 	get_obtain_token_pair,
 )
 from otp.models import OtpType
 from services.accounts.accounts_service import (
 	delete_user_and_profile,
 	get_user_profile_instance,
+	rank_by_similarity,
 	restore_user_and_profile,
 )
+from services.accounts.password_hashing import HashTiming, PasswordHashingBusy, password_hasher
+from services.accounts.registration_service import register_user
+from services.accounts.user_cache import (
+	USER_OUT_FIELDS,
+	abuild_user_out,
+	etag_matches,
+	project_user_out,
+	sparse_entry,
+	sparse_user_out,
+	user_out_cache,
+)
 from services.otp.otp_service import create_otp, verify_otp
 from tasks.notifications.mail_tasks import send_email_task
 
@@ -44,39 +65,45 @@ User = get_user_model()
 
 domain_name = os.environ.get('PRODUCT_NAME')
 
+users_paginator = CursorPagination(ordering=('-date_joined', '-id'))
+# pages search results by rank; ids break ties between equally close matches
+search_paginator = CursorPagination(ordering=('-similarity', '-id'))
+# the read-heavy handlers are async, so they need the async JWT check
+async_auth = AsyncHttpJwtAuth()
+# for handlers that only need the caller's id: a claims-only principal, no user query
+lazy_auth = AsyncHttpJwtAuth(lazy_user=True)
+fields_query = Query(None, description=f'Comma-separated subset of: {", ".join(USER_OUT_FIELDS)}')
+
+
+def hashing_busy(response: HttpResponse, exc: PasswordHashingBusy) -> tuple[int, APIResponse]:
+	# shed load instead of queueing more password hashes behind a full pool
+	response.headers['Retry-After'] = '1'
+	return 429, make_response(success=False, status_code=429, message=str(exc))
+
+
+def add_server_timing(response: HttpResponse, timing: HashTiming) -> None:
+	# hashing times tell a client how the password check went, so only expose them while debugging
+	if settings.DEBUG:
+		response.headers['Server-Timing'] = timing.server_timing()
+
 
 @auth_router.post(
 	'/register/',
-	response={200: APIResponseWithData[Token], 400: APIResponse},
+	response={200: APIResponseWithData[Token], 400: APIResponse, 429: APIResponse},
 	url_name='register',
 	auth=None,
 )
-def register(request, payload: UserIn) -> dict:
+async def register(request, payload: UserIn, response: HttpResponse) -> dict:
+	data = payload.model_dump()
 	try:
-		user = User.objects.create_user(**payload.model_dump())
-	except Exception:
+		hashed = await password_hasher.amake_password(data.pop('password'))
+	except PasswordHashingBusy as e:
+		return hashing_busy(response, e)
+	add_server_timing(response, hashed.timing)
+	registered = await sync_to_async(register_user)(data, hashed.encoded)
+	if registered is None:
 		raise AuthenticationError(message='User Already Exists', status_code=403)
-	# Send signup email
-	# domain_name = request.headers.get('x-domain-name', request.get_host())
-	otp = create_otp(user=user, otp_type=OtpType.SIGNUP)
-	if not otp:
-		user.delete()
-		raise AuthenticationError(message='Failed to create user', status_code=400)
-
-	send_email_task.defer(
-		user_email=otp.user.email,
-		template_type=OtpType.SIGNUP.value,
-		category='otp',
-		subject='Welcome to this Space 🚀',
-		context={
-			'otp_code': otp.otp_code,
-			'app_name': domain_name,
-			'current_year': datetime.now().year,
-			'user_name': user.full_name,
-		},
-	)
-
-	token = get_obtain_token_pair(user)
+	_, token = registered
 	return make_data_response(
 		status_code=200,
 		message='User registered successfully',
@@ -86,45 +113,66 @@ def register(request, payload: UserIn) -> dict:
 
 @auth_router.post(
 	'/login/',
-	response={200: APIResponseWithData[Token], 400: APIResponse},
+	response={200: APIResponseWithData[Token], 400: APIResponse, 429: APIResponse},
 	url_name='login',
 	auth=None,
 )
-def login(request, payload: Login) -> dict:
+async def login(request, payload: Login, response: HttpResponse) -> dict:
 	try:
-		user = get_object_or_404(User, email=payload.email)
-		if not user.check_password(payload.password):
+		user = await User.objects.filter(email__lower=payload.email.lower()).afirst()
+		if user is None:
+			raise User.DoesNotExist
+		checked = await password_hasher.averify(payload.password, user.password)
+		add_server_timing(response, checked.timing)
+		if not checked.valid:
 			raise AuthenticationError(message='Invalid credentials', status_code=400)
 		if not user.is_active or not user.is_verified:
 			raise AuthorizationError(message='User is not active or verified', status_code=400)
-		token = get_obtain_token_pair(user)
+		changes = {'last_login': timezone.now()}
+		if checked.upgraded:
+			# stored with an outdated hasher or work factor; keep the re-hash made while verifying
+			changes['password'] = checked.upgraded
+		await User.objects.filter(pk=user.pk).aupdate(**changes)
+		for field, value in changes.items():
+			setattr(user, field, value)
+		token = await sync_to_async(get_obtain_token_pair)(user)
 		return make_data_response(
 			status_code=200,
 			message='User logged in successfully',
 			data={'refresh': token['refresh_token'], 'access': token['access_token']},
 		)
+	except PasswordHashingBusy as e:
+		return hashing_busy(response, e)
 	except User.DoesNotExist:
 		raise HttpError(message='User does not exist', status_code=400) from None
 	except Exception as e:
 		raise HttpError(message=str(e), status_code=400) from e
 
 
-@auth_router.get('/current_user/', response={200: APIResponseWithData[UserOut], 400: APIResponse})
-def current_user(request) -> dict:
+@auth_router.get(
+	'/current_user/',
+	response={200: APIResponseWithData[UserOut | UserOutSparse], 400: APIResponse},
+	exclude_unset=True,
+	auth=lazy_auth,
+)
+async def current_user(request, response: HttpResponse, fields: str | None = fields_query) -> dict:
 	user = request.user
 	if not user.is_authenticated:
 		raise HttpError(message='User is not authenticated', status_code=400)
 
-	profile = get_user_profile_instance(user)
-	if not profile:
+	fields = parse_fields(fields, USER_OUT_FIELDS)
+	cached = await user_out_cache.aget_or_set(user.pk, lambda: abuild_user_out(user.pk))
+	if not cached:
 		raise HttpError(message='User profile does not exist', status_code=400)
-	user_out = UserOut.from_orm(user)
-	user_out.profile = profile
+	cached = sparse_entry(cached, fields)
+	if etag_matches(request, cached['etag']):
+		return HttpResponseNotModified(headers={'ETag': cached['etag']})
+	response.headers['ETag'] = cached['etag']
 
 	return make_data_response(
 		status_code=200,
 		message='Current user retrieved successfully',
-		data=user_out,
+		data=cached['data'],
 	)
 
 
@@ -152,7 +200,7 @@ def update_profile(request, payload: PatchDict[UserUpdate]) -> dict:
 		setattr(user, key, value)
 	user.save()
 	user_out = UserOut.from_orm(user)
-	user_out.profile = get_user_profile_instance(user)
+	user_out.profile = profile_instance
 
 	return make_data_response(
 		status_code=200,
@@ -163,29 +211,42 @@ def update_profile(request, payload: PatchDict[UserUpdate]) -> dict:
 
 @auth_router.get(
 	'/user/{user_id}/',
-	response={200: APIResponseWithData[UserOut], 400: APIResponse},
+	response={200: APIResponseWithData[UserOut | UserOutSparse], 400: APIResponse},
 	url_name='user_profile',
+	exclude_unset=True,
+	auth=lazy_auth,
 )
-def request_user_profile(request, user_id: int) -> dict:
-	user = get_object_or_404(User, id=user_id)
-	profile = get_user_profile_instance(user)
-	if not profile:
+async def request_user_profile(
+	request, user_id: int, response: HttpResponse, fields: str | None = fields_query
+) -> dict:
+	# single users come from the shared cache, so trim the cached payload rather than the query
+	fields = parse_fields(fields, USER_OUT_FIELDS)
+	cached = await user_out_cache.aget_or_set(user_id, lambda: abuild_user_out(user_id))
+	if not cached:
 		raise HttpError(message='User profile does not exist', status_code=400)
-
-	user_out = UserOut.from_orm(user)
-	user_out.profile = profile
+	cached = sparse_entry(cached, fields)
+	if etag_matches(request, cached['etag']):
+		return HttpResponseNotModified(headers={'ETag': cached['etag']})
+	response.headers['ETag'] = cached['etag']
 
 	return make_data_response(
 		status_code=200,
 		message='User profile retrieved successfully',
-		data=user_out,
+		data=cached['data'],
 	)
 
 
-@auth_router.get('/all-users/', response={200: APIResponseWithData[list[UserOut]], 400: APIResponse})
-def all_users(
+@auth_router.get(
+	'/all-users/',
+	response={200: APIResponseWithData[CursorPage[UserOut | UserOutSparse]], 400: APIResponse},
+	exclude_unset=True,
+	auth=async_auth,
+)
+async def all_users(
 	request,
 	filters: UserFilter = Query(...),
+	pagination: CursorPagination.Input = Query(...),
+	fields: str | None = fields_query,
 ) -> dict:
 	if not request.user.is_authenticated:
 		raise AuthorizationError(message='User is not authenticated', status_code=400)
@@ -194,7 +255,8 @@ def all_users(
 		filters.is_active is False or filters.is_verified is False
 	):
 		raise AuthorizationError(message='Only admin can view inactive or unverified users', status_code=403)
-	users = User.objects.all().filter(is_superuser=False).exclude(id=request.user.id)
+	fields = parse_fields(fields, USER_OUT_FIELDS)
+	users = User.objects.filter(is_superuser=False).exclude(id=request.user.id)
 	if request.user.user_type == UserType.VENDOR or request.user.user_type == UserType.CUSTOMER:
 		filters.is_active = True
 		filters.is_verified = True
@@ -205,16 +267,73 @@ def all_users(
 	else:
 		raise AuthorizationError(message='Only admin, vendor or customer can view all users', status_code=403)
 
+	users = project_user_out(users, fields, keep=tuple(users_paginator.fields))
+	if filters.search:
+		users = rank_by_similarity(users, filters.search)
+		page = await search_paginator.apaginate_queryset(users, pagination, request)
+	else:
+		page = await users_paginator.apaginate_queryset(users, pagination, request)
 	user_out_list = []
-	for user in users:
+	for user in page['results']:
+		if fields is not None:
+			user_out_list.append(sparse_user_out(user, fields))
+			continue
 		user_out = UserOut.from_orm(user)
 		user_out.profile = get_user_profile_instance(user)
 		user_out_list.append(user_out)
+	page['results'] = user_out_list
 
 	return make_data_response(
 		status_code=200,
 		message='Users retrieved successfully',
-		data=user_out_list,
+		data=page,
+	)
+
+
+USER_EXPORT_COLUMNS = {
+	name: name
+	for name in (
+		'id',
+		'email',
+		'full_name',
+		'phone_number',
+		'user_type',
+		'is_active',
+		'is_verified',
+		'date_joined',
+		'last_login',
+		'last_seen',
+	)
+}
+
+
+@auth_router.get(
+	'/export-users/',
+	response={200: None, 403: APIResponse},
+	url_name='export_users',
+	auth=async_auth,
+)
+async def export_users(request, filters: UserFilter = Query(...), format: ExportFormat = 'csv'):
+	if getattr(request.user, 'user_type', None) != UserType.ADMIN:
+		raise AuthorizationError(message='Only admin can export users', status_code=403)
+	users = User.objects.filter(is_superuser=False)
+	return export_response(filters.filter(users), USER_EXPORT_COLUMNS, format, 'users')
+
+
+@auth_router.get(
+	'/password-hashing-metrics/',
+	response={200: APIResponseWithData[dict], 403: APIResponse},
+	url_name='password_hashing_metrics',
+	auth=async_auth,
+)
+async def password_hashing_metrics(request) -> dict:
+	"""Hashing pool counters of the process that serves the request"""
+	if getattr(request.user, 'user_type', None) != UserType.ADMIN:
+		raise AuthorizationError(message='Only admin can view password hashing metrics', status_code=403)
+	return make_data_response(
+		status_code=200,
+		message='Password hashing metrics retrieved successfully',
+		data=password_hasher.snapshot(),
 	)
 
 
@@ -224,20 +343,20 @@ def all_users(
 	url_name='refresh_token',
 	auth=None,
 )
-def refresh_token(request, payload: TokenRefreshRequest) -> dict:
+async def refresh_token(request, payload: TokenRefreshRequest) -> dict:
 	try:
 		# Extract the refresh token from the payload
 		refresh_token = payload.refresh
 		if not refresh_token:
 			raise ValueError('Refresh token is required')
 
-		# Generate a new access token using the refresh token
-		access_token, _ = get_access_token_from_refresh_token(refresh_token)
+		# Rotate: the old refresh token is spent, a reused one revokes the session
+		token = await arotate_refresh_token(refresh_token)
 
 		return make_data_response(
 			status_code=200,
 			message='Token refreshed successfully',
-			data={'access': access_token, 'refresh': refresh_token},
+			data={'access': token['access_token'], 'refresh': token['refresh_token']},
 		)
 	except ExpiredSignatureError:
 		raise HttpError(message='Refresh token has expired', status_code=401)
@@ -329,7 +448,7 @@ def password_reset_request(request, payload: PasswordResetRequest) -> dict:
 	Fails silently if the user does not exist.
 	"""
 	try:
-		user = User.objects.filter(email=payload.email).first()
+		user = User.objects.filter(email__lower=payload.email.lower()).first()
 		if not user:
 			return make_response(
 				success=True,
@@ -398,7 +517,7 @@ def password_update(request, payload: PasswordResetVerify) -> dict:
 	"""
 	Update the user's password.
 	"""
-	user = get_object_or_404(User, email=payload.email)
+	user = get_object_or_404(User, email__lower=payload.email.lower())
 	success, message = verify_otp(
 		user=user,
 		otp_code=payload.otp,
@@ -6,4 +6,10 @@ class AccountsConfig(AppConfig):
 	name = 'accounts'
 
 	def ready(self):
+		from django.db.models import CharField
+		from django.db.models.functions import Lower
+
 		import accounts.signals  # noqa: F401
+
+		# `email__lower=...` matches the lower(email) unique index
+		CharField.register_lookup(Lower)
@@ -0,0 +1,62 @@
+"""
+Benchmarks for serialising `list[UserOut]` responses with Ninja's stdlib renderer and the orjson one
+"""
+
+from ninja.parser import Parser
+from ninja.renderers import JSONRenderer
+
+from accounts.models import UserType
+from accounts.schema.auth import CustomerProfileOut, UserOut
+from common.benchmark import BenchmarkContext, register
+from common.pagination import CursorPage
+from common.renderers import ORJSONParser, ORJSONRenderer, dumps
+from common.schema import APIResponseWithData
+
+PAYLOAD_SIZES = (100, 1_000, 10_000)
+RENDERERS = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+PARSERS = {'json': Parser(), 'orjson': ORJSONParser()}
+
+
+class _Body:
+	"""Just enough of a request for `Parser.parse_body`"""
+
+	def __init__(self, body: bytes):
+		self.body = body
+
+
+def user_page(size: int) -> dict:
+	"""The dict Ninja hands its renderer for an all-users page of `size` users"""
+	users = [
+		UserOut(
+			id=i,
+			email=f'user{i}@example.com',
+			full_name=f'User {i}',
+			phone_number=f'+1555{i:07d}',
+			user_type=UserType.CUSTOMER,
+			profile=CustomerProfileOut(),
+		)
+		for i in range(size)
+	]
+	page = CursorPage[UserOut](results=users, next='eyJwIjpbXX0', previous=None)
+	return APIResponseWithData[CursorPage[UserOut]](success=True, status_code=200, data=page).model_dump()
+
+
+@register('serialization')
+def serialization_suite(ctx: BenchmarkContext) -> None:
+	for size in PAYLOAD_SIZES:
+		data = user_page(size)
+		body = dumps(data)
+		# keep the big payloads from dominating the run
+		iterations = max(10, ctx.iterations * 100 // size)
+		for name, renderer in RENDERERS.items():
+			ctx.measure(
+				f'render[{name}, {size} users]',
+				lambda renderer=renderer, data=data: renderer.render(None, data, response_status=200),
+				iterations=iterations,
+			)
+		for name, parser in PARSERS.items():
+			ctx.measure(
+				f'parse[{name}, {size} users]',
+				lambda parser=parser, body=body: parser.parse_body(_Body(body)),
+				iterations=iterations,
+			)
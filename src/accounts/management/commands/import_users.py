@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserType
+from services.accounts.import_service import ImportStats, import_users
+
+
+class Command(BaseCommand):
+	help = 'Bulk-import users from a CSV or JSON Lines file using COPY and set-based profile creation'
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			'path',
+			help='CSV with a header row or .jsonl file; fields: email, password, full_name, phone_number, '
+			'user_type, is_active, is_verified',
+		)
+		parser.add_argument('--format', choices=['csv', 'jsonl'], help='File format (default: from the extension)')
+		parser.add_argument('--batch-size', type=int, default=5000, help='Rows per COPY batch and transaction')
+		parser.add_argument('--workers', type=int, help='Password hashing processes (default: CPU count)')
+		parser.add_argument(
+			'--user-type',
+			choices=UserType.values,
+			default=UserType.CUSTOMER,
+			help='User type for rows that do not set one',
+		)
+
+	def handle(self, *args, **options):
+		"""Main command handler"""
+		try:
+			stats = import_users(
+				options['path'],
+				fmt=options['format'],
+				batch_size=options['batch_size'],
+				workers=options['workers'],
+				default_user_type=options['user_type'],
+				on_batch=self._write_progress,
+			)
+		except (OSError, ValueError) as e:
+			raise CommandError(f'Import failed: {e!s}') from e
+
+		self.stdout.write(
+			self.style.SUCCESS(
+				f'✅ Imported {stats.created} users, skipped {stats.skipped} of {stats.read} rows '
+				f'in {stats.elapsed:.1f}s ({stats.rows_per_sec:.0f} rows/sec)'
+			)
+		)
+
+	def _write_progress(self, stats: ImportStats):
+		self.stdout.write(f'  {stats.read} rows read, {stats.created} created ({stats.rows_per_sec:.0f} rows/sec)')
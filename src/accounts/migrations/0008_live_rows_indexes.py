@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_search_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminprofile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='accounts_adminprofile_live'),
+        ),
+        migrations.AddIndex(
+            model_name='customerprofile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='accounts_customerprofile_live'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='accounts_user_live'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='accounts_vendorprofile_live'),
+        ),
+    ]
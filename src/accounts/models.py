@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower, Upper
 
-from common.base_model import TimeStampedSoftDeleteModel
+from common.base_model import TimeStampedSoftDeleteModel, live_rows_index
 from common.account_manager import CustomUserManager, UserTypeManager
 
 
@@ -24,7 +26,11 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedSoftDeleteModel):
 	is_superuser = models.BooleanField(default=False)
 	is_verified = models.BooleanField(default=False)
 	date_joined = models.DateTimeField(auto_now_add=True)
-	last_login = models.DateTimeField(auto_now=True)
+	last_login = models.DateTimeField(blank=True, null=True)
+	# written in batches from Redis by tasks.accounts.last_seen_tasks, not per request
+	last_seen = models.DateTimeField(blank=True, null=True)
+	# Bumped to revoke every token issued before it ("logout all devices")
+	token_epoch = models.PositiveIntegerField(default=0)
 
 	USERNAME_FIELD = 'email'
 	REQUIRED_FIELDS = []
@@ -34,6 +40,21 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedSoftDeleteModel):
 	def __str__(self):
 		return self.email
 
+	class Meta:
+		constraints = [
+			# case-insensitive uniqueness; also serves `email__lower` lookups
+			models.UniqueConstraint(Lower('email'), name='accounts_user_email_lower_uniq'),
+		]
+		indexes = [
+			# keyset pagination of the user directory (CursorPagination)
+			models.Index(fields=['date_joined', 'id'], name='accounts_user_joined_id'),
+			# trigram indexes for icontains, which Postgres runs as UPPER(col) LIKE
+			GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='accounts_user_email_trgm'),
+			GinIndex(OpClass(Upper('full_name'), name='gin_trgm_ops'), name='accounts_user_name_trgm'),
+			GinIndex(OpClass(Upper('phone_number'), name='gin_trgm_ops'), name='accounts_user_phone_trgm'),
+			live_rows_index('accounts_user'),
+		]
+
 
 class Vendor(User):
 	objects = UserTypeManager(user_type=UserType.VENDOR)
@@ -90,6 +111,9 @@ class VendorProfile(TimeStampedSoftDeleteModel):
 	user = models.OneToOneField(
 		User, on_delete=models.CASCADE, related_name='vendorprofile'
 	)
+
+	class Meta:
+		indexes = [live_rows_index('accounts_vendorprofile')]
 	
 
 	def __str__(self):
@@ -101,6 +125,9 @@ class CustomerProfile(TimeStampedSoftDeleteModel):
 		User, on_delete=models.CASCADE, related_name='customerprofile'
 	)
 
+	class Meta:
+		indexes = [live_rows_index('accounts_customerprofile')]
+
 	def __str__(self):
 		return self.user.email
 
@@ -110,5 +137,8 @@ class AdminProfile(TimeStampedSoftDeleteModel):
 		User, on_delete=models.CASCADE, related_name='adminprofile'
 	)
 
+	class Meta:
+		indexes = [live_rows_index('accounts_adminprofile')]
+
 	def __str__(self):
 		return self.user.email
@@ -1,7 +1,9 @@
+from django.db.models import Q
 from ninja import Field, FilterSchema, ModelSchema, Schema
 from pydantic import EmailStr
 
 from accounts.models import AdminProfile, CustomerProfile, User, UserType, VendorProfile
+from services.accounts.accounts_service import user_search_q
 
 _exclude = ['id', 'user', 'created_at', 'modified', 'deleted_at', 'is_deleted']
 
@@ -70,6 +72,17 @@ class UserOut(ModelSchema):
 		orm_mode = True
 
 
+class UserOutSparse(ModelSchema):
+	"""A `UserOut` trimmed by `?fields=`: any of its fields may be left out"""
+
+	profile: CustomerProfileOut | VendorProfileOut | AdminProfileOut = None
+
+	class Meta:
+		model = User
+		fields = UserOut.Meta.fields
+		fields_optional = '__all__'
+
+
 class UserUpdate(Schema):
 	email: EmailStr
 	full_name: str
@@ -78,6 +91,10 @@ class UserUpdate(Schema):
 
 
 class UserFilter(FilterSchema):
+	# shorter terms have no trigram for the indexes to look up
+	search: str | None = Field(
+		None, min_length=3, description='Search email, full name and phone number, best matches first'
+	)
 	email: str | None = Field(None, q='email__icontains', description='Filter by email')
 	full_name: str | None = Field(None, q='full_name__icontains', description='Filter by full name')
 	phone_number: str | None = Field(None, q='phone_number__icontains', description='Filter by phone number')
@@ -88,6 +105,14 @@ class UserFilter(FilterSchema):
 	class Config:
 		expression_connector = 'OR'
 
+	def filter_search(self, value: str | None) -> Q:
+		# applied in custom_expression, so that it narrows the OR-ed filters
+		return Q()
+
+	def custom_expression(self) -> Q:
+		q = self._connect_fields()
+		return q & user_search_q(self.search) if self.search else q
+
 
 class AccountDeleteVerify(Schema):
 	otp: str
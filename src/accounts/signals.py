@@ -1,9 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import AdminProfile, CustomerProfile, User, UserType, VendorProfile
+from services.accounts.user_cache import user_out_cache
 
+from .models import Admin, AdminProfile, Customer, CustomerProfile, User, UserType, Vendor, VendorProfile
 
+
+# services.accounts.import_service.insert_user_relations() does the same in SQL for bulk
+# imports and registration, which send no post_save; keep the two in step.
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
 	if not created:
@@ -15,3 +19,22 @@ def create_user_profile(sender, instance, created, **kwargs):
 		CustomerProfile.objects.get_or_create(user=instance)
 	elif instance.user_type == UserType.ADMIN:
 		AdminProfile.objects.get_or_create(user=instance)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+	user_out_cache.invalidate_on_commit(instance.pk)
+
+
+def invalidate_cached_user_of_profile(sender, instance, **kwargs):
+	user_out_cache.invalidate_on_commit(instance.user_id)
+
+
+# instance soft_delete()/restore() save the row, so post_save covers them too;
+# the queryset versions send nothing and their callers invalidate by hand.
+# Proxy models send their own signals
+for model in (User, Vendor, Customer, Admin):
+	post_save.connect(invalidate_cached_user, sender=model)
+	post_delete.connect(invalidate_cached_user, sender=model)
+for model in (VendorProfile, CustomerProfile, AdminProfile):
+	post_save.connect(invalidate_cached_user_of_profile, sender=model)
+	post_delete.connect(invalidate_cached_user_of_profile, sender=model)
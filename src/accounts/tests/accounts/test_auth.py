@@ -0,0 +1,262 @@
+import csv
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.test import AsyncClient
+from ninja.testing import TestAsyncClient
+from pydantic import ValidationError
+import pytest
+
+from accounts.api.auth import auth_router
+from accounts.models import AdminProfile, CustomerProfile, User, UserType, VendorProfile
+from accounts.schema.auth import UserOut, UserOutSparse
+from middlewares.jwt.token import get_obtain_token_pair
+from services.accounts.accounts_service import (
+	delete_user_and_profile,
+	get_user_profile_instance,
+	restore_user_and_profile,
+	with_profiles,
+)
+from services.accounts.password_hashing import PasswordHasherPool
+
+
+class Client:
+	"""Calls the async handlers from sync tests, authenticated with a real access token per user"""
+
+	def __init__(self):
+		self.client = TestAsyncClient(auth_router)
+		self.tokens = {}
+
+	def login(self, user) -> None:
+		self.tokens[user.pk] = get_obtain_token_pair(user)['access_token']
+
+	def get(self, path: str, user, headers: dict | None = None, **kwargs):
+		if user.pk not in self.tokens:
+			self.login(user)
+		headers = {**(headers or {}), 'Authorization': f'Bearer {self.tokens[user.pk]}'}
+		return async_to_sync(self.client.get)(path, headers=headers, **kwargs)
+
+	def post(self, path: str, **kwargs):
+		return async_to_sync(self.client.post)(path, **kwargs)
+
+
+@pytest.fixture
+def client():
+	return Client()
+
+
+@pytest.fixture
+def admin(db):
+	return User.objects.create_user(email='admin@example.com', user_type=UserType.ADMIN, is_verified=True)
+
+
+def make_users(count: int) -> None:
+	user_types = [UserType.CUSTOMER, UserType.VENDOR, UserType.ADMIN]
+	for i in range(count):
+		User.objects.create_user(email=f'user{i}@example.com', user_type=user_types[i % 3], is_verified=True)
+
+
+@pytest.mark.parametrize('count', [3, 30])
+def test_all_users_runs_one_query_regardless_of_page_size(client, admin, django_assert_num_queries, count):
+	make_users(count)
+	client.login(admin)
+
+	# without Redis the token check reads the epoch, the blacklist and the user
+	with django_assert_num_queries(3 + 1):
+		response = client.get('/all-users/', user=admin)
+
+	assert response.status_code == 200
+	users = response.json()['data']['results']
+	# migrations seed an AnonymousUser row, so count the directory rather than assume it
+	assert len(users) == User.objects.filter(is_superuser=False).exclude(id=admin.id).count() >= count
+	assert all(user['profile'] is not None for user in users)
+
+
+def test_all_users_cursor_pages_are_stable_under_inserts(client, admin):
+	make_users(7)
+	expected = list(User.objects.filter(is_superuser=False).exclude(id=admin.id).values_list('id', flat=True))
+
+	pages, cursor = [], None
+	while True:
+		response = client.get('/all-users/', query_params={'page_size': 3, 'cursor': cursor or ''}, user=admin)
+		page = response.json()['data']
+		pages.append([user['id'] for user in page['results']])
+		# a row joining mid-walk lands before the first page and must not shift later pages
+		User.objects.create_user(email=f'late{len(pages)}@example.com', is_verified=True)
+		cursor = page['next']
+		if not cursor:
+			break
+
+	seen = [user_id for ids in pages for user_id in ids]
+	assert sorted(seen) == sorted(expected)
+	assert len(seen) == len(set(seen))
+
+	previous = client.get('/all-users/', query_params={'page_size': 3, 'cursor': page['previous']}, user=admin)
+	assert [user['id'] for user in previous.json()['data']['results']] == pages[-2]
+
+
+def test_all_users_search_ranks_closest_match_first(client, admin):
+	make_users(5)
+	User.objects.create_user(email='jane.doe@example.com', full_name='Jane Doe', is_verified=True)
+	User.objects.create_user(email='janet@example.com', full_name='Janet Doerr', is_verified=True)
+
+	response = client.get('/all-users/', query_params={'search': 'jane doe'}, user=admin)
+
+	emails = [user['email'] for user in response.json()['data']['results']]
+	assert emails == ['jane.doe@example.com']
+
+	response = client.get('/all-users/', query_params={'search': 'JANE'}, user=admin)
+
+	emails = [user['email'] for user in response.json()['data']['results']]
+	assert emails == ['jane.doe@example.com', 'janet@example.com']
+
+	# search results page by rank, the same both ways
+	first = client.get('/all-users/', query_params={'search': 'JANE', 'page_size': 1}, user=admin).json()['data']
+	query_params = {'search': 'JANE', 'page_size': 1, 'cursor': first['next']}
+	second = client.get('/all-users/', query_params=query_params, user=admin).json()['data']
+	assert [user['email'] for user in first['results'] + second['results']] == emails
+	assert second['next'] is None
+	query_params['cursor'] = second['previous']
+	back = client.get('/all-users/', query_params=query_params, user=admin).json()['data']
+	assert back['results'] == first['results']
+
+	assert client.get('/all-users/', query_params={'search': 'ja'}, user=admin).status_code == 422
+
+
+def test_current_user_etag_round_trip(client, admin):
+	response = client.get('/current_user/', user=admin)
+	etag = response.headers['ETag']
+	assert response.status_code == 200
+	assert response.json()['data']['email'] == admin.email
+
+	response = client.get('/current_user/', headers={'If-None-Match': etag}, user=admin)
+	assert response.status_code == 304
+	assert response.content == b''
+
+	# saving the user drops the cached payload
+	admin.full_name = 'Ada Admin'
+	admin.save()
+	response = client.get('/current_user/', headers={'If-None-Match': etag}, user=admin)
+	assert response.status_code == 200
+	assert response.headers['ETag'] != etag
+	assert response.json()['data']['full_name'] == 'Ada Admin'
+
+
+def test_joined_profiles_resolve_without_queries(db, django_assert_num_queries):
+	make_users(9)
+
+	with django_assert_num_queries(1):
+		users = list(with_profiles(User.objects.filter(email__startswith='user')))
+	with django_assert_num_queries(0):
+		profiles = [get_user_profile_instance(user) for user in users]
+
+	assert [profile.user_id for profile in profiles] == [user.pk for user in users]
+	assert {type(profile) for profile in profiles} == {AdminProfile, CustomerProfile, VendorProfile}
+
+
+def test_soft_delete_restore_and_purge_are_set_based(db, django_assert_num_queries):
+	make_users(6)
+	customer = User.objects.get(email='user0@example.com')
+
+	# two UPDATEs, wrapped in a savepoint inside the test transaction
+	with django_assert_num_queries(4):
+		delete_user_and_profile(customer)
+	assert not CustomerProfile.objects.filter(user=customer).exists()
+	assert User.all_objects.get(pk=customer.pk).is_deleted
+
+	with django_assert_num_queries(4):
+		restore_user_and_profile(customer)
+	assert CustomerProfile.objects.filter(user=customer).exists()
+
+	profiles = CustomerProfile.all_objects.filter(user__email__startswith='user')
+	assert profiles.soft_delete() == 2
+	assert profiles.soft_delete() == 0
+	with pytest.raises(TypeError):
+		CustomerProfile.objects.hard_purge()
+	assert CustomerProfile.all_objects.hard_purge(batch_size=1) == 2
+	assert not CustomerProfile.all_objects.filter(user__email__startswith='user').exists()
+
+
+def test_fields_trims_responses_and_the_users_query(client, admin, django_assert_num_queries):
+	make_users(3)
+	client.login(admin)
+
+	with django_assert_num_queries(3 + 1) as queries:
+		response = client.get('/all-users/', query_params={'fields': 'full_name,id'}, user=admin)
+
+	assert {tuple(user) for user in response.json()['data']['results']} == {('id', 'full_name')}
+	assert '"email"' not in queries.captured_queries[-1]['sql']
+	assert response.json()['data']['next'] is None
+
+	full = client.get('/current_user/', user=admin)
+	response = client.get('/current_user/', query_params={'fields': 'email,profile'}, user=admin)
+	assert response.json()['data'] == {'email': admin.email, 'profile': {}}
+	assert response.headers['ETag'] != full.headers['ETag']
+
+	response = client.get('/current_user/', query_params={'fields': 'password'}, user=admin)
+	assert response.status_code == 422
+
+
+def test_only_sparse_responses_may_leave_user_fields_out():
+	with pytest.raises(ValidationError):
+		UserOut.model_validate({'id': 1, 'full_name': 'Sparse'})
+	sparse = UserOutSparse.model_validate({'id': 1, 'full_name': 'Sparse'})
+	assert sparse.model_dump(exclude_unset=True) == {'id': 1, 'full_name': 'Sparse'}
+
+
+def test_login_upgrades_outdated_hashes_and_sheds_load_when_hashing_is_saturated(
+	client, admin, settings, monkeypatch
+):
+	settings.PASSWORD_HASHERS = [
+		'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+		'django.contrib.auth.hashers.MD5PasswordHasher',
+	]
+	user = User.objects.create_user(email='old@example.com', is_verified=True)
+	User.objects.filter(pk=user.pk).update(password=make_password('s3cret-pass', hasher='md5'))
+	credentials = {'email': user.email, 'password': 's3cret-pass'}
+
+	response = client.post('/login/', json=credentials)
+	assert response.status_code == 200
+	assert 'Server-Timing' not in response.headers
+	user.refresh_from_db()
+	assert user.password.startswith('pbkdf2_sha256$')
+
+	settings.DEBUG = True
+	assert 'hash;dur=' in client.post('/login/', json=credentials).headers['Server-Timing']
+
+	pool = PasswordHasherPool(workers=1, queue_size=0)
+	monkeypatch.setattr('accounts.api.auth.password_hasher', pool)
+	release = threading.Event()
+	pool._submit(release.wait)  # occupies the only slot
+	try:
+		response = client.post('/login/', json=credentials)
+	finally:
+		release.set()
+	assert response.status_code == 429
+	assert response.headers['Retry-After'] == '1'
+
+	response = client.get('/password-hashing-metrics/', user=admin)
+	assert response.json()['data']['rejected'] == 1
+	assert client.get('/password-hashing-metrics/', user=user).status_code == 403
+
+
+async def read_streaming(response) -> bytes:
+	return b''.join([chunk async for chunk in response.streaming_content])
+
+
+def test_export_users_is_admin_only_and_leaves_out_superusers(admin):
+	make_users(3)
+	User.objects.create_superuser(email='root@example.com', password='s3cret-pass')
+	client = AsyncClient()
+
+	def export(user):
+		token = get_obtain_token_pair(user)['access_token']
+		return async_to_sync(client.get)('/api/auth/export-users/', headers={'Authorization': f'Bearer {token}'})
+
+	response = export(admin)
+	assert response.status_code == 200
+	rows = csv.DictReader(async_to_sync(read_streaming)(response).decode().splitlines())
+	assert 'root@example.com' not in {row['email'] for row in rows}
+
+	assert export(User.objects.get(email='user1@example.com')).status_code == 403
@@ -8,8 +8,10 @@ from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
 from django.db import models
 from django.utils.timezone import now
 
+from common.base_model import SoftDeleteQuerySet
 
-class UserTypeManager(models.Manager):
+
+class UserTypeManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
 	def __init__(self, user_type=None, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.user_type = user_type
@@ -21,7 +23,7 @@ class UserTypeManager(models.Manager):
 		return qs
 
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(SoftDeleteQuerySet)):
 	def create_user(self, email, password=None, **extra_fields):
 		if not email:
 			raise ValueError('The Email is required')
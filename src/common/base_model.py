@@ -1,9 +1,46 @@
 # src/common/base_model.py
 
 from django.db import models
+from django.db.backends.utils import names_digest
 from django.utils import timezone
 
-class ActiveManager(models.Manager):
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """Set-based counterparts of the instance methods: one statement per call (or batch)"""
+
+    def soft_delete(self):
+        now = timezone.now()
+        return self.filter(is_deleted=False).update(is_deleted=True, deleted_at=now, modified=now)
+
+    def restore(self):
+        return self.filter(is_deleted=True).update(is_deleted=False, deleted_at=None, modified=timezone.now())
+
+    def hard_purge(self, batch_size=1000):
+        """
+        Permanently delete the soft-deleted rows of this queryset, `batch_size`
+        at a time so each DELETE holds its locks briefly. Call it on
+        `all_objects`; returns the number of rows purged.
+        """
+        purged = 0
+        while True:
+            batch = self.filter(is_deleted=True).values("pk")[:batch_size]
+            _, deleted = self.model._base_manager.filter(pk__in=batch).delete()
+            count = deleted.get(self.model._meta.label, 0)
+            if not count:
+                return purged
+            purged += count
+
+
+SoftDeleteManager = models.Manager.from_queryset(SoftDeleteQuerySet)
+
+
+class ActiveQuerySet(SoftDeleteQuerySet):
+    def hard_purge(self, batch_size=1000):
+        # these querysets exclude soft-deleted rows, so there would be nothing to purge
+        raise TypeError("hard_purge() must be called on all_objects, not objects")
+
+
+class ActiveManager(models.Manager.from_queryset(ActiveQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
@@ -14,7 +51,7 @@ class TimeStampedSoftDeleteModel(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
 
     objects = ActiveManager()
-    all_objects = models.Manager()   
+    all_objects = SoftDeleteManager()
 
     class Meta:
         abstract = True
@@ -32,3 +69,15 @@ class TimeStampedSoftDeleteModel(models.Model):
     def modify(self):
         self.modified = timezone.now()
         self.save(update_fields=["modified"])
+
+
+def live_rows_index(table):
+    """
+    Partial index over the rows `objects` returns, in the default
+    `('-created_at', '-id')` page order. List it in each subclass's
+    Meta.indexes; `table` is the model's db_table.
+    """
+    name = f"{table}_live"
+    if len(name) > models.Index.max_name_length:
+        name = f"{table[:16]}_{names_digest(table, 'live', length=8)}_live"
+    return models.Index(fields=["created_at", "id"], condition=models.Q(is_deleted=False), name=name)
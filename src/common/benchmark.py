@@ -0,0 +1,123 @@
+"""
+Micro-benchmark harness used by the `benchmark` management command.
+
+Apps register suites in a `benchmarks.py` module:
+
+	from common.benchmark import BenchmarkContext, register
+
+	@register('tokens')
+	def tokens_suite(ctx: BenchmarkContext):
+		ctx.measure('decode_token', lambda: decode_token(token, TokenTypes.ACCESS))
+"""
+
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+import json
+from pathlib import Path
+import statistics
+import time
+
+SUITES: dict[str, Callable[['BenchmarkContext'], None]] = {}
+
+
+def register(name: str):
+	"""Register a suite under `name`"""
+
+	def decorator(func):
+		SUITES[name] = func
+		return func
+
+	return decorator
+
+
+def autodiscover() -> None:
+	"""Import every installed app's `benchmarks` module so its suites register"""
+	from django.utils.module_loading import autodiscover_modules
+
+	autodiscover_modules('benchmarks')
+
+
+@dataclass
+class BenchmarkResult:
+	name: str
+	iterations: int
+	ops_per_sec: float
+	p50_ms: float
+	p99_ms: float
+
+	@classmethod
+	def from_latencies(cls, name: str, latencies: list[float]) -> 'BenchmarkResult':
+		total = sum(latencies)
+		cuts = (
+			statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+		)
+		return cls(
+			name=name,
+			iterations=len(latencies),
+			ops_per_sec=len(latencies) / total if total else float('inf'),
+			p50_ms=cuts[49] * 1000,
+			p99_ms=cuts[98] * 1000,
+		)
+
+
+@dataclass
+class BenchmarkContext:
+	"""
+	Passed to each suite. `measure()` times a callable and records the result;
+	`setup` runs before every iteration outside the timed section.
+	"""
+
+	iterations: int = 200
+	warmup: int = 20
+	token_counts: tuple[int, ...] = (1, 100, 10_000)
+	results: list[BenchmarkResult] = field(default_factory=list)
+	on_result: Callable[[BenchmarkResult], None] | None = None
+
+	def measure(
+		self,
+		name: str,
+		func: Callable[[], object],
+		setup: Callable[[], object] | None = None,
+		iterations: int | None = None,
+	) -> BenchmarkResult:
+		iterations = iterations or self.iterations
+		for _ in range(self.warmup):
+			if setup:
+				setup()
+			func()
+
+		latencies = []
+		for _ in range(iterations):
+			if setup:
+				setup()
+			start = time.perf_counter()
+			func()
+			latencies.append(time.perf_counter() - start)
+
+		result = BenchmarkResult.from_latencies(name, latencies)
+		self.results.append(result)
+		if self.on_result:
+			self.on_result(result)
+		return result
+
+
+def save_baseline(path: str | Path, results: list[BenchmarkResult]) -> None:
+	data = {result.name: asdict(result) for result in results}
+	Path(path).write_text(json.dumps(data, indent=2, sort_keys=True))
+
+
+def load_baseline(path: str | Path) -> dict[str, BenchmarkResult]:
+	data = json.loads(Path(path).read_text())
+	return {name: BenchmarkResult(**values) for name, values in data.items()}
+
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, BenchmarkResult]) -> list[tuple]:
+	"""Return `(result, baseline_result, throughput change in %)` for results present in the baseline"""
+	rows = []
+	for result in results:
+		base = baseline.get(result.name)
+		if base is None:
+			continue
+		change = (result.ops_per_sec - base.ops_per_sec) / base.ops_per_sec * 100 if base.ops_per_sec else 0.0
+		rows.append((result, base, change))
+	return rows
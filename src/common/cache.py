@@ -0,0 +1,100 @@
+"""
+Small in-process caches shared by hot request paths
+"""
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+import threading
+import time
+from typing import Any
+
+_MISSING = object()
+
+
+class TTLCache:
+	"""Bounded, thread-safe LRU mapping whose entries expire after a TTL"""
+
+	def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		"""Return the cached value, or `default` if missing or expired"""
+		with self._lock:
+			entry = self._data.get(key, _MISSING)
+			if entry is _MISSING:
+				return default
+			expires_at, value = entry
+			if expires_at <= time.monotonic():
+				del self._data[key]
+				return default
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+		"""Store a value, evicting the least recently used entry when full"""
+		ttl = self.ttl if ttl is None else ttl
+		if ttl <= 0 or self.maxsize <= 0:
+			return
+		with self._lock:
+			self._data[key] = (time.monotonic() + ttl, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def add(self, key: Hashable, value: Any, ttl: float | None = None) -> bool:
+		"""Store a value only if the key is not already cached"""
+		if self.get(key, _MISSING) is not _MISSING:
+			return False
+		self.set(key, value, ttl=ttl)
+		return True
+
+	def discard(self, key: Hashable) -> None:
+		with self._lock:
+			self._data.pop(key, None)
+
+	def discard_many(self, keys: Iterable[Hashable]) -> None:
+		with self._lock:
+			for key in keys:
+				self._data.pop(key, None)
+
+	def discard_if(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+		"""Drop every entry for which `predicate(key, value)` is true"""
+		with self._lock:
+			stale = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+			for key in stale:
+				del self._data[key]
+		return len(stale)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+
+
+class PerLoop:
+	"""
+	One `factory()` result per running event loop, for asyncio clients whose
+	connections belong to the loop that opened them (`async_to_sync` runs each
+	call on a loop of its own). Entries of closed loops are dropped as new
+	loops arrive.
+	"""
+
+	def __init__(self, factory: Callable[[], Any]):
+		self._factory = factory
+		self._values: dict[asyncio.AbstractEventLoop, Any] = {}
+		self._lock = threading.Lock()
+
+	def get(self) -> Any:
+		loop = asyncio.get_running_loop()
+		value = self._values.get(loop, _MISSING)
+		if value is _MISSING:
+			with self._lock:
+				self._values = {key: value for key, value in self._values.items() if not key.is_closed()}
+				value = self._values[loop] = self._factory()
+		return value
@@ -1,4 +1,4 @@
-from django.http import Http404, JsonResponse
+from django.http import Http404, HttpResponse
 from ninja.errors import (
 	AuthenticationError,
 	AuthorizationError,
@@ -6,24 +6,23 @@ from ninja.errors import (
 	ValidationError,
 )
 
-from common.schema import make_response
+from common.renderers import json_response
+
+
+def error_response(status_code: int, message) -> HttpResponse:
+	# the APIResponse shape, serialised without building the schema first
+	return json_response({'success': False, 'status_code': status_code, 'message': message}, status=status_code)
 
 
 def custom_exception_handler(request, exc):
 	# Handle Ninja and Django exceptions with your response schema
 	if isinstance(exc, ValidationError):
-		return JsonResponse(
-			make_response(False, 422, getattr(exc, 'errors', str(exc))).__dict__,
-			status=422,
-		)
+		return error_response(422, getattr(exc, 'errors', str(exc)))
 	if isinstance(exc, (AuthenticationError, AuthorizationError)):
-		return JsonResponse(make_response(False, 403, str(exc)).__dict__, status=403)
+		return error_response(403, str(exc))
 	if isinstance(exc, HttpError):
-		return JsonResponse(
-			make_response(False, exc.status_code, str(exc)).__dict__,
-			status=exc.status_code,
-		)
+		return error_response(exc.status_code, str(exc))
 	if isinstance(exc, Http404):
-		return JsonResponse(make_response(False, 404, 'Not found').__dict__, status=404)
+		return error_response(404, 'Not found')
 	# Catch-all for any other exception
-	return JsonResponse(make_response(False, 500, str(exc)).__dict__, status=500)
+	return error_response(500, str(exc))
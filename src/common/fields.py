@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class DigestField(models.BinaryField):
+	"""
+	SHA-256 digest stored as 32 raw bytes (`bytea`) instead of 64 hex characters.
+
+	Python code keeps working with hex strings: values are accepted and
+	returned as hex, so lookups like `filter(jti=hex_digest)` are unchanged.
+	"""
+
+	description = 'SHA-256 digest'
+
+	def __init__(self, *args, **kwargs):
+		kwargs.setdefault('max_length', 32)
+		super().__init__(*args, **kwargs)
+
+	def deconstruct(self):
+		name, path, args, kwargs = super().deconstruct()
+		if kwargs.get('max_length') == 32:
+			del kwargs['max_length']
+		return name, path, args, kwargs
+
+	def from_db_value(self, value, expression, connection):
+		return None if value is None else bytes(value).hex()
+
+	def to_python(self, value):
+		if isinstance(value, bytes | memoryview):
+			return bytes(value).hex()
+		return value
+
+	def get_prep_value(self, value):
+		value = super().get_prep_value(value)
+		if isinstance(value, str):
+			return bytes.fromhex(value)
+		return value
+
+	def value_to_string(self, obj):
+		return self.value_from_object(obj)
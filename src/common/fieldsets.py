@@ -0,0 +1,27 @@
+"""
+Sparse fieldsets: `?fields=id,full_name` trims a response to the named top-level fields
+"""
+
+from collections.abc import Iterable
+
+from ninja.errors import ValidationError
+
+
+def parse_fields(value: str | None, allowed: Iterable[str]) -> tuple[str, ...] | None:
+	"""The requested field names in `allowed` order, or None when the parameter is absent"""
+	requested = {name.strip() for name in (value or '').split(',') if name.strip()}
+	if not requested:
+		return None
+	allowed = tuple(allowed)
+	unknown = requested.difference(allowed)
+	if unknown:
+		message = f'Unknown field(s): {", ".join(sorted(unknown))}. Allowed: {", ".join(allowed)}'
+		raise ValidationError([{'fields': message}])
+	return tuple(name for name in allowed if name in requested)
+
+
+def pick(data: dict, fields: tuple[str, ...] | None) -> dict:
+	"""`data` restricted to `fields`; all of it when `fields` is None"""
+	if fields is None:
+		return data
+	return {name: data[name] for name in fields if name in data}
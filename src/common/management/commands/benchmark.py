@@ -0,0 +1,101 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmark import (
+	SUITES,
+	BenchmarkContext,
+	BenchmarkResult,
+	autodiscover,
+	compare,
+	load_baseline,
+	save_baseline,
+)
+
+
+class Command(BaseCommand):
+	help = (
+		'Run micro-benchmarks against the configured Postgres and Redis and report ops/sec and p50/p99 latency'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('suites', nargs='*', help='Suites to run (default: all)')
+		parser.add_argument('--iterations', type=int, default=200, help='Timed iterations per case')
+		parser.add_argument('--warmup', type=int, default=20, help='Untimed iterations before each case')
+		parser.add_argument(
+			'--tokens',
+			default='1,100,10000',
+			help='Comma-separated tracked-token counts per benchmark user',
+		)
+		parser.add_argument('--save-baseline', metavar='PATH', help='Write the results to a baseline JSON file')
+		parser.add_argument('--compare', metavar='PATH', help='Compare the results with a saved baseline')
+		parser.add_argument(
+			'--max-regression',
+			type=float,
+			metavar='PERCENT',
+			help='With --compare, fail if any case loses more than this much throughput',
+		)
+		parser.add_argument('--list', action='store_true', help='List the available suites and exit')
+
+	def handle(self, *args, **options):
+		"""Main command handler"""
+		autodiscover()
+		if options['list']:
+			for name in sorted(SUITES):
+				self.stdout.write(name)
+			return
+
+		names = options['suites'] or sorted(SUITES)
+		unknown = set(names) - set(SUITES)
+		if unknown:
+			raise CommandError(
+				f'Unknown suite(s): {", ".join(sorted(unknown))}. Available: {", ".join(sorted(SUITES))}'
+			)
+
+		try:
+			token_counts = tuple(int(count) for count in options['tokens'].split(','))
+		except ValueError as e:
+			raise CommandError('--tokens must be a comma-separated list of integers') from e
+
+		ctx = BenchmarkContext(
+			iterations=options['iterations'],
+			warmup=options['warmup'],
+			token_counts=token_counts,
+			on_result=self._write_result,
+		)
+		for name in names:
+			self.stdout.write(self.style.HTTP_INFO(f'\n⚡ {name}'))
+			self.stdout.write(f'  {"case":<64} {"ops/sec":>10} {"p50 ms":>9} {"p99 ms":>9}')
+			SUITES[name](ctx)
+
+		if options['save_baseline']:
+			save_baseline(options['save_baseline'], ctx.results)
+			self.stdout.write(self.style.SUCCESS(f'\n✅ Baseline saved to {options["save_baseline"]}'))
+
+		if options['compare']:
+			self._compare(ctx.results, options['compare'], options['max_regression'])
+
+	def _write_result(self, result: BenchmarkResult):
+		self.stdout.write(
+			f'  {result.name:<64} {result.ops_per_sec:>10.1f} {result.p50_ms:>9.3f} {result.p99_ms:>9.3f}'
+		)
+
+	def _compare(self, results: list[BenchmarkResult], path: str, max_regression: float | None):
+		try:
+			baseline = load_baseline(path)
+		except (OSError, ValueError, TypeError) as e:
+			raise CommandError(f'Could not read baseline {path}: {e!s}') from e
+
+		self.stdout.write(self.style.HTTP_INFO(f'\n📊 Compared with {path}'))
+		self.stdout.write(f'  {"case":<64} {"baseline":>10} {"current":>10} {"change":>8}')
+		regressions = []
+		for result, base, change in compare(results, baseline):
+			line = f'  {result.name:<64} {base.ops_per_sec:>10.1f} {result.ops_per_sec:>10.1f} {change:>+7.1f}%'
+			if max_regression is not None and change < -max_regression:
+				regressions.append(result.name)
+				self.stdout.write(self.style.ERROR(line))
+			elif change < 0:
+				self.stdout.write(self.style.WARNING(line))
+			else:
+				self.stdout.write(self.style.SUCCESS(line))
+
+		if regressions:
+			raise CommandError(f'{len(regressions)} case(s) regressed by more than {max_regression}%')
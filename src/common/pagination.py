@@ -0,0 +1,153 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+import json
+from typing import Any, Generic, TypeVar
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+from ninja import Field, Schema
+from ninja.errors import ValidationError
+from ninja.pagination import AsyncPaginationBase, RouterPaginated, paginate
+from ninja.signature.details import is_collection_type
+from pydantic import BaseModel
+
+T = TypeVar('T')
+
+
+class CursorPage(BaseModel, Generic[T]):
+	results: list[T]
+	next: str | None = None
+	previous: str | None = None
+
+
+class CursorPagination(AsyncPaginationBase):
+	"""
+	Keyset pagination over a unique ordering such as `('-created_at', '-id')`.
+	The ordering may name annotations, e.g. a search rank.
+
+	Pages are fetched with `WHERE (created_at, id) < (cursor)` instead of
+	OFFSET, so deep pages cost the same as the first one, rows inserted
+	meanwhile never shift a page, and no COUNT(*) is run. Cursors are
+	opaque url-safe base64 strings.
+	"""
+
+	ordering: tuple[str, ...] = ('-created_at', '-id')
+	page_size: int = 50
+	max_page_size: int = 200
+
+	class Input(Schema):
+		cursor: str | None = Field(None, description='Cursor returned as `next` or `previous`')
+		page_size: int | None = Field(None, ge=1, description='Items per page')
+
+	class Output(Schema):
+		results: list[Any]
+		next: str | None = None
+		previous: str | None = None
+
+	items_attribute = 'results'
+
+	def __init__(
+		self,
+		*,
+		ordering: tuple[str, ...] | None = None,
+		page_size: int | None = None,
+		max_page_size: int | None = None,
+		**kwargs: Any,
+	) -> None:
+		super().__init__(**kwargs)
+		self.ordering = tuple(ordering or self.ordering)
+		self.page_size = page_size or self.page_size
+		self.max_page_size = max_page_size or self.max_page_size
+		self.fields = [order.lstrip('-') for order in self.ordering]
+
+	@classmethod
+	def ordered_by(cls, *ordering: str) -> type['CursorPagination']:
+		"""Subclass paginating on another key, e.g. `ordered_by('-date_joined', '-id')`"""
+		return type(cls.__name__, (cls,), {'ordering': ordering})
+
+	def encode_cursor(self, item: Any, reverse: bool = False) -> str:
+		position = [str(getattr(item, field)) for field in self.fields]
+		data = json.dumps({'p': position, 'r': reverse}, separators=(',', ':')).encode()
+		return urlsafe_b64encode(data).decode().rstrip('=')
+
+	@staticmethod
+	def _field(queryset: QuerySet, name: str):
+		annotation = queryset.query.annotations.get(name)
+		return annotation.output_field if annotation is not None else queryset.model._meta.get_field(name)
+
+	def decode_cursor(self, queryset: QuerySet, cursor: str) -> tuple[list, bool]:
+		try:
+			data = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+			position = [
+				self._field(queryset, field).to_python(value)
+				for field, value in zip(self.fields, data['p'], strict=True)
+			]
+			return position, bool(data.get('r'))
+		except (binascii.Error, DjangoValidationError, KeyError, TypeError, ValueError) as e:
+			raise ValidationError([{'cursor': 'Invalid cursor'}]) from e
+
+	def _after(self, ordering: tuple[str, ...], position: list) -> Q:
+		"""Rows strictly after `position` in `ordering` (row-value comparison spelled out)"""
+		lookups = ['lt' if order.startswith('-') else 'gt' for order in ordering]
+		condition = Q()
+		for i in reversed(range(len(self.fields))):
+			step = Q(**{f'{self.fields[i]}__{lookups[i]}': position[i]})
+			if i < len(self.fields) - 1:
+				step |= Q(**{self.fields[i]: position[i]}) & condition
+			condition = step
+		# redundant with the above, but gives Postgres an index range to start from
+		return Q(**{f'{self.fields[0]}__{lookups[0]}e': position[0]}) & condition
+
+	def _page_query(self, queryset: QuerySet, pagination: Input) -> tuple[QuerySet, int, bool, bool]:
+		page_size = min(pagination.page_size or self.page_size, self.max_page_size)
+		ordering, reverse, has_cursor = self.ordering, False, bool(pagination.cursor)
+		if has_cursor:
+			position, reverse = self.decode_cursor(queryset, pagination.cursor)
+			if reverse:
+				ordering = tuple(order[1:] if order.startswith('-') else f'-{order}' for order in ordering)
+			queryset = queryset.filter(self._after(ordering, position))
+		# one extra row tells whether another page follows
+		return queryset.order_by(*ordering)[: page_size + 1], page_size, reverse, has_cursor
+
+	def _page(self, items: list, page_size: int, reverse: bool, has_cursor: bool) -> dict:
+		has_more = len(items) > page_size
+		items = items[:page_size]
+		if reverse:
+			items.reverse()
+		# a backward page always has rows after it; a forward page has rows before it once a cursor was used
+		has_next = has_more if not reverse else True
+		has_previous = has_more if reverse else has_cursor
+		return {
+			'results': items,
+			'next': self.encode_cursor(items[-1]) if items and has_next else None,
+			'previous': self.encode_cursor(items[0], reverse=True) if items and has_previous else None,
+		}
+
+	def paginate_queryset(self, queryset: QuerySet, pagination: Input, request: HttpRequest, **params) -> dict:
+		queryset, *page_args = self._page_query(queryset, pagination)
+		return self._page(list(queryset), *page_args)
+
+	async def apaginate_queryset(
+		self, queryset: QuerySet, pagination: Input, request: HttpRequest, **params
+	) -> dict:
+		queryset, *page_args = self._page_query(queryset, pagination)
+		return self._page([item async for item in queryset], *page_args)
+
+
+class PaginatedRouter(RouterPaginated):
+	"""
+	RouterPaginated with the pagination class chosen per router, e.g.
+	`PaginatedRouter(pagination_class=CursorPagination.ordered_by('-date_joined', '-id'))`.
+	"""
+
+	def __init__(self, *args: Any, pagination_class: type | None = None, **kwargs: Any) -> None:
+		super().__init__(*args, **kwargs)
+		if pagination_class is not None:
+			self.pagination_class = pagination_class
+
+	def add_api_operation(self, path: str, methods: list[str], view_func, **kwargs: Any) -> None:
+		if is_collection_type(kwargs['response']):
+			view_func = paginate(self.pagination_class)(view_func)
+		# skip RouterPaginated, which would paginate with the settings class again
+		return super(RouterPaginated, self).add_api_operation(path, methods, view_func, **kwargs)
@@ -0,0 +1,56 @@
+from django.contrib.admin import site
+from django.db import connection
+
+from accounts.models import CustomerProfile, User, UserType
+from common.admin import EstimatedCountPaginator, estimated_count
+from middlewares.jwt.token import get_obtain_token_pair
+from tokens.models import TrackedToken
+
+
+def analyze(table: str) -> None:
+	with connection.cursor() as cursor:
+		cursor.execute(f'ANALYZE {table}')
+
+
+def test_list_select_related_follows_foreign_keys_in_list_display(rf):
+	request = rf.get('/')
+
+	assert site._registry[TrackedToken].get_list_select_related(request) == ('user',)
+	assert site._registry[CustomerProfile].get_list_select_related(request) == ('user',)
+	assert site._registry[User].get_list_select_related(request) is False
+
+
+def test_counts_are_estimated_from_statistics(db):
+	for i in range(3):
+		User.objects.create_user(email=f'user{i}@example.com', user_type=UserType.VENDOR)
+	users = User.objects.order_by('pk')
+	total = users.count()
+
+	# below the threshold the count is exact
+	assert EstimatedCountPaginator(users, 10).count == total
+
+	analyze(connection.ops.quote_name(User._meta.db_table))
+	paginator = EstimatedCountPaginator(users, 10)
+	paginator.exact_count_below = 0
+	assert paginator.count == total
+	assert estimated_count(users.filter(user_type=UserType.VENDOR)) >= 1
+
+
+def test_partitioned_tables_sum_their_partitions(db):
+	for i in range(4):
+		get_obtain_token_pair(User.objects.create_user(email=f'user{i}@example.com'))
+	tokens = TrackedToken.all_objects.order_by('pk')
+	total = tokens.count()
+	assert total == 4
+
+	# like autovacuum, which analyses the partitions but never the parent
+	with connection.cursor() as cursor:
+		cursor.execute(
+			'SELECT relid::regclass::text FROM pg_partition_tree(%s::regclass) WHERE isleaf',
+			[TrackedToken._meta.db_table],
+		)
+		partitions = [row[0] for row in cursor.fetchall()]
+	for partition in partitions:
+		analyze(partition)
+	assert estimated_count(tokens) == total
+	assert estimated_count(TrackedToken.objects.all()) >= 1
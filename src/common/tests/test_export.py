@@ -0,0 +1,32 @@
+import csv
+from datetime import datetime
+import json
+
+from asgiref.sync import async_to_sync
+
+from accounts.models import User, UserType
+from common.export import export_response
+
+
+async def read_streaming(response) -> bytes:
+	return b''.join([chunk async for chunk in response.streaming_content])
+
+
+def test_exports_stream_csv_and_jsonl_from_one_query(db, django_assert_num_queries):
+	User.objects.create_user(email='vendor@example.com', full_name='=HYPERLINK("http://x")', user_type=UserType.VENDOR)
+	User.objects.create_user(email='customer@example.com')
+	users = User.objects.filter(user_type=UserType.VENDOR)
+	columns = {'email': 'email', 'full_name': 'full_name', 'last_login': 'last_login'}
+
+	response = export_response(users, columns, 'csv', 'users')
+	assert response['Content-Disposition'].startswith('attachment; filename="users-')
+	with django_assert_num_queries(1):
+		rows = list(csv.DictReader(async_to_sync(read_streaming)(response).decode().splitlines()))
+	assert rows == [{'email': 'vendor@example.com', 'full_name': '\'=HYPERLINK("http://x")', 'last_login': ''}]
+
+	response = export_response(users, {'id': 'id', 'name': 'full_name', 'joined': 'date_joined'}, 'jsonl', 'users')
+	lines = async_to_sync(read_streaming)(response).splitlines()
+	row = json.loads(lines[0])
+	assert row['id'] == users.get().pk
+	assert row['name'] == '=HYPERLINK("http://x")'  # only CSV cells are escaped
+	assert datetime.fromisoformat(row['joined']) == users.get().date_joined
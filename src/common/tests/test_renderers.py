@@ -0,0 +1,27 @@
+from datetime import UTC, datetime
+from decimal import Decimal
+import json
+from uuid import UUID
+
+from ninja.renderers import JSONRenderer
+
+from accounts.benchmarks import user_page
+from common.renderers import ORJSONRenderer, loads
+
+
+def test_orjson_renderer_matches_the_stdlib_renderer():
+	data = {
+		**user_page(3),
+		'uuid': UUID(int=1),
+		'amount': Decimal('1.10'),
+		'at': datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=UTC),
+		1: 'int key',
+	}
+
+	rendered = loads(ORJSONRenderer().render(None, data, response_status=200))
+	expected = json.loads(JSONRenderer().render(None, data, response_status=200))
+
+	# Django's encoder stops at milliseconds
+	assert rendered.pop('at') == '2026-01-02T03:04:05.123456Z'
+	assert expected.pop('at') == '2026-01-02T03:04:05.123Z'
+	assert rendered == expected
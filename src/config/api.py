@@ -8,6 +8,7 @@ from ninja.errors import (
 )
 from django.http import Http404
 from common.exception_handlers import custom_exception_handler
+from common.renderers import ORJSONParser, ORJSONRenderer
 
 from ninja.pagination import RouterPaginated
 
@@ -22,6 +23,8 @@ api = NinjaAPI(
 	urls_namespace='backend',
 	default_router=RouterPaginated(),
 	auth=HttpJwtAuth(),
+	renderer=ORJSONRenderer(),
+	parser=ORJSONParser(),
 )
 
 api.add_exception_handler(AuthenticationError, custom_exception_handler)
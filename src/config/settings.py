@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -63,6 +64,7 @@ INSTALLED_APPS = [
 	'django.contrib.sessions',
 	'django.contrib.messages',
 	'django.contrib.staticfiles',
+	'django.contrib.postgres',
 	# Third-party apps
 	'channels',
 	'guardian',
@@ -201,9 +203,45 @@ TOKEN_CLAIM_USER_ATTRIBUTE_MAP = {
 	# 'is_superuser': 'is_superuser',
 	# 'user_type': 'user_type',
 	'last_login': 'last_login',
+	'token_epoch': 'token_epoch',
 }
 JWT_JTI = env('JWT_JTI')
 JWT_ALGORITHM = env('JWT_ALGORITHM')
+# Asymmetric signing keys: [{"kid", "algorithm", "public_key_path", "private_key_path"}, ...]
+# Tokens are signed with JWT_ACTIVE_KID; without it SECRET_KEY/JWT_ALGORITHM are used
+JWT_SIGNING_KEYS = env.json('JWT_SIGNING_KEYS', default=[])
+JWT_ACTIVE_KID = env('JWT_ACTIVE_KID', default=None)
+# With JWT_ACTIVE_KID set: whether tokens without a kid (SECRET_KEY) are still accepted
+JWT_ACCEPT_LEGACY_KEY = env.bool('JWT_ACCEPT_LEGACY_KEY', default=True)
+JWT_JWKS_MAX_AGE = env.int('JWT_JWKS_MAX_AGE', default=300)  # seconds
+# Token payload JSON: 'orjson' (or 'auto') or 'json'
+JWT_JSON_BACKEND = env('JWT_JSON_BACKEND', default='auto')
+# Clock skew allowed when checking exp, iat and nbf
+JWT_LEEWAY = env.int('JWT_LEEWAY', default=0)  # seconds
+# Per-process cache of revoked/valid token ids, invalidated over Redis pub/sub
+JWT_REVOCATION_CACHE_SIZE = env.int('JWT_REVOCATION_CACHE_SIZE', default=50_000)
+JWT_REVOCATION_CACHE_TTL = env.int('JWT_REVOCATION_CACHE_TTL', default=60)  # seconds
+JWT_REVOCATION_CHANNEL = env('JWT_REVOCATION_CHANNEL', default='jwt:revocations')
+# Redis timeouts (seconds) for revocation, rotation and last-seen calls, so an outage fails fast
+JWT_REDIS_CONNECT_TIMEOUT = env.float('JWT_REDIS_CONNECT_TIMEOUT', default=1.0)
+JWT_REDIS_SOCKET_TIMEOUT = env.float('JWT_REDIS_SOCKET_TIMEOUT', default=2.0)
+# Verified-token cache ceiling in seconds (0 disables); entries never outlive the token's exp
+JWT_VERIFIED_TOKEN_CACHE_TTL = env.int('JWT_VERIFIED_TOKEN_CACHE_TTL', default=0)
+JWT_VERIFIED_TOKEN_CACHE_SIZE = env.int('JWT_VERIFIED_TOKEN_CACHE_SIZE', default=10_000)
+# Task modules the procrastinate worker imports at startup (periodic tasks must be registered)
+PROCRASTINATE_IMPORT_PATHS = ['tasks.tokens.token_tasks', 'tasks.accounts.last_seen_tasks']
+# Serialised UserOut cache for current_user/user profile: Redis TTL and per-process L1 tier
+USER_OUT_CACHE_TTL = env.int('USER_OUT_CACHE_TTL', default=300)  # seconds
+USER_OUT_CACHE_LOCAL_TTL = env.int('USER_OUT_CACHE_LOCAL_TTL', default=5)  # seconds, 0 disables
+USER_OUT_CACHE_LOCAL_SIZE = env.int('USER_OUT_CACHE_LOCAL_SIZE', default=10_000)
+# Last-seen tracking: seconds between a process's Redis writes per user, and how many users it remembers
+LAST_SEEN_RESOLUTION = env.int('LAST_SEEN_RESOLUTION', default=60)
+LAST_SEEN_LOCAL_SIZE = env.int('LAST_SEEN_LOCAL_SIZE', default=10_000)
+# Password hashing pool: worker threads and how many jobs may queue before login/register answer 429
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=os.cpu_count() or 1)
+PASSWORD_HASHING_QUEUE_SIZE = env.int('PASSWORD_HASHING_QUEUE_SIZE', default=PASSWORD_HASHING_WORKERS * 4)
+# Default pagination for RouterPaginated/@paginate list endpoints: keyset, no COUNT(*)
+NINJA_PAGINATION_CLASS = 'common.pagination.CursorPagination'
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
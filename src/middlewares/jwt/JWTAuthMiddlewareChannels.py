@@ -1,16 +1,21 @@
 import logging
 from urllib.parse import parse_qs
 
-from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 
 logger = logging.getLogger(__name__)
 
 
 class JWTAuthMiddleware(BaseMiddleware):
+	def __init__(self, inner, lazy_user: bool = True):
+		# Consumers only need the user id, so skip the user query by default
+		super().__init__(inner)
+		self.lazy_user = lazy_user
+
 	async def __call__(self, scope, receive, send):
 		# Import here to avoid Django startup issues
-		from middlewares.jwt.token import get_user_from_token
+		from middlewares.jwt.token import aget_user_from_token
+		from services.accounts.last_seen import last_seen_store
 
 		query_string = scope.get('query_string', b'').decode()
 		token = parse_qs(query_string).get('token', [None])[0]
@@ -18,7 +23,7 @@ class JWTAuthMiddleware(BaseMiddleware):
 
 		if token:
 			try:
-				user = await database_sync_to_async(get_user_from_token)(token)
+				user = await aget_user_from_token(token, lazy=self.lazy_user)
 			except Exception as e:
 				logger.error(f'JWT Middleware: Error getting user from token: {e}')
 		else:
@@ -36,10 +41,14 @@ class JWTAuthMiddleware(BaseMiddleware):
 			})
 			return
 
+		await last_seen_store.atouch(user.pk)
 		return await super().__call__(scope, receive, send)
 
 
 def JWTAuthMiddlewareStack(inner):
-	from channels.auth import AuthMiddlewareStack
+	from channels.sessions import CookieMiddleware, SessionMiddleware
 
-	return JWTAuthMiddleware(AuthMiddlewareStack(inner))
+	# The session AuthMiddleware is left out on purpose: the JWT user is always
+	# set (or the socket rejected), so it would only add a session lookup per
+	# handshake and overwrite attributes on the authenticated user.
+	return JWTAuthMiddleware(CookieMiddleware(SessionMiddleware(inner)))
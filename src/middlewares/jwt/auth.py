@@ -2,15 +2,23 @@ from django.http import HttpRequest
 from ninja.security import HttpBearer
 from ninja.security.http import DecodeError
 
-from .token import get_user_from_token
+from .token import aget_user_from_token, get_user_from_token
 
 
 class HttpJwtAuth(HttpBearer):
+    def __init__(self, lazy_user: bool = False) -> None:
+        # lazy_user: authenticate with a claims-only TokenUser (no user query)
+        super().__init__()
+        self.lazy_user = lazy_user
+
     def authenticate(self, request: HttpRequest, token: str) -> bool:
         token = self.decode_authorization(request.headers["Authorization"])
-        user =  get_user_from_token(token)
+        user =  get_user_from_token(token, lazy=self.lazy_user)
         if user.is_authenticated:
+            from services.accounts.last_seen import last_seen_store
+
             request.user = user
+            last_seen_store.touch(user.pk)
         return True
 
     def decode_authorization(self, value: str) -> str:
@@ -21,3 +29,19 @@ class HttpJwtAuth(HttpBearer):
         token = parts[1]
         return token
 
+
+class AsyncHttpJwtAuth(HttpJwtAuth):
+    """
+    Async variant of HttpJwtAuth for async operations: token checks use the
+    async ORM and Redis client instead of occupying a worker thread.
+    """
+
+    async def authenticate(self, request: HttpRequest, token: str) -> bool:
+        token = self.decode_authorization(request.headers["Authorization"])
+        user = await aget_user_from_token(token, lazy=self.lazy_user)
+        if user.is_authenticated:
+            from services.accounts.last_seen import last_seen_store
+
+            request.user = user
+            await last_seen_store.atouch(user.pk)
+        return True
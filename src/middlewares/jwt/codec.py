@@ -0,0 +1,202 @@
+"""
+JWT encoder/decoder compiled once from settings
+"""
+
+from collections.abc import Callable
+from functools import cache
+import json
+from operator import attrgetter
+import time
+from typing import Any
+from uuid import uuid4
+
+from django.conf import settings
+import orjson
+
+from jwt import DecodeError, PyJWT
+from jwt.utils import base64url_encode
+
+from .keys import KeyRing, SigningKey, key_ring
+
+
+def _json_default(o: Any) -> Any:
+	from .token import TokenUserEncoder
+
+	return TokenUserEncoder().default(o)
+
+
+def _json_dumps(payload: dict) -> bytes:
+	return json.dumps(payload, separators=(',', ':'), default=_json_default).encode()
+
+
+def _orjson_dumps(payload: dict) -> bytes:
+	return orjson.dumps(payload, default=_json_default)
+
+
+def get_json_backend(name: str = 'auto') -> tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+	"""Return `(dumps, loads)` for 'json', or orjson for 'orjson' and 'auto'"""
+	if name == 'json':
+		return _json_dumps, json.loads
+	return _orjson_dumps, orjson.loads
+
+
+class _PyJWT(PyJWT):
+	"""PyJWT with the payload parsed by the codec's JSON backend"""
+
+	def __init__(self, loads: Callable[[bytes], Any], options: dict):
+		super().__init__(options)
+		self._loads = loads
+
+	def _decode_payload(self, decoded: dict[str, Any]) -> dict[str, Any]:
+		try:
+			payload = self._loads(decoded['payload'])
+		except (ValueError, RecursionError) as e:
+			raise DecodeError(f'Invalid payload string: {e}') from e
+		if not isinstance(payload, dict):
+			raise DecodeError('Invalid payload string: must be a json object')
+		return payload
+
+
+class TokenCodec:
+	"""
+	Issues and verifies tokens without touching settings on the hot path.
+
+	TOKEN_CLAIM_USER_ATTRIBUTE_MAP is compiled into `(claim, getter)` and
+	`(claim, attribute)` tuples, lifetimes are kept in seconds, and payloads
+	are serialized with the configured JSON backend before signing.
+	Verification is PyJWT's, with the key ring's prepared keys.
+	"""
+
+	# every token we issue carries both
+	REQUIRED_CLAIMS = ('exp', 'iat')
+	# columns the database owns: a token's copy goes stale, and applying it to
+	# a loaded user would let a full save() roll the column back
+	UNAPPLIED_ATTRIBUTES = frozenset({'last_login', 'token_epoch'})
+
+	def __init__(
+		self,
+		claim_map: dict,
+		access_lifetime: float,
+		refresh_lifetime: float,
+		keys: KeyRing = key_ring,
+		json_dumps: Callable[[Any], bytes] | None = None,
+		json_loads: Callable[[bytes], Any] | None = None,
+		leeway: float = 0,
+	):
+		from .token import TokenTypes
+
+		default_dumps, default_loads = get_json_backend()
+		self.dumps = json_dumps or default_dumps
+		self.loads = json_loads or default_loads
+		self.keys = keys
+		self.lifetimes = {
+			TokenTypes.ACCESS: access_lifetime,
+			TokenTypes.REFRESH: refresh_lifetime,
+		}
+		self.claims = tuple(claim_map)
+		self.claim_getters = tuple(
+			(claim, attrgetter(attribute) if isinstance(attribute, str) else attribute)
+			for claim, attribute in claim_map.items()
+		)
+		self.claim_attributes = tuple(
+			(claim, attribute if isinstance(attribute, str) else claim)
+			for claim, attribute in claim_map.items()
+		)
+		self.applied_attributes = tuple(
+			(claim, attribute)
+			for claim, attribute in self.claim_attributes
+			if attribute not in self.UNAPPLIED_ATTRIBUTES
+		)
+		self._header_segments: dict[tuple, bytes] = {}
+		self.leeway = leeway
+		self._jwt = _PyJWT(self.loads, {'require': list(self.REQUIRED_CLAIMS)})
+
+	@classmethod
+	def from_settings(cls) -> 'TokenCodec':
+		dumps, loads = get_json_backend(getattr(settings, 'JWT_JSON_BACKEND', 'auto'))
+		return cls(
+			claim_map=settings.TOKEN_CLAIM_USER_ATTRIBUTE_MAP,
+			access_lifetime=settings.JWT_ACCESS_TOKEN_LIFETIME.total_seconds(),
+			refresh_lifetime=settings.JWT_REFRESH_TOKEN_LIFETIME.total_seconds(),
+			json_dumps=dumps,
+			json_loads=loads,
+			leeway=getattr(settings, 'JWT_LEEWAY', 0),
+		)
+
+	def payload_for_user(self, user) -> dict:
+		return {claim: getter(user) for claim, getter in self.claim_getters}
+
+	def claims_from(self, payload: dict) -> dict:
+		"""The user claims of a decoded token, keyed by claim name"""
+		return {claim: payload.get(claim) for claim in self.claims}
+
+	def user_attributes(self, payload: dict) -> dict:
+		"""The user claims of a decoded token, keyed by user attribute"""
+		return {attribute: payload.get(claim) for claim, attribute in self.claim_attributes}
+
+	def apply_claims(self, user, payload: dict) -> None:
+		"""Set the token's claims on a loaded user, except UNAPPLIED_ATTRIBUTES"""
+		for claim, attribute in self.applied_attributes:
+			setattr(user, attribute, payload.get(claim))
+
+	def encode(
+		self,
+		payload: dict,
+		token_type,
+		jti: str | None = None,
+		json_encoder: type[json.JSONEncoder] | None = None,
+		headers: dict | None = None,
+	) -> tuple[str, dict]:
+		now = time.time()
+		payload_data = {
+			**payload,
+			'jti': jti or uuid4().hex,
+			'exp': int(now + self.lifetimes[token_type]),
+			'iat': int(now),
+			'token_type': token_type,
+		}
+
+		if json_encoder is None:
+			body = self.dumps(payload_data)
+		else:
+			body = json.dumps(payload_data, separators=(',', ':'), cls=json_encoder).encode()
+
+		signing_key = self.keys.active
+		if headers:
+			header_segment = self._header_segment(signing_key, headers)
+		else:
+			cache_key = (signing_key.kid, signing_key.algorithm)
+			header_segment = self._header_segments.get(cache_key)
+			if header_segment is None:
+				header_segment = self._header_segments[cache_key] = self._header_segment(signing_key)
+
+		signing_input = header_segment + b'.' + base64url_encode(body)
+		signature = signing_key.implementation.sign(signing_input, signing_key.signing_key)
+		return (signing_input + b'.' + base64url_encode(signature)).decode(), payload_data
+
+	def decode(self, token: str) -> dict:
+		"""
+		Verify the signature and the registered claims (exp, iat, nbf, within
+		JWT_LEEWAY seconds) and return the payload.
+
+		Only the algorithm registered for the header's kid is accepted, so a
+		token cannot pick a weaker algorithm or swap in the public key as an
+		HMAC secret.
+		"""
+		signing_key = self.keys.get_for_token(token)
+		return self._jwt.decode(
+			token, signing_key.verifying_key, algorithms=[signing_key.algorithm], leeway=self.leeway
+		)
+
+	@staticmethod
+	def _header_segment(signing_key: SigningKey, headers: dict | None = None) -> bytes:
+		header = {'alg': signing_key.algorithm, 'typ': 'JWT', **(headers or {})}
+		if signing_key.kid is not None:
+			header['kid'] = signing_key.kid
+		return base64url_encode(json.dumps(header, separators=(',', ':'), sort_keys=True).encode())
+
+
+@cache
+def get_token_codec() -> TokenCodec:
+	"""The process-wide codec; call `get_token_codec.cache_clear()` after changing settings"""
+	return TokenCodec.from_settings()
@@ -0,0 +1,150 @@
+"""
+In-memory JWT signing key ring and its public JWKS document
+"""
+
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import threading
+from typing import Any
+
+from django.conf import settings
+
+import jwt
+from jwt import InvalidAlgorithmError, InvalidTokenError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SigningKey:
+	kid: str | None
+	algorithm: str
+	signing_key: Any  # None for retired keys that only verify
+	verifying_key: Any
+	implementation: Any  # the PyJWT Algorithm the keys were prepared for
+
+	@property
+	def is_symmetric(self) -> bool:
+		return self.algorithm.startswith('HS')
+
+
+class KeyRing:
+	"""
+	Signing keys loaded once per process from JWT_SIGNING_KEYS.
+
+	Each entry is a dict with `kid`, `algorithm` (RS256, ES256, EdDSA, ...),
+	`public_key_path` and, for keys we still sign with, `private_key_path`.
+	New tokens are signed with JWT_ACTIVE_KID and carry it as the `kid`
+	header. To rotate, add the new key, switch JWT_ACTIVE_KID, and keep the
+	old entry (public key only) until its tokens have expired.
+
+	Tokens without a `kid` header are verified with SECRET_KEY and
+	JWT_ALGORITHM, which is also the signing key when no key ring is set up.
+	Once JWT_ACTIVE_KID is set, set JWT_ACCEPT_LEGACY_KEY to False after the
+	last such token has expired to stop accepting them.
+	"""
+
+	MAX_HEADERS = 64  # distinct header segments remembered by get_for_token
+
+	def __init__(self):
+		self._by_header: dict[str, SigningKey] = {}
+		self._keys: dict[str | None, SigningKey] | None = None
+		self._active: SigningKey | None = None
+		self._jwks: bytes | None = None
+		self._lock = threading.Lock()
+
+	@property
+	def keys(self) -> dict[str | None, SigningKey]:
+		self._ensure_loaded()
+		return self._keys
+
+	@property
+	def active(self) -> SigningKey:
+		self._ensure_loaded()
+		return self._active
+
+	def get(self, kid: str | None) -> SigningKey:
+		"""Return the key a token header points to"""
+		try:
+			return self.keys[kid]
+		except KeyError:
+			raise InvalidTokenError('Unknown signing key.') from None
+
+	def get_for_token(self, token: str) -> SigningKey:
+		# Every token signed with a given key has the same header segment, so
+		# remember the lookup instead of decoding the header each time.
+		header_segment = token.partition('.')[0]
+		key = self._by_header.get(header_segment)
+		if key is None:
+			header = jwt.get_unverified_header(token)
+			key = self.get(header.get('kid'))
+			if header.get('alg') != key.algorithm:
+				raise InvalidAlgorithmError('The specified alg value is not allowed')
+			if len(self._by_header) < self.MAX_HEADERS:
+				self._by_header[header_segment] = key
+		return key
+
+	def jwks(self) -> bytes:
+		"""Serialized JWKS with the public half of every asymmetric key"""
+		if self._jwks is None:
+			keys = []
+			for key in self.keys.values():
+				if key.kid is None or key.is_symmetric:
+					continue
+				jwk = key.implementation.to_jwk(key.verifying_key, as_dict=True)
+				keys.append({**jwk, 'kid': key.kid, 'alg': key.algorithm, 'use': 'sig'})
+			self._jwks = json.dumps({'keys': keys}).encode()
+		return self._jwks
+
+	def reload(self) -> None:
+		"""Forget the loaded keys so the next access re-reads settings and key files"""
+		with self._lock:
+			self._keys = None
+			self._active = None
+			self._jwks = None
+			self._by_header = {}
+
+	def _ensure_loaded(self) -> None:
+		if self._keys is None:
+			with self._lock:
+				if self._keys is None:
+					self._load()
+
+	def _load(self) -> None:
+		implementation = jwt.get_algorithm_by_name(settings.JWT_ALGORITHM)
+		secret = implementation.prepare_key(settings.SECRET_KEY)
+		legacy = SigningKey(
+			kid=None,
+			algorithm=settings.JWT_ALGORITHM,
+			signing_key=secret,
+			verifying_key=secret,
+			implementation=implementation,
+		)
+		active_kid = getattr(settings, 'JWT_ACTIVE_KID', None)
+		keys = {None: legacy} if not active_kid or getattr(settings, 'JWT_ACCEPT_LEGACY_KEY', True) else {}
+		for entry in getattr(settings, 'JWT_SIGNING_KEYS', []):
+			implementation = jwt.get_algorithm_by_name(entry['algorithm'])
+			private_key_path = entry.get('private_key_path')
+			keys[entry['kid']] = SigningKey(
+				kid=entry['kid'],
+				algorithm=entry['algorithm'],
+				signing_key=implementation.prepare_key(Path(private_key_path).read_bytes())
+				if private_key_path
+				else None,
+				verifying_key=implementation.prepare_key(Path(entry['public_key_path']).read_bytes()),
+				implementation=implementation,
+			)
+
+		active = keys.get(active_kid) if active_kid else legacy
+		if active is None or active.signing_key is None:
+			raise ValueError(f'JWT_ACTIVE_KID {active_kid!r} has no private key in JWT_SIGNING_KEYS')
+
+		logger.info(f'🔑 Loaded {len(keys) - (None in keys)} JWT signing key(s), active kid: {active.kid}')
+		self._active = active
+		self._keys = keys
+
+
+# Global instance
+key_ring = KeyRing()
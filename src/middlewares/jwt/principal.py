@@ -0,0 +1,97 @@
+"""
+Claims-only user principal for JWT-authenticated requests
+"""
+
+
+def _user_model():
+	from django.contrib.auth import get_user_model
+
+	return get_user_model()
+
+
+class TokenUser:
+	"""
+	Authenticated principal built purely from the token claims.
+
+	Attributes listed in TOKEN_CLAIM_USER_ATTRIBUTE_MAP are answered from the
+	token. The first access to any other attribute loads the `accounts.User`
+	row once and delegates to it, so handlers that only need `request.user.id`
+	never query the users table.
+
+	The principal is not a model instance: use `get_user()` wherever a real
+	`User` is required (e.g. assigning a foreign key). Queryset filters such
+	as `filter(user=request.user)` work because it converts to the user id.
+	"""
+
+	__slots__ = ('_claims', '_payload', '_user')
+
+	is_authenticated = True
+	is_anonymous = False
+
+	def __init__(self, payload: dict):
+		from .codec import get_token_codec
+
+		object.__setattr__(self, '_claims', get_token_codec().user_attributes(payload))
+		object.__setattr__(self, '_payload', payload)
+		object.__setattr__(self, '_user', None)
+
+	@property
+	def pk(self):
+		return self._claims.get('id')
+
+	def get_user(self):
+		"""Load (once) and return the full user, with token claims applied"""
+		if self._user is None:
+			from .token import set_token_claims_to_user
+
+			user = _user_model().objects.get(id=self.pk)
+			set_token_claims_to_user(user, self._payload)
+			object.__setattr__(self, '_user', user)
+		return self._user
+
+	async def aget_user(self):
+		"""Async counterpart of `get_user()`"""
+		if self._user is None:
+			from .token import set_token_claims_to_user
+
+			user = await _user_model().objects.aget(id=self.pk)
+			set_token_claims_to_user(user, self._payload)
+			object.__setattr__(self, '_user', user)
+		return self._user
+
+	def __getattr__(self, name):
+		# Only reached for names that are neither slots nor class attributes.
+		# Private names and anything the User model does not define are not
+		# delegated, so duck-typing probes (`_meta`, `resolve_expression`, ...)
+		# never trigger a query.
+		claims = object.__getattribute__(self, '_claims')
+		if name in claims:
+			return claims[name]
+		if name.startswith('_') or not hasattr(_user_model(), name):
+			raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+		return getattr(self.get_user(), name)
+
+	def __setattr__(self, name, value):
+		if name in self._claims:
+			self._claims[name] = value
+			if self._user is not None:
+				setattr(self._user, name, value)
+			return
+		setattr(self.get_user(), name, value)
+
+	def __int__(self) -> int:
+		return int(self.pk)
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, TokenUser) or hasattr(other, '_meta'):
+			return self.pk is not None and self.pk == other.pk
+		return NotImplemented
+
+	def __hash__(self) -> int:
+		return hash(self.pk)
+
+	def __str__(self) -> str:
+		return str(self._claims.get('email') or self.pk)
+
+	def __repr__(self) -> str:
+		return f'<TokenUser: {self}>'
@@ -0,0 +1,302 @@
+"""
+In-process token revocation cache kept coherent across processes with Redis pub/sub
+"""
+
+from collections.abc import Awaitable, Callable
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+import redis
+from redis import asyncio as aioredis
+
+from common.cache import PerLoop, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStore:
+	"""
+	Bounded per-process cache of known-good and known-revoked JTI digests,
+	plus each user's token epoch.
+
+	Revocations are published on a Redis channel so every process marks the
+	digests as revoked as soon as the message arrives. Known-good entries are
+	only cached while the subscriber is running, so a lost Redis connection
+	can never hide a revocation for longer than the cache TTL.
+
+	Epochs are mirrored in Redis under `jwt:epoch:<user_id>` so a cache miss
+	costs one GET instead of a database query. The mirror expires after the
+	refresh-token lifetime, and is deleted when a new epoch cannot be written,
+	so a stale epoch never outlives the database's for long.
+
+	The subscriber is started by the first token check, from a worker thread
+	on async paths (`aensure_listening()`), so subscribing never blocks the
+	event loop. Redis calls give up after JWT_REDIS_SOCKET_TIMEOUT seconds.
+
+	When JWT_VERIFIED_TOKEN_CACHE_TTL is set, fully verified payloads are also
+	kept keyed by the token digest. Every revocation path evicts them.
+	"""
+
+	EPOCH_KEY = 'jwt:epoch:{user_id}'
+
+	RETRY_INTERVAL = 30  # seconds between subscribe attempts after a failure
+
+	def __init__(self):
+		self._cache: TTLCache | None = None
+		self._epochs: TTLCache | None = None
+		self._verified: TTLCache | None = None
+		self._redis: redis.Redis | None = None
+		self._async_redis = PerLoop(lambda: aioredis.from_url(self.redis_url, **self.client_options))
+		self._listener = None
+		self._retry_at = 0.0
+		self._lock = threading.Lock()
+
+	@property
+	def cache(self) -> TTLCache:
+		if self._cache is None:
+			self._cache = TTLCache(
+				maxsize=getattr(settings, 'JWT_REVOCATION_CACHE_SIZE', 50_000),
+				ttl=getattr(settings, 'JWT_REVOCATION_CACHE_TTL', 60),
+			)
+		return self._cache
+
+	@property
+	def epochs(self) -> TTLCache:
+		if self._epochs is None:
+			self._epochs = TTLCache(
+				maxsize=getattr(settings, 'JWT_REVOCATION_CACHE_SIZE', 50_000),
+				ttl=getattr(settings, 'JWT_REVOCATION_CACHE_TTL', 60),
+			)
+		return self._epochs
+
+	@property
+	def verified(self) -> TTLCache:
+		if self._verified is None:
+			self._verified = TTLCache(
+				maxsize=getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_SIZE', 10_000),
+				ttl=getattr(settings, 'JWT_VERIFIED_TOKEN_CACHE_TTL', 0),
+			)
+		return self._verified
+
+	@property
+	def channel(self) -> str:
+		return getattr(settings, 'JWT_REVOCATION_CHANNEL', 'jwt:revocations')
+
+	@property
+	def revoked_ttl(self) -> float:
+		return settings.JWT_REFRESH_TOKEN_LIFETIME.total_seconds()
+
+	@property
+	def epoch_ttl(self) -> int:
+		# every token issued under an older epoch has expired by then
+		return int(self.revoked_ttl)
+
+	@property
+	def is_listening(self) -> bool:
+		return self._listener is not None and self._listener.is_alive()
+
+	@property
+	def redis_url(self) -> str:
+		return getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
+
+	@property
+	def client_options(self) -> dict:
+		return {
+			'socket_connect_timeout': getattr(settings, 'JWT_REDIS_CONNECT_TIMEOUT', 1.0),
+			'socket_timeout': getattr(settings, 'JWT_REDIS_SOCKET_TIMEOUT', 2.0),
+		}
+
+	def get_redis(self) -> redis.Redis:
+		"""Get or create the Redis connection"""
+		if self._redis is None:
+			self._redis = redis.Redis.from_url(self.redis_url, **self.client_options)
+		return self._redis
+
+	def get_async_redis(self) -> aioredis.Redis:
+		"""Get or create the asyncio Redis connection of the running event loop"""
+		return self._async_redis.get()
+
+	def is_revoked(self, digest: str) -> bool | None:
+		"""Return the cached revocation state, or None on a cache miss"""
+		return self.cache.get(digest)
+
+	def remember(self, digest: str, revoked: bool) -> None:
+		"""Cache the state read from the database"""
+		if revoked:
+			self.cache.set(digest, True, ttl=self.revoked_ttl)
+		elif self.is_listening:
+			# never overwrite a revocation that raced in while we were reading
+			self.cache.add(digest, False)
+
+	def revoke(self, digests: list[str]) -> None:
+		"""Mark digests revoked locally and tell every other process"""
+		if not digests:
+			return
+		self._mark_revoked(digests)
+		self.publish({'type': 'revoke', 'jti': list(digests)})
+
+	@property
+	def verified_enabled(self) -> bool:
+		return self.verified.ttl > 0
+
+	def get_verified(self, token_digest: str) -> dict | None:
+		"""Return the cached payload of an already verified token"""
+		entry = self.verified.get(token_digest)
+		return dict(entry[0]) if entry is not None else None
+
+	def remember_verified(self, token_digest: str, payload: dict, jti_digest: str) -> None:
+		"""Cache a verified payload until the token expires or the TTL ceiling, whichever is first"""
+		if not self.is_listening:
+			return
+		ttl = min(self.verified.ttl, payload['exp'] - time.time())
+		self.verified.set(token_digest, (dict(payload), jti_digest), ttl=ttl)
+
+	def get_epoch(self, user_id, loader: Callable[[], int]) -> int:
+		"""
+		Return the user's current token epoch.
+
+		Looks in the local cache, then Redis, and only calls `loader` (a
+		database read) when neither has it.
+		"""
+		self.ensure_listening()
+		epoch = self.epochs.get(user_id)
+		if epoch is not None:
+			return epoch
+
+		key = self.EPOCH_KEY.format(user_id=user_id)
+		try:
+			value = self.get_redis().get(key)
+		except Exception as e:
+			logger.error(f'❌ Error reading token epoch for user {user_id}: {e}')
+			value = None
+
+		if value is not None:
+			epoch = int(value)
+		else:
+			epoch = loader()
+			try:
+				self.get_redis().set(key, epoch, nx=True, ex=self.epoch_ttl)
+			except Exception as e:
+				logger.error(f'❌ Error mirroring token epoch for user {user_id}: {e}')
+
+		if self.is_listening:
+			self.epochs.add(user_id, epoch)
+		return epoch
+
+	async def aget_epoch(self, user_id, loader: Callable[[], Awaitable[int]]) -> int:
+		"""Async counterpart of `get_epoch()`"""
+		await self.aensure_listening()
+		epoch = self.epochs.get(user_id)
+		if epoch is not None:
+			return epoch
+
+		key = self.EPOCH_KEY.format(user_id=user_id)
+		redis_client = self.get_async_redis()
+		try:
+			value = await redis_client.get(key)
+		except Exception as e:
+			logger.error(f'❌ Error reading token epoch for user {user_id}: {e}')
+			value = None
+
+		if value is not None:
+			epoch = int(value)
+		else:
+			epoch = await loader()
+			try:
+				await redis_client.set(key, epoch, nx=True, ex=self.epoch_ttl)
+			except Exception as e:
+				logger.error(f'❌ Error mirroring token epoch for user {user_id}: {e}')
+
+		if self.is_listening:
+			self.epochs.add(user_id, epoch)
+		return epoch
+
+	def set_epoch(self, user_id, epoch: int) -> None:
+		"""Record a new epoch locally and in Redis, and tell every other process"""
+		self._mark_epoch(user_id, epoch)
+		key = self.EPOCH_KEY.format(user_id=user_id)
+		try:
+			self.get_redis().set(key, epoch, ex=self.epoch_ttl)
+		except Exception as e:
+			logger.error(f'❌ Error mirroring token epoch for user {user_id}: {e}')
+			# the old epoch must not keep answering for the database
+			try:
+				self.get_redis().delete(key)
+			except Exception as e:
+				logger.error(f'❌ Error dropping token epoch for user {user_id}, stale until it expires: {e}')
+		self.publish({'type': 'epoch', 'user_id': user_id, 'epoch': epoch})
+
+	def publish(self, message: dict) -> None:
+		try:
+			self.get_redis().publish(self.channel, json.dumps(message))
+		except Exception as e:
+			logger.error(f'❌ Error publishing token revocation: {e}')
+
+	def _should_subscribe(self) -> bool:
+		return not self.is_listening and time.monotonic() >= self._retry_at
+
+	async def aensure_listening(self) -> None:
+		"""`ensure_listening()` for the event loop: connecting and subscribing happen in a worker thread"""
+		if self._should_subscribe():
+			await sync_to_async(self.ensure_listening, thread_sensitive=False)()
+
+	def ensure_listening(self) -> None:
+		"""Start the pub/sub subscriber thread if it is not running"""
+		if not self._should_subscribe():
+			return
+		with self._lock:
+			if not self._should_subscribe():
+				return
+			try:
+				pubsub = self.get_redis().pubsub(ignore_subscribe_messages=True)
+				pubsub.subscribe(**{self.channel: self._handle_message})
+				self._listener = pubsub.run_in_thread(
+					sleep_time=1.0, daemon=True, exception_handler=self._handle_listener_error
+				)
+			except Exception as e:
+				self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+				logger.error(f'❌ Error subscribing to token revocations: {e}')
+
+	def _handle_message(self, message: dict) -> None:
+		try:
+			data = json.loads(message['data'])
+		except (TypeError, ValueError):
+			logger.warning('Ignoring malformed token revocation message')
+			return
+		if data.get('type') == 'revoke':
+			self._mark_revoked(data.get('jti', []))
+		elif data.get('type') == 'epoch':
+			self._mark_epoch(data['user_id'], int(data['epoch']))
+
+	def _handle_listener_error(self, exc, pubsub, thread) -> None:
+		# Invalidations may have been missed while disconnected, so forget
+		# everything we believed to be valid and resubscribe later.
+		logger.error(f'❌ Token revocation subscriber stopped: {exc}')
+		thread.stop()
+		self._listener = None
+		self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+		self.cache.discard_if(lambda _key, revoked: not revoked)
+		self.epochs.clear()
+		self.verified.clear()
+
+	def _mark_revoked(self, digests: list[str]) -> None:
+		for digest in digests:
+			self.cache.set(digest, True, ttl=self.revoked_ttl)
+		if len(self.verified):
+			revoked = set(digests)
+			self.verified.discard_if(lambda _key, entry: entry[1] in revoked)
+
+	def _mark_epoch(self, user_id, epoch: int) -> None:
+		# epochs only move forward; ignore a late message carrying an older one
+		if epoch >= (self.epochs.get(user_id) or 0):
+			self.epochs.set(user_id, epoch)
+		if len(self.verified):
+			self.verified.discard_if(lambda _key, entry: entry[0].get('user_id') == user_id)
+
+
+# Global instance
+revocation_store = RevocationStore()
@@ -0,0 +1,208 @@
+"""
+Refresh-token rotation state kept in Redis, persisted to the database write-behind
+"""
+
+import json
+import logging
+
+from common.cache import PerLoop
+
+from .revocation import revocation_store
+
+logger = logging.getLogger(__name__)
+
+# KEYS: old token, new token, family revoked flag, family members, write-behind queue
+# ARGV: old digest, new digest, old ttl, new ttl, family ttl, rotate record, reuse record, allow unknown
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+	return {'revoked'}
+end
+local state = redis.call('GET', KEYS[1])
+if state == 'used' then
+	redis.call('SET', KEYS[3], '1', 'EX', ARGV[5])
+	redis.call('RPUSH', KEYS[5], ARGV[7])
+	return {'reused', redis.call('SMEMBERS', KEYS[4])}
+end
+if not state and ARGV[8] ~= '1' then
+	return {'unknown'}
+end
+redis.call('SET', KEYS[1], 'used', 'EX', ARGV[3])
+redis.call('SET', KEYS[2], 'active', 'EX', ARGV[4])
+redis.call('SADD', KEYS[4], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[4], ARGV[5])
+redis.call('RPUSH', KEYS[5], ARGV[6])
+return {'ok'}
+"""
+
+# KEYS: write-behind queue, processing list
+# ARGV: batch size
+CLAIM_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, ARGV[1] - 1)
+if #items > 0 then
+	redis.call('LTRIM', KEYS[1], #items, -1)
+	redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+
+class RotationResult:
+	OK = 'ok'
+	UNKNOWN = 'unknown'  # Redis has no record of the old token; verify against the database
+	REUSED = 'reused'  # an already rotated token came back: the family is now revoked
+	REVOKED = 'revoked'  # the family was revoked earlier
+
+
+class RefreshTokenStore:
+	"""
+	Tracks refresh-token families in Redis, keyed by JTI digest.
+
+	Rotating a token is one EVALSHA: it checks the family, marks the old token
+	used, registers the new one and queues the database write. Presenting a
+	token that was already rotated revokes its whole family. The queue is
+	drained into `TrackedToken` by `tasks.tokens.token_tasks`: each batch is
+	moved atomically to PROCESSING_KEY and removed from there once handled,
+	so an interrupted flush is retried first on the next run. Records that
+	cannot be persisted are moved to DEAD_LETTER_KEY for inspection.
+	"""
+
+	TOKEN_KEY = 'jwt:refresh:{digest}'
+	FAMILY_REVOKED_KEY = 'jwt:family:{family}:revoked'
+	FAMILY_MEMBERS_KEY = 'jwt:family:{family}:members'
+	QUEUE_KEY = 'jwt:refresh:pending'
+	PROCESSING_KEY = 'jwt:refresh:processing'
+	DEAD_LETTER_KEY = 'jwt:refresh:dead'
+
+	def __init__(self):
+		self._script = None
+		self._claim_script = None
+		self._async_script = PerLoop(lambda: revocation_store.get_async_redis().register_script(ROTATE_SCRIPT))
+
+	@property
+	def family_ttl(self) -> int:
+		return int(revocation_store.revoked_ttl)
+
+	def get_script(self):
+		if self._script is None:
+			self._script = revocation_store.get_redis().register_script(ROTATE_SCRIPT)
+		return self._script
+
+	def get_claim_script(self):
+		if self._claim_script is None:
+			self._claim_script = revocation_store.get_redis().register_script(CLAIM_SCRIPT)
+		return self._claim_script
+
+	def get_async_script(self):
+		# bound to the asyncio client of the running loop
+		return self._async_script.get()
+
+	def register(self, digest: str, family: str, ttl: int) -> None:
+		"""Record a freshly issued refresh token as the live member of its family"""
+		try:
+			pipe = revocation_store.get_redis().pipeline()
+			pipe.set(self.TOKEN_KEY.format(digest=digest), 'active', ex=max(ttl, 1))
+			pipe.sadd(self.FAMILY_MEMBERS_KEY.format(family=family), digest)
+			pipe.expire(self.FAMILY_MEMBERS_KEY.format(family=family), self.family_ttl)
+			pipe.execute()
+		except Exception as e:
+			# rotation falls back to the database when Redis has no record
+			logger.error(f'❌ Error registering refresh token: {e}')
+
+	def _rotate_call(
+		self,
+		old_digest: str,
+		new_digest: str,
+		family: str,
+		old_ttl: int,
+		new_ttl: int,
+		record: dict,
+		allow_unknown: bool,
+	) -> dict:
+		reuse_record = {'op': 'revoke_family', 'family': family, 'user_id': record.get('user_id')}
+		return {
+			'keys': [
+				self.TOKEN_KEY.format(digest=old_digest),
+				self.TOKEN_KEY.format(digest=new_digest),
+				self.FAMILY_REVOKED_KEY.format(family=family),
+				self.FAMILY_MEMBERS_KEY.format(family=family),
+				self.QUEUE_KEY,
+			],
+			'args': [
+				old_digest,
+				new_digest,
+				max(old_ttl, 1),
+				max(new_ttl, 1),
+				self.family_ttl,
+				json.dumps(record),
+				json.dumps(reuse_record),
+				'1' if allow_unknown else '0',
+			],
+		}
+
+	@staticmethod
+	def _parse_reply(reply: list) -> tuple[str, list[str]]:
+		result = reply[0].decode() if isinstance(reply[0], bytes) else reply[0]
+		members = [m.decode() if isinstance(m, bytes) else m for m in reply[1]] if len(reply) > 1 else []
+		return result, members
+
+	def rotate(
+		self,
+		old_digest: str,
+		new_digest: str,
+		family: str,
+		old_ttl: int,
+		new_ttl: int,
+		record: dict,
+		allow_unknown: bool = False,
+	) -> tuple[str, list[str]]:
+		"""Return `(result, family member digests)`; members are only filled on reuse"""
+		call = self._rotate_call(old_digest, new_digest, family, old_ttl, new_ttl, record, allow_unknown)
+		return self._parse_reply(self.get_script()(**call))
+
+	async def arotate(
+		self,
+		old_digest: str,
+		new_digest: str,
+		family: str,
+		old_ttl: int,
+		new_ttl: int,
+		record: dict,
+		allow_unknown: bool = False,
+	) -> tuple[str, list[str]]:
+		"""Async counterpart of `rotate()`"""
+		call = self._rotate_call(old_digest, new_digest, family, old_ttl, new_ttl, record, allow_unknown)
+		return self._parse_reply(await self.get_async_script()(**call))
+
+	def revoke_family(self, family: str, user_id=None) -> None:
+		"""Stop the family from rotating and queue blacklisting its tokens in the database"""
+		record = {'op': 'revoke_family', 'family': family, 'user_id': user_id}
+		try:
+			pipe = revocation_store.get_redis().pipeline()
+			pipe.set(self.FAMILY_REVOKED_KEY.format(family=family), '1', ex=self.family_ttl)
+			pipe.rpush(self.QUEUE_KEY, json.dumps(record))
+			pipe.execute()
+		except Exception as e:
+			logger.error(f'❌ Error revoking refresh token family {family}: {e}')
+
+	def claim_pending(self, limit: int) -> list[bytes]:
+		"""
+		Return up to `limit` queued writes, still JSON-encoded: those left by an
+		interrupted flush, else the head of the queue, moved to the processing list
+		"""
+		items = revocation_store.get_redis().lrange(self.PROCESSING_KEY, 0, limit - 1)
+		if items:
+			return items
+		return self.get_claim_script()(keys=[self.QUEUE_KEY, self.PROCESSING_KEY], args=[limit])
+
+	def ack_pending(self, items: list[bytes], dead: list[bytes] = ()) -> None:
+		"""Remove handled `items` from the processing list, moving `dead` ones to the dead-letter list"""
+		pipe = revocation_store.get_redis().pipeline()
+		if dead:
+			pipe.rpush(self.DEAD_LETTER_KEY, *dead)
+		for item in items:
+			pipe.lrem(self.PROCESSING_KEY, 1, item)
+		pipe.execute()
+
+
+# Global instance
+refresh_token_store = RefreshTokenStore()
@@ -0,0 +1,29 @@
+import pytest
+
+from common.cache import PerLoop
+from middlewares.jwt.revocation import revocation_store
+from middlewares.jwt.rotation import ROTATE_SCRIPT, refresh_token_store
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+	"""Point the revocation and rotation stores at an in-memory Redis, with empty local caches"""
+	fakeredis = pytest.importorskip('fakeredis')
+	pytest.importorskip('lupa')  # the rotation script is Lua
+	server = fakeredis.FakeServer()
+	client = fakeredis.FakeRedis(server=server)
+	monkeypatch.setattr(revocation_store, '_redis', client)
+	monkeypatch.setattr(
+		revocation_store, '_async_redis', PerLoop(lambda: fakeredis.FakeAsyncRedis(server=server))
+	)
+	for name in ('_cache', '_epochs', '_verified', '_listener'):
+		monkeypatch.setattr(revocation_store, name, None)
+	monkeypatch.setattr(revocation_store, '_retry_at', 0.0)
+	monkeypatch.setattr(refresh_token_store, '_script', None)
+	monkeypatch.setattr(refresh_token_store, '_claim_script', None)
+	async_script = PerLoop(lambda: revocation_store.get_async_redis().register_script(ROTATE_SCRIPT))
+	monkeypatch.setattr(refresh_token_store, '_async_script', async_script)
+	yield client
+	if revocation_store._listener is not None:
+		revocation_store._listener.stop()
+		revocation_store._listener.join(timeout=5)
@@ -0,0 +1,77 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+import pytest
+
+from accounts.models import User, UserType
+from common.cache import PerLoop
+from middlewares.jwt.auth import AsyncHttpJwtAuth
+from middlewares.jwt.principal import TokenUser
+from middlewares.jwt.revocation import revocation_store
+from middlewares.jwt.token import aget_user_from_token, get_obtain_token_pair
+
+
+@pytest.fixture
+def user(db):
+	return User.objects.create_user(email='jwt@example.com', user_type=UserType.VENDOR, is_verified=True)
+
+
+def test_aget_user_from_token_loads_the_user_or_a_claims_only_principal(user, django_assert_num_queries):
+	pair = get_obtain_token_pair(user)
+
+	loaded = async_to_sync(aget_user_from_token)(pair['access_token'])
+	assert isinstance(loaded, User) and loaded.pk == user.pk
+
+	# without Redis: epoch and blacklist reads only, no user query
+	with django_assert_num_queries(2):
+		principal = async_to_sync(aget_user_from_token)(pair['access_token'], lazy=True)
+	assert isinstance(principal, TokenUser)
+	assert (principal.pk, principal.email) == (user.pk, user.email)
+
+	with pytest.raises(ValueError, match='Incorrect token type'):
+		async_to_sync(aget_user_from_token)(pair['refresh_token'])
+	with pytest.raises(ValueError, match='Authentication failed'):
+		async_to_sync(aget_user_from_token)('not-a-token')
+
+
+def test_async_http_jwt_auth_sets_request_user(user):
+	token = get_obtain_token_pair(user)['access_token']
+	request = RequestFactory().get('/', headers={'Authorization': f'Bearer {token}'})
+
+	assert async_to_sync(AsyncHttpJwtAuth(lazy_user=True).authenticate)(request, token) is True
+	assert isinstance(request.user, TokenUser) and request.user.pk == user.pk
+
+	request = RequestFactory().get('/', headers={'Authorization': f'Token {token}'})
+	with pytest.raises(Exception, match='Invalid Authorization header'):
+		async_to_sync(AsyncHttpJwtAuth().authenticate)(request, token)
+
+
+def test_the_subscriber_is_started_off_the_event_loop(monkeypatch):
+	calls = []
+
+	def ensure_listening():
+		# subscribing blocks, so it must run where no event loop is running
+		with pytest.raises(RuntimeError):
+			asyncio.get_running_loop()
+		calls.append(True)
+
+	monkeypatch.setattr(revocation_store, '_retry_at', 0.0)
+	monkeypatch.setattr(revocation_store, 'ensure_listening', ensure_listening)
+	async_to_sync(revocation_store.aensure_listening)()
+
+	assert calls == [True]
+
+
+def test_async_clients_are_kept_per_event_loop():
+	clients = PerLoop(object)
+
+	async def get_twice():
+		return clients.get(), clients.get()
+
+	first, again = async_to_sync(get_twice)()
+	other, _ = async_to_sync(get_twice)()
+	assert first is again
+	assert other is not first
+	with pytest.raises(RuntimeError):
+		clients.get()  # no running loop
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+import jwt
+from jwt import (
+	ExpiredSignatureError,
+	ImmatureSignatureError,
+	InvalidAlgorithmError,
+	InvalidSignatureError,
+	InvalidTokenError,
+	MissingRequiredClaimError,
+)
+import pytest
+
+from middlewares.jwt.codec import TokenCodec
+from middlewares.jwt.keys import KeyRing
+from middlewares.jwt.token import TokenTypes
+
+
+@pytest.fixture
+def codec():
+	return TokenCodec(claim_map={'user_id': 'pk'}, access_lifetime=60, refresh_lifetime=600, keys=KeyRing())
+
+
+def sign(payload: dict, algorithm: str | None = None, **headers) -> str:
+	now = int(time.time())
+	payload = {'jti': 'abc', 'iat': now, 'exp': now + 60, 'token_type': 'access', **payload}
+	return jwt.encode(
+		payload, settings.SECRET_KEY, algorithm=algorithm or settings.JWT_ALGORITHM, headers=headers
+	)
+
+
+def test_decode_round_trip(codec):
+	token, payload = codec.encode({'user_id': 7}, TokenTypes.ACCESS)
+
+	assert codec.decode(token) == payload
+	assert codec.decode(sign({'user_id': 7}))['user_id'] == 7
+
+
+def test_decode_rejects_a_tampered_token(codec):
+	token, _ = codec.encode({'user_id': 7}, TokenTypes.ACCESS)
+	header, _, signature = token.split('.')
+	forged = jwt.utils.base64url_encode(codec.dumps({'user_id': 1, 'exp': int(time.time()) + 60})).decode()
+
+	with pytest.raises(InvalidSignatureError):
+		codec.decode(f'{header}.{forged}.{signature}')
+	with pytest.raises(InvalidTokenError):
+		codec.decode(token[:-4])
+
+
+def test_decode_checks_exp_iat_and_nbf_with_leeway(codec):
+	now = int(time.time())
+
+	with pytest.raises(ExpiredSignatureError):
+		codec.decode(sign({'exp': now - 5}))
+	with pytest.raises(ImmatureSignatureError):
+		codec.decode(sign({'iat': now + 30}))
+	with pytest.raises(ImmatureSignatureError):
+		codec.decode(sign({'nbf': now + 30}))
+	with pytest.raises(MissingRequiredClaimError):
+		codec.decode(jwt.encode({'exp': now + 60}, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM))
+
+	codec.leeway = 10
+	assert codec.decode(sign({'exp': now - 5}))['exp'] == now - 5
+
+
+def test_decode_rejects_unknown_kid_wrong_alg_and_crit(codec):
+	with pytest.raises(InvalidTokenError, match='Unknown signing key'):
+		codec.decode(sign({}, kid='retired'))
+	with pytest.raises(InvalidAlgorithmError):
+		codec.decode(sign({}, algorithm='HS512'))
+	unsigned = jwt.encode({'exp': int(time.time()) + 60, 'iat': int(time.time())}, None, algorithm='none')
+	with pytest.raises(InvalidAlgorithmError):
+		codec.decode(unsigned)
+	with pytest.raises(InvalidTokenError, match='Unsupported critical extension'):
+		codec.decode(sign({}, crit=['exp-policy']))
@@ -0,0 +1,124 @@
+import hashlib
+import hmac
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+import jwt
+from jwt import InvalidAlgorithmError, InvalidTokenError
+from jwt.utils import base64url_encode
+import pytest
+
+from middlewares.jwt.codec import get_token_codec
+from middlewares.jwt.keys import key_ring
+from middlewares.jwt.token import TokenTypes, encode_token
+
+
+def write_key_pair(directory, kid: str, private_key) -> dict:
+	private_path = directory / f'{kid}.pem'
+	public_path = directory / f'{kid}.pub.pem'
+	private_path.write_bytes(
+		private_key.private_bytes(
+			serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+		)
+	)
+	public_path.write_bytes(
+		private_key.public_key().public_bytes(
+			serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+		)
+	)
+	return {'kid': kid, 'private_key_path': str(private_path), 'public_key_path': str(public_path)}
+
+
+@pytest.fixture
+def keys(settings, tmp_path):
+	"""Two key pairs, 'rsa-1' (RS256) and 'ec-2' (ES256), with 'rsa-1' active"""
+	rsa_key = {**write_key_pair(tmp_path, 'rsa-1', rsa.generate_private_key(65537, 2048)), 'algorithm': 'RS256'}
+	ec_key = {**write_key_pair(tmp_path, 'ec-2', ec.generate_private_key(ec.SECP256R1())), 'algorithm': 'ES256'}
+	settings.JWT_SIGNING_KEYS = [rsa_key, ec_key]
+	settings.JWT_ACTIVE_KID = 'rsa-1'
+
+	def apply():
+		key_ring.reload()
+		get_token_codec.cache_clear()
+
+	apply()
+	yield {'rsa-1': rsa_key, 'ec-2': ec_key, 'apply': apply}
+	settings.JWT_SIGNING_KEYS = []
+	settings.JWT_ACTIVE_KID = None
+	apply()
+
+
+def sign(payload: dict) -> str:
+	return encode_token(payload, TokenTypes.ACCESS)[0]
+
+
+def test_tokens_carry_the_active_kid_and_verify_after_rotation(settings, keys):
+	old = sign({'user_id': 1})
+	assert jwt.get_unverified_header(old) == {'alg': 'RS256', 'kid': 'rsa-1', 'typ': 'JWT'}
+
+	# rotate: sign with ec-2, keep rsa-1's public key for the tokens still out there
+	settings.JWT_SIGNING_KEYS = [{**keys['rsa-1'], 'private_key_path': None}, keys['ec-2']]
+	settings.JWT_ACTIVE_KID = 'ec-2'
+	keys['apply']()
+	new = sign({'user_id': 1})
+
+	assert jwt.get_unverified_header(new)['kid'] == 'ec-2'
+	assert get_token_codec().decode(old)['user_id'] == 1
+	assert get_token_codec().decode(new)['user_id'] == 1
+
+	# retire rsa-1 once its tokens have expired
+	settings.JWT_SIGNING_KEYS = [keys['ec-2']]
+	keys['apply']()
+	with pytest.raises(InvalidTokenError, match='Unknown signing key'):
+		get_token_codec().decode(old)
+
+
+def test_tokens_without_a_kid_use_the_secret_key(settings, keys):
+	legacy = jwt.encode(
+		{'user_id': 1, 'iat': 0, 'exp': 2**31}, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM
+	)
+
+	assert get_token_codec().decode(legacy)['user_id'] == 1
+
+	settings.JWT_ACCEPT_LEGACY_KEY = False
+	keys['apply']()
+	with pytest.raises(InvalidTokenError, match='Unknown signing key'):
+		get_token_codec().decode(legacy)
+
+
+def test_a_kid_only_accepts_its_own_algorithm(keys):
+	# an HMAC token keyed with rsa-1's public key (PyJWT refuses to sign one)
+	public_pem = Path(keys['rsa-1']['public_key_path']).read_bytes()
+	header = base64url_encode(b'{"alg":"HS256","kid":"rsa-1","typ":"JWT"}')
+	signing_input = header + b'.' + base64url_encode(b'{"user_id":1,"iat":0,"exp":2147483647}')
+	signature = hmac.new(public_pem, signing_input, hashlib.sha256).digest()
+	token = (signing_input + b'.' + base64url_encode(signature)).decode()
+
+	with pytest.raises(InvalidAlgorithmError):
+		get_token_codec().decode(token)
+
+
+def test_an_active_kid_needs_a_private_key(settings, keys):
+	settings.JWT_SIGNING_KEYS = [{**keys['rsa-1'], 'private_key_path': None}]
+	key_ring.reload()
+
+	with pytest.raises(ValueError, match='has no private key'):
+		key_ring.active  # noqa: B018
+
+
+def test_jwks_publishes_every_public_key(client, settings, keys):
+	response = client.get('/api/.well-known/jwks.json')
+
+	assert response.status_code == 200
+	assert response['Cache-Control'] == f'public, max-age={settings.JWT_JWKS_MAX_AGE}'
+	published = {key['kid']: key for key in response.json()['keys']}
+	assert {kid: (key['kty'], key['alg'], key['use']) for kid, key in published.items()} == {
+		'rsa-1': ('RSA', 'RS256', 'sig'),
+		'ec-2': ('EC', 'ES256', 'sig'),
+	}
+	assert all('d' not in key for key in published.values())
+	# a published key verifies our tokens
+	token = sign({'user_id': 1})
+	public_key = jwt.PyJWK(published['rsa-1'])
+	assert jwt.decode(token, public_key, algorithms=['RS256'])['user_id'] == 1
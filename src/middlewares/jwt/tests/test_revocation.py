@@ -0,0 +1,227 @@
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from jwt import InvalidTokenError
+import pytest
+import redis
+
+from accounts.models import User
+from middlewares.jwt.codec import get_token_codec
+from middlewares.jwt.revocation import revocation_store
+from middlewares.jwt.token import (
+	TokenTypes,
+	adecode_token,
+	blacklist_all_tokens,
+	blacklist_token,
+	decode_token,
+	get_obtain_token_pair,
+	get_user_from_token,
+)
+from tokens.models import TrackedToken
+
+
+@pytest.fixture
+def user(db):
+	return User.objects.create_user(email='revoke@example.com', is_verified=True)
+
+
+def digest(token: str) -> str:
+	return TrackedToken.hasher(get_token_codec().decode(token)['jti'])
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+	deadline = time.monotonic() + timeout
+	while not condition():
+		if time.monotonic() > deadline:
+			return False
+		time.sleep(0.01)
+	return True
+
+
+def test_known_good_tokens_are_cached_and_revocations_apply_at_once(
+	user, fake_redis, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+	refresh = get_obtain_token_pair(user)['refresh_token']
+
+	# the epoch and the blacklist are read once, then served from the cache
+	with django_assert_num_queries(2):
+		decode_token(refresh, TokenTypes.REFRESH)
+	assert revocation_store.is_listening
+	with django_assert_num_queries(0):
+		decode_token(refresh, TokenTypes.REFRESH)
+
+	with django_capture_on_commit_callbacks(execute=True):
+		blacklist_token(user, refresh)
+
+	assert revocation_store.is_revoked(digest(refresh)) is True
+	with django_assert_num_queries(0), pytest.raises(InvalidTokenError, match='blacklisted'):
+		decode_token(refresh, TokenTypes.REFRESH)
+
+
+def test_revocations_published_by_another_process_evict_the_cached_state(user, fake_redis):
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+	assert revocation_store.is_revoked(digest(access)) is False
+
+	fake_redis.publish(revocation_store.channel, json.dumps({'type': 'revoke', 'jti': [digest(access)]}))
+
+	assert wait_for(lambda: revocation_store.is_revoked(digest(access)))
+	with pytest.raises(InvalidTokenError, match='blacklisted'):
+		decode_token(access, TokenTypes.ACCESS)
+
+
+def test_without_the_subscriber_every_check_reads_the_database(user, fake_redis, django_assert_num_queries):
+	fake_redis.connection_pool.connection_kwargs['server'].connected = False
+	access = get_obtain_token_pair(user)['access_token']
+
+	for _ in range(2):
+		with django_assert_num_queries(2):
+			decode_token(access, TokenTypes.ACCESS)
+	assert not revocation_store.is_listening
+	assert revocation_store.is_revoked(digest(access)) is None
+
+
+def test_a_lost_subscription_forgets_known_good_state_only(user, fake_redis):
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+	revocation_store.revoke(['revoked-digest'])
+	listener = revocation_store._listener
+
+	revocation_store._handle_listener_error(ConnectionError('gone'), None, listener)
+
+	assert revocation_store.is_revoked(digest(access)) is None
+	assert revocation_store.is_revoked('revoked-digest') is True
+	assert not revocation_store.is_listening
+
+
+def test_an_epoch_bump_rejects_every_older_token(user, fake_redis, django_capture_on_commit_callbacks):
+	old = get_obtain_token_pair(user)
+	decode_token(old['access_token'], TokenTypes.ACCESS)
+
+	with django_capture_on_commit_callbacks(execute=True):
+		epoch = blacklist_all_tokens(user)
+
+	assert epoch == 1
+	assert int(fake_redis.get(revocation_store.EPOCH_KEY.format(user_id=user.pk))) == 1
+	for token, token_type in (
+		(old['access_token'], TokenTypes.ACCESS),
+		(old['refresh_token'], TokenTypes.REFRESH),
+	):
+		with pytest.raises(InvalidTokenError, match='revoked'):
+			decode_token(token, token_type)
+		with pytest.raises(InvalidTokenError, match='revoked'):
+			async_to_sync(adecode_token)(token, token_type)
+	new = get_obtain_token_pair(user)
+	assert decode_token(new['access_token'], TokenTypes.ACCESS)['token_epoch'] == 1
+
+
+def test_epoch_bumps_from_another_process_apply_and_never_move_back(user, fake_redis):
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+
+	fake_redis.publish(revocation_store.channel, json.dumps({'type': 'epoch', 'user_id': user.pk, 'epoch': 2}))
+	assert wait_for(lambda: revocation_store.epochs.get(user.pk) == 2)
+	with pytest.raises(InvalidTokenError, match='revoked'):
+		decode_token(access, TokenTypes.ACCESS)
+
+	# a late message with an older epoch is ignored
+	revocation_store._handle_message({'data': json.dumps({'type': 'epoch', 'user_id': user.pk, 'epoch': 1})})
+	assert revocation_store.epochs.get(user.pk) == 2
+
+
+def test_an_epoch_bump_applies_without_redis(user, fake_redis, django_capture_on_commit_callbacks):
+	fake_redis.connection_pool.connection_kwargs['server'].connected = False
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+
+	with django_capture_on_commit_callbacks(execute=True):
+		blacklist_all_tokens(user)
+
+	with pytest.raises(InvalidTokenError, match='revoked'):
+		decode_token(access, TokenTypes.ACCESS)
+
+
+def test_a_failed_epoch_mirror_is_dropped_so_the_database_answers(
+	user, fake_redis, monkeypatch, django_capture_on_commit_callbacks
+):
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+	key = revocation_store.EPOCH_KEY.format(user_id=user.pk)
+	assert int(fake_redis.get(key)) == 0
+	assert 0 < fake_redis.ttl(key) <= revocation_store.epoch_ttl
+
+	def failing_set(*args, **kwargs):
+		raise redis.TimeoutError('Timeout writing to socket')
+
+	with monkeypatch.context() as patch:
+		patch.setattr(fake_redis, 'set', failing_set)
+		with django_capture_on_commit_callbacks(execute=True):
+			blacklist_all_tokens(user)
+
+	assert fake_redis.get(key) is None
+	# another process, whose local epoch cache has expired
+	revocation_store.epochs.clear()
+	with pytest.raises(InvalidTokenError, match='revoked'):
+		decode_token(access, TokenTypes.ACCESS)
+	assert int(fake_redis.get(key)) == 1
+
+
+def test_saving_a_token_loaded_user_keeps_the_database_epoch(user, fake_redis):
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+	# a bump whose message has not arrived yet; the cached epoch still accepts the token
+	User.objects.filter(pk=user.pk).update(token_epoch=1)
+
+	loaded = get_user_from_token(access)
+	loaded.full_name = 'Renamed'
+	loaded.save()
+
+	user.refresh_from_db()
+	assert user.token_epoch == 1
+
+
+@pytest.fixture
+def verified_cache(settings, fake_redis):
+	settings.JWT_VERIFIED_TOKEN_CACHE_TTL = 300
+	return revocation_store.verified
+
+
+def test_verified_payloads_are_evicted_by_revocations_and_epoch_bumps(user, verified_cache):
+	access = get_obtain_token_pair(user)['access_token']
+	token_digest = TrackedToken.hasher(access)
+	decode_token(access, TokenTypes.ACCESS)
+	assert revocation_store.get_verified(token_digest)['user_id'] == user.pk
+
+	revocation_store.revoke([digest(access)])
+	assert revocation_store.get_verified(token_digest) is None
+	with pytest.raises(InvalidTokenError, match='blacklisted'):
+		decode_token(access, TokenTypes.ACCESS)
+
+	access = get_obtain_token_pair(user)['access_token']
+	decode_token(access, TokenTypes.ACCESS)
+	revocation_store.set_epoch(user.pk, 1)
+	assert revocation_store.get_verified(TrackedToken.hasher(access)) is None
+	with pytest.raises(InvalidTokenError, match='revoked'):
+		decode_token(access, TokenTypes.ACCESS)
+
+
+def test_verified_payloads_never_outlive_the_token(verified_cache):
+	revocation_store.ensure_listening()
+	now = time.time()
+	revocation_store.remember_verified('short', {'exp': now + 5}, 'jti-short')
+	revocation_store.remember_verified('long', {'exp': now + 3600}, 'jti-long')
+
+	expires_at = {key: entry[0] - time.monotonic() for key, entry in verified_cache._data.items()}
+	assert 0 < expires_at['short'] <= 5
+	assert 295 < expires_at['long'] <= 300
+
+
+def test_verified_payloads_are_only_cached_while_subscribed(user, verified_cache):
+	fake_redis = revocation_store.get_redis()
+	fake_redis.connection_pool.connection_kwargs['server'].connected = False
+	access = get_obtain_token_pair(user)['access_token']
+
+	decode_token(access, TokenTypes.ACCESS)
+
+	assert revocation_store.get_verified(TrackedToken.hasher(access)) is None
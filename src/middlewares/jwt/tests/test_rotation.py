@@ -0,0 +1,112 @@
+import json
+
+from jwt import InvalidTokenError
+import pytest
+
+from accounts.models import User
+from middlewares.jwt.codec import get_token_codec
+from middlewares.jwt.revocation import revocation_store
+from middlewares.jwt.rotation import refresh_token_store
+from middlewares.jwt.token import get_obtain_token_pair, rotate_refresh_token
+from services.tokens.token_service import persist_refresh_token_writes
+from tasks.tokens.token_tasks import flush_refresh_token_writes
+from tokens.models import BlacklistedToken, TrackedToken
+
+
+@pytest.fixture
+def user(db):
+	return User.objects.create_user(email='rotate@example.com', is_verified=True)
+
+
+@pytest.fixture
+def issue(user, fake_redis, django_capture_on_commit_callbacks):
+	def issue() -> dict:
+		# the Redis registration runs on commit
+		with django_capture_on_commit_callbacks(execute=True):
+			return get_obtain_token_pair(user)
+
+	return issue
+
+
+def digest(token: str) -> str:
+	return TrackedToken.hasher(get_token_codec().decode(token)['jti'])
+
+
+def pending() -> list[dict]:
+	items = revocation_store.get_redis().lrange(refresh_token_store.QUEUE_KEY, 0, -1)
+	return [json.loads(item) for item in items]
+
+
+def test_rotation_retires_the_old_token_and_queues_the_write(issue, django_assert_num_queries):
+	old = issue()['refresh_token']
+
+	# the rotation itself is the Redis script; the epoch comes from Redis or one query
+	with django_assert_num_queries(1):
+		new = rotate_refresh_token(old)['refresh_token']
+
+	assert [record['op'] for record in pending()] == ['rotate']
+	assert rotate_refresh_token(new)['refresh_token'] != new
+
+
+def test_reusing_a_rotated_token_revokes_the_family(issue):
+	old = issue()['refresh_token']
+	new = rotate_refresh_token(old)['refresh_token']
+
+	with pytest.raises(InvalidTokenError, match='reuse detected'):
+		rotate_refresh_token(old)
+	assert revocation_store.is_revoked(digest(new)) is True
+	with pytest.raises(InvalidTokenError):
+		rotate_refresh_token(new)
+	assert [record['op'] for record in pending()] == ['rotate', 'revoke_family']
+
+
+def test_a_token_redis_does_not_know_is_checked_against_the_database(user, fake_redis):
+	# issued without the on-commit Redis registration
+	pair = get_obtain_token_pair(user)
+
+	assert rotate_refresh_token(pair['refresh_token'])['refresh_token']
+
+	other = get_obtain_token_pair(user)
+	TrackedToken.objects.filter(user=user).soft_delete()
+	with pytest.raises(InvalidTokenError, match='not found'):
+		rotate_refresh_token(other['refresh_token'])
+
+
+def test_flushing_persists_rotations_and_replays_safely(user, issue):
+	old = issue()['refresh_token']
+	new = rotate_refresh_token(old)['refresh_token']
+	with pytest.raises(InvalidTokenError):
+		rotate_refresh_token(old)
+	records = pending()
+
+	assert flush_refresh_token_writes(timestamp=0) == 2
+	assert pending() == []
+	persist_refresh_token_writes(records)
+
+	assert TrackedToken.all_objects.filter(jti=digest(new)).count() == 1
+	assert not TrackedToken.objects.filter(user=user).exists()
+	assert BlacklistedToken.objects.filter(user=user).count() == 2
+
+
+def test_a_record_that_cannot_be_persisted_goes_to_the_dead_letter_list(user, issue, fake_redis):
+	rotate_refresh_token(issue()['refresh_token'])
+	fake_redis.lpush(refresh_token_store.QUEUE_KEY, json.dumps({'op': 'rotate', 'user_id': user.pk}))
+
+	assert flush_refresh_token_writes(timestamp=0) == 1
+	assert pending() == []
+	assert TrackedToken.objects.filter(user=user).count() == 1
+	dead = [json.loads(item) for item in fake_redis.lrange(refresh_token_store.DEAD_LETTER_KEY, 0, -1)]
+	assert dead == [{'op': 'rotate', 'user_id': user.pk}]
+
+
+def test_a_claimed_batch_is_retried_first_and_later_writes_are_kept(user, issue, fake_redis):
+	first = rotate_refresh_token(issue()['refresh_token'])['refresh_token']
+	# a flush that claimed the batch and died before acknowledging it
+	assert len(refresh_token_store.claim_pending(10)) == 1
+	assert pending() == []
+	second = rotate_refresh_token(issue()['refresh_token'])['refresh_token']
+
+	assert flush_refresh_token_writes(timestamp=0) == 2
+	assert pending() == []
+	assert fake_redis.llen(refresh_token_store.PROCESSING_KEY) == 0
+	assert TrackedToken.objects.filter(jti__in=[digest(first), digest(second)]).count() == 2
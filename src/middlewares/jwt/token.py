@@ -22,12 +22,16 @@
 
 from datetime import datetime
 from enum import Enum
+import time
 from django.core.serializers.json import DjangoJSONEncoder
 from typing import Any
 from uuid import UUID, uuid4
 
 import jwt
 
+from .codec import get_token_codec
+from .revocation import revocation_store
+
 
 class TokenTypes(str, Enum):
 	ACCESS = 'access'
@@ -42,20 +46,12 @@ class TokenUserEncoder(DjangoJSONEncoder):
 
 
 def get_token_payload_for_user(user) -> dict:
-	from django.conf import settings
-
-	return {
-		claim: getattr(user, user_attr) if isinstance(user_attr, str) else user_attr(user)
-		for claim, user_attr in settings.TOKEN_CLAIM_USER_ATTRIBUTE_MAP.items()
-	}
+	return get_token_codec().payload_for_user(user)
 
 
 def get_access_token_from_refresh_token(refresh_token: str) -> tuple[str, dict]:
-	from django.conf import settings
-
 	decoded = decode_token(refresh_token, token_type=TokenTypes.REFRESH, verify=True)
-	payload = {claim: decoded.get(claim) for claim in settings.TOKEN_CLAIM_USER_ATTRIBUTE_MAP}
-	return encode_token(payload, TokenTypes.ACCESS)
+	return encode_token(get_token_codec().claims_from(decoded), TokenTypes.ACCESS)
 
 
 def encode_token(
@@ -65,71 +61,133 @@ def encode_token(
 	json_encoder: type[DjangoJSONEncoder] | None = None,
 	**additional_headers: Any,
 ) -> tuple[str, dict]:
-	from django.conf import settings
-	from django.utils import timezone
-
-	now = timezone.now()
-	if token_type == TokenTypes.REFRESH:
-		expiry = now + settings.JWT_REFRESH_TOKEN_LIFETIME
-	else:
-		expiry = now + settings.JWT_ACCESS_TOKEN_LIFETIME
-
-	payload_data = {
-		**payload,
-		'jti': jti or uuid4().hex,
-		'exp': int(expiry.timestamp()),
-		'iat': int(now.timestamp()),
-		'token_type': token_type,
-	}
-
-	return (
-		jwt.encode(
-			payload_data,
-			settings.SECRET_KEY,
-			algorithm=settings.JWT_ALGORITHM,
-			headers=additional_headers,
-			json_encoder=json_encoder,
-		),
-		payload_data,
+	"""
+	Sign a token of the given type. The payload is serialized with the
+	codec's JSON backend unless a `json_encoder` class is given.
+	"""
+	return get_token_codec().encode(
+		payload, token_type, jti=jti, json_encoder=json_encoder, headers=additional_headers or None
 	)
 
 
 def decode_token(token: str, token_type: TokenTypes, verify: bool = True) -> dict:
-	from django.conf import settings
+	from tokens.models import TrackedToken
 
 	if verify is True:
-		decoded = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-		_verify_exp(decoded)
-		_verify_jti(decoded)
+		revocation_store.ensure_listening()
+		token_digest = TrackedToken.hasher(token) if revocation_store.verified_enabled else None
+		decoded = revocation_store.get_verified(token_digest) if token_digest else None
+		if decoded is None:
+			decoded = get_token_codec().decode(token)
+			_verify_epoch(decoded)
+			_verify_jti(decoded)
+			if token_digest:
+				revocation_store.remember_verified(token_digest, decoded, TrackedToken.hasher(decoded['jti']))
 		_verify_token_type(decoded, token_type)
 	else:
 		decoded = jwt.get_unverified_header(token)
 	return decoded
 
 
-def _verify_exp(payload: dict) -> None:
-	from django.utils import timezone
-	from jwt import ExpiredSignatureError
+async def adecode_token(token: str, token_type: TokenTypes) -> dict:
+	"""
+	Async counterpart of `decode_token(..., verify=True)`.
 
-	now = timezone.now()
-	token_expiry_unix_time = payload['exp']
-	token_expiry = timezone.make_aware(datetime.fromtimestamp(token_expiry_unix_time))
-	if now >= token_expiry:
-		raise ExpiredSignatureError('JWT has expired.')
+	Revocation checks go through the async ORM and Redis client, so they run
+	on the event loop instead of Channels' single thread-sensitive executor.
+	"""
+	from tokens.models import TrackedToken
 
+	await revocation_store.aensure_listening()
+	token_digest = TrackedToken.hasher(token) if revocation_store.verified_enabled else None
+	decoded = revocation_store.get_verified(token_digest) if token_digest else None
+	if decoded is None:
+		decoded = get_token_codec().decode(token)
+		await _averify_epoch(decoded)
+		await _averify_jti(decoded)
+		if token_digest:
+			revocation_store.remember_verified(token_digest, decoded, TrackedToken.hasher(decoded['jti']))
+	_verify_token_type(decoded, token_type)
+	return decoded
 
-def _verify_jti(payload: dict) -> None:
-	from jwt import InvalidKeyError, InvalidTokenError
 
-	from tokens.models import BlacklistedToken, TrackedToken
+def _verify_epoch(payload: dict) -> None:
+	from jwt import InvalidTokenError
+
+	user_id = payload.get('user_id')
+	if user_id is None:
+		return
+	current_epoch = revocation_store.get_epoch(user_id, loader=lambda: _load_token_epoch(user_id))
+	if payload.get('token_epoch', 0) < current_epoch:
+		raise InvalidTokenError('Token has been revoked.')
+
+
+async def _averify_epoch(payload: dict) -> None:
+	from jwt import InvalidTokenError
+
+	user_id = payload.get('user_id')
+	if user_id is None:
+		return
+	current_epoch = await revocation_store.aget_epoch(user_id, loader=lambda: _aload_token_epoch(user_id))
+	if payload.get('token_epoch', 0) < current_epoch:
+		raise InvalidTokenError('Token has been revoked.')
+
+
+def _token_epoch_queryset(user_id):
+	from django.contrib.auth import get_user_model
+
+	User = get_user_model()
+	return User.all_objects.filter(id=user_id).values_list('token_epoch', flat=True)
+
+
+def _load_token_epoch(user_id) -> int:
+	return _token_epoch_queryset(user_id).first() or 0
+
+
+async def _aload_token_epoch(user_id) -> int:
+	return await _token_epoch_queryset(user_id).afirst() or 0
+
+
+def _jti_digest(payload: dict) -> str:
+	from jwt import InvalidKeyError
+
+	from tokens.models import TrackedToken
 
 	jti = payload.get('jti')
 	user = payload.get('user_id')
 
 	if not jti and not user:
 		raise InvalidKeyError('Missing key jti or user.')
-	jti = TrackedToken.hasher(jti)
-	if BlacklistedToken.all_objects.filter(user=user, token__jti=jti).exists():
+	return TrackedToken.hasher(jti)
+
+
+def _blacklisted_queryset(payload: dict, jti: str):
+	from tokens.models import BlacklistedToken
+
+	return BlacklistedToken.all_objects.filter(user=payload.get('user_id'), jti=jti)
+
+
+def _verify_jti(payload: dict) -> None:
+	from jwt import InvalidTokenError
+
+	jti = _jti_digest(payload)
+	revoked = revocation_store.is_revoked(jti)
+	if revoked is None:
+		revoked = _blacklisted_queryset(payload, jti).exists()
+		revocation_store.remember(jti, revoked)
+	if revoked:
+		raise InvalidTokenError('Token has been blacklisted.')
+
+
+async def _averify_jti(payload: dict) -> None:
+	from jwt import InvalidTokenError
+
+	jti = _jti_digest(payload)
+	revoked = revocation_store.is_revoked(jti)
+	if revoked is None:
+		revoked = await _blacklisted_queryset(payload, jti).aexists()
+		revocation_store.remember(jti, revoked)
+	if revoked:
 		raise InvalidTokenError('Token has been blacklisted.')
 
 
@@ -143,19 +201,21 @@ def _verify_token_type(payload: dict, token_type: TokenTypes) -> None:
 
 
 def set_token_claims_to_user(user, token: dict) -> None:
-	from django.conf import settings
+	get_token_codec().apply_claims(user, token)
 
-	for claim, user_attribute in settings.TOKEN_CLAIM_USER_ATTRIBUTE_MAP.items():
-		if isinstance(user_attribute, str):
-			setattr(user, user_attribute, token.get(claim))
-		else:
-			setattr(user, claim, token.get(claim))
 
+def get_user_from_token(token: str, lazy: bool = False):
+	"""
+	Return the user the access token belongs to.
 
-def get_user_from_token(token: str):
+	With `lazy=True` a claims-only `TokenUser` is returned instead and the
+	users table is only queried if a non-claim attribute is accessed.
+	"""
 	from django.contrib.auth import get_user_model
 	from jwt import PyJWTError
 
+	from .principal import TokenUser
+
 	try:
 		access_token = decode_token(token, token_type=TokenTypes.ACCESS, verify=True)
 	except PyJWTError as e:
@@ -164,6 +224,8 @@ def get_user_from_token(token: str):
 	user_id = access_token.get('user_id')
 	if user_id is None:
 		raise ValueError('User ID not found in token.')
+	if lazy:
+		return TokenUser(access_token)
 
 	User = get_user_model()
 	try:
@@ -175,44 +237,199 @@ def get_user_from_token(token: str):
 	return user
 
 
+async def aget_user_from_token(token: str, lazy: bool = False):
+	"""
+	Async counterpart of `get_user_from_token`.
+	"""
+	from django.contrib.auth import get_user_model
+	from jwt import PyJWTError
+
+	from .principal import TokenUser
+
+	try:
+		access_token = await adecode_token(token, token_type=TokenTypes.ACCESS)
+	except PyJWTError as e:
+		raise ValueError(f'Authentication failed: {e}')
+
+	user_id = access_token.get('user_id')
+	if user_id is None:
+		raise ValueError('User ID not found in token.')
+	if lazy:
+		return TokenUser(access_token)
+
+	User = get_user_model()
+	try:
+		user = await User.objects.aget(id=user_id)
+	except User.DoesNotExist:
+		raise ValueError('User not found.')
+
+	set_token_claims_to_user(user, access_token)
+	return user
+
+
+def _encode_token_pair(payload: dict) -> dict:
+	_jti = uuid4().hex
+	access_token, access_payload = encode_token(payload=payload, token_type=TokenTypes.ACCESS, jti=_jti)
+	refresh_token, refresh_payload = encode_token(payload=payload, token_type=TokenTypes.REFRESH, jti=_jti)
+	return {
+		'access_token': access_token,
+		'refresh_token': refresh_token,
+		'access_payload': access_payload,
+		'refresh_payload': refresh_payload,
+	}
+
+
 def get_obtain_token_pair(user) -> dict:
 	"""
 	Get a pair of tokens (access and refresh) for the user.
+
+	Each login starts a new refresh-token family (the `fid` claim) that
+	`rotate_refresh_token` carries forward.
 	"""
-	payload = get_token_payload_for_user(user)
-	_jti = uuid4().hex
-	access_token, access_payload = encode_token(
-		payload=payload,
-		token_type=TokenTypes.ACCESS,
-		jti=_jti,
-		json_encoder=TokenUserEncoder,
-	)
-	refresh_token, refresh_payload = encode_token(
-		payload=payload,
-		token_type=TokenTypes.REFRESH,
-		jti=_jti,
-		json_encoder=TokenUserEncoder,
-	)
+	from django.db import transaction
+
+	from tokens.models import TrackedToken
+
+	from .rotation import refresh_token_store
+
+	family = uuid4().hex
+	pair = _encode_token_pair({**get_token_payload_for_user(user), 'fid': family})
+	refresh_payload = pair['refresh_payload']
 
 	try:
 		create_tracked_token(
 			user,
-			jti=_jti,
+			jti=refresh_payload['jti'],
 			exp=refresh_payload['exp'],
-			refresh_token=refresh_token,
-			access_token=access_token,
+			refresh_token=pair['refresh_token'],
+			access_token=pair['access_token'],
+			family=family,
 		)
-		return {
-			'access_token': access_token,
-			'refresh_token': refresh_token,
-			'access_payload': access_payload,
-			'refresh_payload': refresh_payload,
-		}
 	except (ValueError, TypeError) as e:
 		raise ValueError(f'Failed to create tracked token: {e!s}')
 
+	digest = TrackedToken.hasher(refresh_payload['jti'])
+	ttl = refresh_payload['exp'] - int(time.time())
+	transaction.on_commit(lambda: refresh_token_store.register(digest, family, ttl))
+	return pair
 
-def create_tracked_token(user, jti: str, exp: int, refresh_token: str, access_token: str):
+
+def _prepare_rotation(decoded: dict) -> tuple[dict, str, dict]:
+	"""
+	For a refresh token whose signature, type and epoch were checked: the new
+	pair, the old JTI digest and the `refresh_token_store.rotate` arguments.
+	"""
+	from jwt import InvalidTokenError
+
+	from tokens.models import TrackedToken
+
+	old_jti = _jti_digest(decoded)
+	if revocation_store.is_revoked(old_jti):
+		raise InvalidTokenError('Token has been blacklisted.')
+
+	# tokens issued before rotation have no family; derive a stable one
+	family = decoded.get('fid') or old_jti[:32]
+	pair = _encode_token_pair({**get_token_codec().claims_from(decoded), 'fid': family})
+	refresh_payload = pair['refresh_payload']
+	new_jti = TrackedToken.hasher(refresh_payload['jti'])
+	now = int(time.time())
+	rotate_kwargs = {
+		'old_digest': old_jti,
+		'new_digest': new_jti,
+		'family': family,
+		'old_ttl': decoded['exp'] - now,
+		'new_ttl': refresh_payload['exp'] - now,
+		'record': {
+			'op': 'rotate',
+			'user_id': decoded.get('user_id'),
+			'family': family,
+			'old': old_jti,
+			'jti': new_jti,
+			'exp': refresh_payload['exp'],
+			'access_token': TrackedToken.hasher(pair['access_token']),
+			'refresh_token': TrackedToken.hasher(pair['refresh_token']),
+		},
+	}
+	return pair, old_jti, rotate_kwargs
+
+
+def _check_rotation(result: str) -> None:
+	from jwt import InvalidTokenError
+
+	from .rotation import RotationResult
+
+	if result == RotationResult.REUSED:
+		raise InvalidTokenError('Refresh token reuse detected.')
+	if result == RotationResult.REVOKED:
+		raise InvalidTokenError('Token has been revoked.')
+
+
+def rotate_refresh_token(refresh_token: str) -> dict:
+	"""
+	Exchange a refresh token for a new access/refresh pair.
+
+	The presented token stops working; presenting it again revokes its whole
+	family. Signature, expiry and epoch are checked locally and the rotation
+	itself is a single Redis call. The database is only read for tokens
+	Redis has no record of, and written later by the write-behind task.
+	"""
+	from jwt import InvalidTokenError
+
+	from tokens.models import TrackedToken
+
+	from .rotation import RotationResult, refresh_token_store
+
+	decoded = get_token_codec().decode(refresh_token)
+	_verify_token_type(decoded, TokenTypes.REFRESH)
+	_verify_epoch(decoded)
+	pair, old_jti, rotate_kwargs = _prepare_rotation(decoded)
+
+	result, members = refresh_token_store.rotate(**rotate_kwargs)
+	if result == RotationResult.UNKNOWN:
+		_verify_jti(decoded)
+		if not TrackedToken.objects.filter(jti=old_jti).exists():
+			raise InvalidTokenError('Token not found in tracked tokens.')
+		result, members = refresh_token_store.rotate(**rotate_kwargs, allow_unknown=True)
+
+	if result == RotationResult.REUSED:
+		revocation_store.revoke(members)
+	_check_rotation(result)
+	return pair
+
+
+async def arotate_refresh_token(refresh_token: str) -> dict:
+	"""
+	Async counterpart of `rotate_refresh_token`.
+	"""
+	from asgiref.sync import sync_to_async
+	from jwt import InvalidTokenError
+
+	from tokens.models import TrackedToken
+
+	from .rotation import RotationResult, refresh_token_store
+
+	decoded = get_token_codec().decode(refresh_token)
+	_verify_token_type(decoded, TokenTypes.REFRESH)
+	await _averify_epoch(decoded)
+	pair, old_jti, rotate_kwargs = _prepare_rotation(decoded)
+
+	result, members = await refresh_token_store.arotate(**rotate_kwargs)
+	if result == RotationResult.UNKNOWN:
+		await _averify_jti(decoded)
+		if not await TrackedToken.objects.filter(jti=old_jti).aexists():
+			raise InvalidTokenError('Token not found in tracked tokens.')
+		result, members = await refresh_token_store.arotate(**rotate_kwargs, allow_unknown=True)
+
+	if result == RotationResult.REUSED:
+		# rare, and publishing goes through the sync client
+		await sync_to_async(revocation_store.revoke)(members)
+	_check_rotation(result)
+	return pair
+
+
+def create_tracked_token(
+	user, jti: str, exp: int, refresh_token: str, access_token: str, family: str | None = None
+):
 	"""
 	Create a tracked token for the user.
 	"""
@@ -225,12 +442,14 @@ def create_tracked_token(user, jti: str, exp: int, refresh_token: str, access_to
 	access_token = TrackedToken.hasher(access_token)
 
 	_exp = make_aware(datetime.fromtimestamp(exp))
-	return TrackedToken.objects.get_or_create(
+	# the jti is freshly generated, so there is nothing to get first
+	return TrackedToken.objects.create(
 		user=user,
 		jti=jti,
 		exp=_exp,
 		refresh_token=refresh_token,
 		access_token=access_token,
+		family=family,
 	)
 
 
@@ -240,48 +459,54 @@ def create_blacklisted_token(user, token):
 	"""
 	from tokens.models import BlacklistedToken
 
-	return BlacklistedToken.objects.create(user=user, token=token)
+	return BlacklistedToken.objects.create(user=user, token=token, jti=token.jti, exp=token.exp)
 
 
 def blacklist_token(user, token: str) -> None:
 	"""
 	Blacklist a token for the user.
 	"""
+	from django.db import transaction
+
 	from tokens.models import TrackedToken
 
+	from .rotation import refresh_token_store
+
 	decoded = decode_token(token, token_type=TokenTypes.REFRESH, verify=True)
 	jti = decoded.get('jti')
 
 	if not jti:
 		raise ValueError('Invalid token: Missing jti')
 	jti = TrackedToken.hasher(jti)
+	family = decoded.get('fid')
 	tracked_token = TrackedToken.all_objects.filter(user=user, jti=jti).first()
 	if tracked_token:
 		create_blacklisted_token(user, tracked_token)
 		tracked_token.soft_delete()
-	else:
+	elif not family:
 		raise ValueError('Token not found in tracked tokens')
+	# a freshly rotated token may not be persisted yet; revoking its family
+	# blacklists it once the write-behind task catches up
+	transaction.on_commit(lambda: revocation_store.revoke([jti]))
+	if family:
+		transaction.on_commit(lambda: refresh_token_store.revoke_family(family, user.pk))
 
 
-def blacklist_all_tokens(user):
+def blacklist_all_tokens(user) -> int:
 	"""
-	Blacklist all tracked tokens for the given user.
+	Revoke every token issued to the user by bumping their token epoch.
+
+	Tokens carry the epoch they were issued under, so this is a single write
+	no matter how many sessions the user has. Returns the new epoch.
 	"""
+	from django.contrib.auth import get_user_model
 	from django.db import transaction
+	from django.db.models import F
 
-	from tokens.models import BlacklistedToken, TrackedToken
-
-	tracked_tokens = TrackedToken.objects.filter(user=user, is_deleted=False)
-	blacklisted = []
-
-	for tracked_token in tracked_tokens:
-		if not BlacklistedToken.objects.filter(token=tracked_token).exists():
-			blacklisted.append(BlacklistedToken(user=user, token=tracked_token))
-			tracked_token.soft_delete()
-
-	if not blacklisted:
-		return 0
-
+	User = get_user_model()
 	with transaction.atomic():
-		BlacklistedToken.objects.bulk_create(blacklisted)
-	return len(blacklisted)
+		User.all_objects.filter(pk=user.pk).update(token_epoch=F('token_epoch') + 1)
+		user.refresh_from_db(fields=['token_epoch'])
+		epoch = user.token_epoch
+		transaction.on_commit(lambda: revocation_store.set_epoch(user.pk, epoch))
+	return epoch
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from ninja import PatchDict, Router
+from ninja.errors import AuthorizationError
 
+from accounts.models import UserType
+from common.export import ExportFormat, export_response
 from common.schema import APIResponse, APIResponseWithData, make_data_response, make_response
-from notifications.models import NotificationPreference
+from middlewares.jwt.auth import AsyncHttpJwtAuth
+from notifications.models import Notification, NotificationPreference
 from notifications.schema.notifications import BroadcastNotificationInSchema, NotificationPreferenceSchema
 from tasks.notifications.broadcast_tasks import send_broadcast_notification_task
 
@@ -62,3 +66,26 @@ def create_notification(request, payload: BroadcastNotificationInSchema) -> dict
 		admin_user=user.id,
 	)
 	return 201, make_response(success=True, status_code=201, message='Notification created successfully.')
+
+
+NOTIFICATION_EXPORT_COLUMNS = {
+	'id': 'id',
+	'user_id': 'user_id',
+	'user_email': 'user__email',
+	'verb': 'verb',
+	'message': 'message',
+	'read': 'read',
+	'source_app': 'source_app',
+	'created_at': 'created_at',
+}
+
+
+@notifications_router.get(
+	'/export-notifications/',
+	response={200: None, 403: APIResponse},
+	auth=AsyncHttpJwtAuth(),
+)
+async def export_notifications(request, format: ExportFormat = 'csv'):
+	if getattr(request.user, 'user_type', None) != UserType.ADMIN:
+		raise AuthorizationError(message='Only admin can export notifications', status_code=403)
+	return export_response(Notification.objects.all(), NOTIFICATION_EXPORT_COLUMNS, format, 'notifications')
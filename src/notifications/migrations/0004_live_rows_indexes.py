@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0003_alter_notificationpreference_push'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='notifications_table_live'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationchannel',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='notification_cha_bfd2d29f_live'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationpreference',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='notifications_no_7054860e_live'),
+        ),
+    ]
@@ -3,7 +3,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
-from common.base_model import TimeStampedSoftDeleteModel
+from common.base_model import TimeStampedSoftDeleteModel, live_rows_index
 
 User = settings.AUTH_USER_MODEL
 
@@ -59,6 +59,7 @@ class Notification(TimeStampedSoftDeleteModel):
 		verbose_name = 'Notification'
 		verbose_name_plural = 'Notifications'
 		db_table = 'notifications_table'
+		indexes = [live_rows_index('notifications_table')]
 
 	def __str__(self):
 		return f'Notification to {self.user}: {self.verb}'
@@ -90,6 +91,7 @@ class NotificationChannel(TimeStampedSoftDeleteModel):
 		verbose_name = 'Notification Channel'
 		verbose_name_plural = 'Notification Channels'
 		db_table = 'notification_channels_table'
+		indexes = [live_rows_index('notification_channels_table')]
 
 
 class NotificationPreference(TimeStampedSoftDeleteModel):
@@ -102,3 +104,6 @@ class NotificationPreference(TimeStampedSoftDeleteModel):
 
 	def __str__(self):
 		return f'Preferences for {self.user.email}'
+
+	class Meta:
+		indexes = [live_rows_index('notifications_notificationpreference')]
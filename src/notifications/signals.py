@@ -8,7 +8,9 @@ from notifications.models import NotificationPreference
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_notification_preferences(sender, instance, created, **kwargs):
 	"""
-	Signal to create NotificationPreference for a new user.
+	Signal to create NotificationPreference for a new user. Bulk imports and
+	registration insert users in SQL without this signal; see
+	services.accounts.import_service.insert_user_relations().
 	"""
 	if created:
 		NotificationPreference.objects.create(user=instance)
@@ -19,7 +19,7 @@ User = get_user_model()
 )
 def validate_otp(request, payload: OtpValidateIn):
 	"""Validate OTP Code."""
-	user = get_object_or_404(User, email=payload.email.lower())
+	user = get_object_or_404(User, email__lower=payload.email.lower())
 	if payload.otp_type not in OtpType.values:
 		return make_response(False, 400, 'Invalid OTP type.')
 	success, message = verify_otp(
@@ -44,7 +44,7 @@ def validate_otp(request, payload: OtpValidateIn):
 )
 def request_otp(request, email: str, otp_type: str):
 	"""Every Mail That Requires OTP Should Use This Endpoint."""
-	user = get_object_or_404(User, email=email.lower())
+	user = get_object_or_404(User, email__lower=email.lower())
 
 	if otp_type not in OtpType.values:
 		return make_response(False, 400, 'Invalid OTP type.')
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp', '0002_alter_otp_otp_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='otp_codes_live'),
+        ),
+    ]
@@ -3,7 +3,7 @@ from datetime import timedelta
 from django.db import models
 from django.utils import timezone
 
-from common.base_model import TimeStampedSoftDeleteModel
+from common.base_model import TimeStampedSoftDeleteModel, live_rows_index
 
 # Create your models here.
 
@@ -53,6 +53,7 @@ class Otp(TimeStampedSoftDeleteModel):
 		verbose_name_plural = 'OTPs'
 		ordering = ['-created_at']
 		db_table = 'otp_codes'
+		indexes = [live_rows_index('otp_codes')]
 
 	@staticmethod
 	def get_expiration_time(duration=10):
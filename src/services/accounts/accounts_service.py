@@ -1,30 +1,97 @@
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast, Greatest
+
+from accounts.models import AdminProfile, CustomerProfile, User, UserType, VendorProfile
+
+# the one reverse one-to-one profile relation (and model) each user type has
+PROFILE_RELATIONS = {
+	UserType.CUSTOMER: 'customerprofile',
+	UserType.VENDOR: 'vendorprofile',
+	UserType.ADMIN: 'adminprofile',
+}
+PROFILE_MODELS = {
+	UserType.CUSTOMER: CustomerProfile,
+	UserType.VENDOR: VendorProfile,
+	UserType.ADMIN: AdminProfile,
+}
+
+
+def with_profiles(queryset):
+	"""
+	Join every profile relation so `get_user_profile_instance` needs no query per user.
+	"""
+	return queryset.select_related(*PROFILE_RELATIONS.values())
+
+
+# backed by the accounts_user_*_trgm indexes
+USER_SEARCH_FIELDS = ('email', 'full_name', 'phone_number')
+
+
+def user_search_q(term: str) -> Q:
+	q = Q()
+	for field in USER_SEARCH_FIELDS:
+		q |= Q(**{f'{field}__icontains': term})
+	return q
+
+
+def rank_by_similarity(queryset, term: str):
+	"""
+	Order users by their best trigram similarity to `term` across the search fields.
+	"""
+	similarity = Greatest(*(TrigramSimilarity(field, term) for field in USER_SEARCH_FIELDS))
+	# similarity() is a real; as a double the value in a page cursor compares equal to the row's again
+	similarity = Cast(similarity, FloatField())
+	return queryset.annotate(similarity=similarity).order_by('-similarity', '-id')
+
+
 def get_user_profile_instance(user):
-	if user.user_type == 'customer' and hasattr(user, 'customerprofile'):
-		return user.customerprofile
-	elif user.user_type == 'vendor' and hasattr(user, 'vendorprofile'):
-		return user.vendorprofile
-	elif user.user_type == 'admin' and hasattr(user, 'adminprofile'):
-		return user.adminprofile
-	return None
+	"""
+	Return the profile for the user's type, or None.
+
+	Reads only the relation matching `user_type`: at most one query, none when
+	it was joined (`with_profiles`).
+	"""
+	relation = PROFILE_RELATIONS.get(user.user_type)
+	if relation is None:
+		return None
+	try:
+		return getattr(user, relation)
+	except ObjectDoesNotExist:
+		return None
+
+
+def _user_and_profile(user) -> list:
+	"""Querysets of the user's row and profile row, soft-deleted or not"""
+	querysets = [User.all_objects.filter(pk=user.pk)]
+	profile_model = PROFILE_MODELS.get(user.user_type)
+	if profile_model:
+		querysets.append(profile_model.all_objects.filter(user=user))
+	return querysets
 
 
 def delete_user_and_profile(user):
 	"""
 	Delete user and their associated profile.
 	"""
+	from services.accounts.user_cache import user_out_cache
 
-	profile = get_user_profile_instance(user)
-	if profile:
-		profile.soft_delete()
-	user.soft_delete()
+	with transaction.atomic():
+		for queryset in _user_and_profile(user):
+			queryset.soft_delete()
+		# queryset updates send no post_save, so drop the cached payload here
+		user_out_cache.invalidate_on_commit(user.pk)
 
 
 def restore_user_and_profile(user):
 	"""
 	Restore user and their associated profile.
 	"""
+	from services.accounts.user_cache import user_out_cache
 
-	profile = get_user_profile_instance(user)
-	if profile:
-		profile.restore()
-	user.restore()
+	with transaction.atomic():
+		for queryset in _user_and_profile(user):
+			queryset.restore()
+		user_out_cache.invalidate_on_commit(user.pk)
@@ -0,0 +1,95 @@
+"""
+Write-behind last-seen tracking: requests record into a Redis hash, a periodic task flushes it to `User.last_seen`
+"""
+
+from collections.abc import Sequence
+from itertools import batched
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+import redis
+
+from accounts.models import User
+from common.cache import TTLCache
+from middlewares.jwt.revocation import revocation_store
+
+logger = logging.getLogger(__name__)
+
+
+def persist_last_seen(rows: Sequence[tuple[int, int]]) -> int:
+	"""Apply `(user id, unix time)` pairs in one UPDATE ... FROM (VALUES ...); never moves last_seen back"""
+	qn = connection.ops.quote_name
+	pk = User._meta.pk
+	values = ', '.join([f'(%s::{pk.cast_db_type(connection)}, to_timestamp(%s))'] * len(rows))
+	with connection.cursor() as cursor:
+		cursor.execute(
+			f'UPDATE {qn(User._meta.db_table)} AS u SET last_seen = v.seen '
+			f'FROM (VALUES {values}) AS v(id, seen) '
+			f'WHERE u.{qn(pk.column)} = v.id AND (u.last_seen IS NULL OR u.last_seen < v.seen)',
+			[value for row in rows for value in row],
+		)
+		return cursor.rowcount
+
+
+class LastSeenStore:
+	"""
+	Keeps `user id -> unix time` in one Redis hash.
+
+	Each process records a user at most once per LAST_SEEN_RESOLUTION
+	seconds, so a busy client costs one HSET a minute rather than a row
+	write per request. `flush()` renames the hash aside before reading it,
+	so activity recorded during a flush lands in the next one, and an
+	interrupted flush is retried first on the next run.
+	"""
+
+	KEY = 'accounts:last_seen'
+	FLUSHING_KEY = 'accounts:last_seen:flushing'
+
+	def __init__(self):
+		self._recent: TTLCache | None = None
+
+	@property
+	def recent(self) -> TTLCache:
+		if self._recent is None:
+			self._recent = TTLCache(
+				maxsize=getattr(settings, 'LAST_SEEN_LOCAL_SIZE', 10_000),
+				ttl=getattr(settings, 'LAST_SEEN_RESOLUTION', 60),
+			)
+		return self._recent
+
+	def touch(self, user_id) -> None:
+		if user_id is None or not self.recent.add(user_id, True):
+			return
+		try:
+			revocation_store.get_redis().hset(self.KEY, str(user_id), int(time.time()))
+		except Exception as e:
+			logger.error(f'❌ Error recording last seen for user {user_id}: {e}')
+
+	async def atouch(self, user_id) -> None:
+		"""Async counterpart of `touch()`"""
+		if user_id is None or not self.recent.add(user_id, True):
+			return
+		try:
+			await revocation_store.get_async_redis().hset(self.KEY, str(user_id), int(time.time()))
+		except Exception as e:
+			logger.error(f'❌ Error recording last seen for user {user_id}: {e}')
+
+	def flush(self, batch_size: int = 1000) -> int:
+		"""Persist the recorded times to the database; returns how many users were written"""
+		client = revocation_store.get_redis()
+		if not client.exists(self.FLUSHING_KEY):
+			try:
+				client.rename(self.KEY, self.FLUSHING_KEY)
+			except redis.ResponseError:
+				return 0  # nobody was seen since the last flush
+		rows = [(int(user_id), int(seen)) for user_id, seen in client.hgetall(self.FLUSHING_KEY).items()]
+		for batch in batched(rows, batch_size):
+			persist_last_seen(batch)
+		client.delete(self.FLUSHING_KEY)
+		return len(rows)
+
+
+# Global instance
+last_seen_store = LastSeenStore()
@@ -0,0 +1,170 @@
+"""
+Password hashing and verification on a bounded thread pool, off the request threads
+"""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+	"""Every worker is busy and the queue is full; the caller should answer 429"""
+
+
+@dataclass(frozen=True)
+class HashTiming:
+	wait: float  # seconds queued before a worker picked the job up
+	run: float  # seconds spent hashing
+
+	def server_timing(self) -> str:
+		"""`Server-Timing` header value, in milliseconds"""
+		return f'hash-wait;dur={self.wait * 1000:.1f}, hash;dur={self.run * 1000:.1f}'
+
+
+@dataclass(frozen=True)
+class HashedPassword:
+	encoded: str
+	timing: HashTiming
+
+
+@dataclass(frozen=True)
+class PasswordCheck:
+	valid: bool
+	upgraded: str | None  # the password re-hashed with the preferred hasher and parameters, if outdated
+	timing: HashTiming
+
+
+@dataclass
+class HashingMetrics:
+	completed: int = 0
+	rejected: int = 0
+	wait_total: float = 0.0
+	wait_max: float = 0.0
+	run_total: float = 0.0
+	run_max: float = 0.0
+
+	def record(self, timing: HashTiming) -> None:
+		self.completed += 1
+		self.wait_total += timing.wait
+		self.wait_max = max(self.wait_max, timing.wait)
+		self.run_total += timing.run
+		self.run_max = max(self.run_max, timing.run)
+
+	def snapshot(self) -> dict:
+		"""Counters plus average and maximum wait/run times in milliseconds"""
+		completed = self.completed or 1
+		return {
+			'completed': self.completed,
+			'rejected': self.rejected,
+			'wait_avg_ms': self.wait_total / completed * 1000,
+			'wait_max_ms': self.wait_max * 1000,
+			'run_avg_ms': self.run_total / completed * 1000,
+			'run_max_ms': self.run_max * 1000,
+		}
+
+
+def _verify(password: str, encoded: str) -> tuple[bool, str | None]:
+	upgraded = []
+	# Django calls the setter for a correct password whose hasher or parameters are outdated
+	valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+	return valid, upgraded[0] if upgraded else None
+
+
+class PasswordHasherPool:
+	"""
+	Runs password hashing on PASSWORD_HASHING_WORKERS threads (the PBKDF2,
+	Argon2 and bcrypt hashers release the GIL while hashing).
+
+	At most PASSWORD_HASHING_QUEUE_SIZE jobs wait for a worker. Past that,
+	submitting raises PasswordHashingBusy at once, so a credential-stuffing
+	burst cannot tie up the request threads or the event loop. Async callers
+	await the job; sync callers block on it.
+	"""
+
+	def __init__(self, workers: int | None = None, queue_size: int | None = None):
+		self._workers = workers
+		self._queue_size = queue_size
+		self._executor: ThreadPoolExecutor | None = None
+		self._slots: threading.BoundedSemaphore | None = None
+		self._lock = threading.Lock()
+		self.metrics = HashingMetrics()
+
+	@property
+	def workers(self) -> int:
+		return self._workers or getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+
+	@property
+	def queue_size(self) -> int:
+		if self._queue_size is not None:
+			return self._queue_size
+		return getattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', self.workers * 4)
+
+	def _start(self) -> None:
+		with self._lock:
+			if self._executor is None:
+				self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+				self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hashing')
+
+	def _submit(self, func: Callable, *args) -> Future:
+		if self._executor is None:
+			self._start()
+		if not self._slots.acquire(blocking=False):
+			with self._lock:
+				self.metrics.rejected += 1
+				rejected = self.metrics.rejected
+			if rejected == 1 or rejected % 100 == 0:
+				logger.warning(f'🔑 Password hashing saturated, {rejected} requests rejected so far')
+			raise PasswordHashingBusy('Too many password checks in progress, retry shortly')
+
+		queued = time.perf_counter()
+
+		def run():
+			started = time.perf_counter()
+			try:
+				result = func(*args)
+			finally:
+				self._slots.release()
+			timing = HashTiming(wait=started - queued, run=time.perf_counter() - started)
+			with self._lock:
+				self.metrics.record(timing)
+			return result, timing
+
+		try:
+			return self._executor.submit(run)
+		except BaseException:
+			self._slots.release()
+			raise
+
+	def snapshot(self) -> dict:
+		"""Pool size and this process's hashing metrics"""
+		with self._lock:
+			metrics = self.metrics.snapshot()
+		return {'workers': self.workers, 'queue_size': self.queue_size, **metrics}
+
+	def make_password(self, password: str) -> HashedPassword:
+		return HashedPassword(*self._submit(make_password, password).result())
+
+	async def amake_password(self, password: str) -> HashedPassword:
+		return HashedPassword(*await asyncio.wrap_future(self._submit(make_password, password)))
+
+	def verify(self, password: str, encoded: str) -> PasswordCheck:
+		(valid, upgraded), timing = self._submit(_verify, password, encoded).result()
+		return PasswordCheck(valid, upgraded, timing)
+
+	async def averify(self, password: str, encoded: str) -> PasswordCheck:
+		(valid, upgraded), timing = await asyncio.wrap_future(self._submit(_verify, password, encoded))
+		return PasswordCheck(valid, upgraded, timing)
+
+
+# Global instance
+password_hasher = PasswordHasherPool()
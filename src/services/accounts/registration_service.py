@@ -0,0 +1,95 @@
+"""
+Signup in one transaction: user, profile, notification preferences, OTP and token pair, with the welcome email queued on commit
+"""
+
+from datetime import datetime
+import os
+
+from django.db import connection, transaction
+
+from accounts.models import User
+from middlewares.jwt.token import get_obtain_token_pair
+from otp.models import Otp, OtpType
+from services.accounts.import_service import ON_EMAIL_CONFLICT, insert_select, insert_user_relations
+from services.otp.otp_service import generate_otp_code
+from tasks.notifications.mail_tasks import send_email_task
+
+USER_COLUMNS = ('email', 'password', 'full_name', 'phone_number', 'user_type', 'is_active')
+OTP_COLUMNS = ('otp_code', 'otp_type', 'expires_at')
+
+
+def _input_values(fields: list) -> str:
+	# typed placeholders, so the VALUES row keeps the target column types
+	return ', '.join(f'%s::{field.cast_db_type(connection)}' for field in fields)
+
+
+def insert_user(data: dict, password_hash: str, otp_code: str) -> User | None:
+	"""
+	Insert the user with their profile, notification preferences and signup
+	OTP in a single statement; the profile and preferences come from
+	`insert_user_relations()`, as no post_save receivers run.
+	Returns None when the email is already taken.
+	"""
+	user_fields = [User._meta.get_field(column) for column in USER_COLUMNS]
+	otp_fields = [Otp._meta.get_field(column) for column in OTP_COLUMNS]
+	params = [
+		User.objects.normalize_email(data['email']),
+		password_hash,
+		data.get('full_name'),
+		data.get('phone_number'),
+		data['user_type'],
+		True,  # like create_user
+		otp_code,
+		OtpType.SIGNUP.value,
+		Otp.get_expiration_time(),
+	]
+
+	users_sql, extra = insert_select(User, {column: f'input.{column}' for column in USER_COLUMNS}, 'input')
+	statements = [
+		f'input ({", ".join(USER_COLUMNS + OTP_COLUMNS)}) AS (VALUES ({_input_values(user_fields + otp_fields)}))',
+		# a taken address, in any case, turns into an empty result
+		f'inserted AS ({users_sql} {ON_EMAIL_CONFLICT} RETURNING *)',
+	]
+	params += extra
+	relations, extra = insert_user_relations('inserted')
+	statements += relations
+	params += extra
+	otp_provided = {'user_id': 'inserted.id', **{column: f'input.{column}' for column in OTP_COLUMNS}}
+	sql, extra = insert_select(Otp, otp_provided, 'inserted, input')
+	statements.append(f'otp AS ({sql})')
+	params += extra
+
+	users = list(User.objects.raw(f'WITH {", ".join(statements)} SELECT * FROM inserted', params))
+	return users[0] if users else None
+
+
+def register_user(data: dict, password_hash: str) -> tuple[User, dict] | None:
+	"""
+	Create the account and its first token pair in one transaction (two
+	statements) and queue the welcome email once it commits. Returns
+	`(user, token pair)`, or None when the email is already taken.
+	"""
+	otp_code = generate_otp_code()
+	with transaction.atomic():
+		user = insert_user(data, password_hash, otp_code)
+		if user is None:
+			return None
+		token = get_obtain_token_pair(user)
+
+		def send_welcome_email():
+			send_email_task.defer(
+				user_email=user.email,
+				template_type=OtpType.SIGNUP.value,
+				category='otp',
+				subject='Welcome to this Space 🚀',
+				context={
+					'otp_code': otp_code,
+					'app_name': os.environ.get('PRODUCT_NAME'),
+					'current_year': datetime.now().year,
+					'user_name': user.full_name,
+				},
+			)
+
+		# the account exists once committed; a failed enqueue is logged, not raised
+		transaction.on_commit(send_welcome_email, robust=True)
+	return user, token
@@ -0,0 +1,24 @@
+from accounts.models import User, UserType
+from notifications.models import NotificationPreference
+from services.accounts.import_service import clean_row, insert_batch
+
+
+def test_insert_batch_creates_profiles_and_skips_existing_emails(db):
+	existing = User.objects.create_user(email='existing@example.com')
+	raw = [
+		{'email': 'bulk.vendor@example.com', 'user_type': 'vendor', 'is_verified': 'true'},
+		{'email': 'bulk.customer@example.com', 'full_name': 'Bulk Customer'},
+		{'email': existing.email.upper()},
+	]
+	rows = [clean_row(row, UserType.CUSTOMER) for row in raw]
+	for row in rows:
+		row['password'] = '!unusable'
+
+	assert insert_batch(rows) == 2
+
+	vendor = User.objects.get(email='bulk.vendor@example.com')
+	customer = User.objects.get(email='bulk.customer@example.com')
+	assert vendor.is_verified and vendor.vendorprofile
+	assert customer.full_name == 'Bulk Customer' and customer.customerprofile
+	assert NotificationPreference.objects.filter(user__in=[vendor, customer]).count() == 2
+	assert insert_batch(rows) == 0
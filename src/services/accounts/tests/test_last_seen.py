@@ -0,0 +1,37 @@
+from datetime import UTC, datetime
+
+from accounts.models import User
+from middlewares.jwt.token import get_obtain_token_pair, get_user_from_token
+from services.accounts.last_seen import persist_last_seen
+
+
+def test_persist_last_seen_is_one_update_and_never_moves_back(db, django_assert_num_queries):
+	seen = User.objects.create_user(email='seen@example.com')
+	other = User.objects.create_user(email='other@example.com')
+	User.objects.filter(pk=seen.pk).update(last_seen=datetime(2026, 1, 1, tzinfo=UTC))
+
+	with django_assert_num_queries(1):
+		updated = persist_last_seen([(seen.pk, 1_700_000_000), (other.pk, 1_800_000_000)])
+
+	assert updated == 1
+	seen.refresh_from_db()
+	other.refresh_from_db()
+	assert seen.last_seen == datetime(2026, 1, 1, tzinfo=UTC)
+	assert other.last_seen == datetime.fromtimestamp(1_800_000_000, tz=UTC)
+	assert other.last_login is None
+
+
+def test_saving_a_token_loaded_user_keeps_the_latest_last_login(db):
+	user = User.objects.create_user(email='login@example.com')
+	User.objects.filter(pk=user.pk).update(last_login=datetime(2026, 1, 1, tzinfo=UTC))
+	user.refresh_from_db()
+	access = get_obtain_token_pair(user)['access_token']
+	# a newer login on another device
+	User.objects.filter(pk=user.pk).update(last_login=datetime(2026, 2, 1, tzinfo=UTC))
+
+	loaded = get_user_from_token(access)
+	loaded.full_name = 'Renamed'
+	loaded.save()
+
+	user.refresh_from_db()
+	assert user.last_login == datetime(2026, 2, 1, tzinfo=UTC)
@@ -0,0 +1,44 @@
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import check_password, make_password
+import pytest
+
+from services.accounts.password_hashing import PasswordHasherPool, PasswordHashingBusy
+
+
+def test_verify_rehashes_outdated_passwords(settings):
+	settings.PASSWORD_HASHERS = [
+		'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+		'django.contrib.auth.hashers.MD5PasswordHasher',
+	]
+	pool = PasswordHasherPool(workers=2)
+
+	checked = pool.verify('s3cret-pass', make_password('s3cret-pass', hasher='md5'))
+	assert checked.valid
+	assert checked.upgraded.startswith('pbkdf2_sha256$')
+	assert check_password('s3cret-pass', checked.upgraded)
+
+	checked = async_to_sync(pool.averify)('wrong', checked.upgraded)
+	assert not checked.valid and checked.upgraded is None
+	assert pool.snapshot()['completed'] == 2
+
+
+def test_a_full_pool_rejects_at_once():
+	pool = PasswordHasherPool(workers=1, queue_size=1)
+	release = threading.Event()
+	running = [pool._submit(release.wait), pool._submit(release.wait)]  # one hashing, one queued
+	try:
+		with pytest.raises(PasswordHashingBusy):
+			pool.make_password('s3cret-pass')
+		with pytest.raises(PasswordHashingBusy):
+			async_to_sync(pool.amake_password)('s3cret-pass')
+	finally:
+		release.set()
+	for future in running:
+		future.result()
+
+	assert pool.make_password('s3cret-pass').encoded
+	snapshot = pool.snapshot()
+	assert (snapshot['workers'], snapshot['queue_size']) == (1, 1)
+	assert (snapshot['completed'], snapshot['rejected']) == (3, 2)
@@ -0,0 +1,26 @@
+from django.contrib.auth.hashers import make_password
+
+from notifications.models import NotificationPreference
+from otp.models import Otp, OtpType
+from services.accounts.registration_service import register_user
+from tokens.models import TrackedToken
+
+
+def test_register_user_is_two_statements_in_one_transaction(
+	db, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+	data = {'email': 'New@Example.com', 'full_name': 'New User', 'phone_number': '+2348000000000', 'user_type': 'vendor'}
+
+	# SAVEPOINT and RELEASE come from the test's own transaction
+	with django_capture_on_commit_callbacks() as callbacks, django_assert_num_queries(2 + 2):
+		user, token = register_user(data, make_password(None))
+
+	assert user.email == 'New@example.com' and user.is_active and user.last_login is None
+	assert user.vendorprofile.pk
+	assert NotificationPreference.objects.filter(user=user).exists()
+	assert Otp.objects.get(user=user).otp_type == OtpType.SIGNUP
+	assert TrackedToken.objects.filter(user=user).count() == 1
+	assert token['access_token']
+	assert len(callbacks) == 2  # the refresh-token registration and the welcome email
+
+	assert register_user({**data, 'email': 'NEW@example.com'}, make_password(None)) is None
@@ -0,0 +1,50 @@
+import asyncio
+import copy
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+from redis.asyncio.connection import SSLConnection
+
+from accounts.models import User, UserType
+from middlewares.jwt.token import get_obtain_token_pair
+from services.accounts.user_cache import UserOutCache
+
+
+def test_async_client_uses_the_cache_options_and_one_client_per_loop():
+	caches = copy.deepcopy(settings.CACHES)
+	caches['default']['LOCATION'] = 'rediss://cache.internal:6380/3'
+	caches['default']['OPTIONS'].update(PASSWORD='s3cret', SOCKET_TIMEOUT=1.5, SOCKET_CONNECT_TIMEOUT=0.5)
+	user_cache = UserOutCache()
+
+	async def client():
+		return user_cache.get_async_redis(), user_cache.get_async_redis()
+
+	with override_settings(CACHES=caches):
+		first, again = asyncio.run(client())
+		other, _ = asyncio.run(client())
+
+	assert first is again
+	assert other is not first
+	pool = first.connection_pool
+	assert pool.connection_class is SSLConnection
+	assert pool.max_connections == 50
+	kwargs = pool.connection_kwargs
+	assert (kwargs['host'], kwargs['port'], kwargs['db']) == ('cache.internal', 6380, 3)
+	assert kwargs['password'] == 's3cret'
+	assert (kwargs['socket_timeout'], kwargs['socket_connect_timeout']) == (1.5, 0.5)
+	assert kwargs['retry_on_timeout'] and kwargs['socket_keepalive']
+
+
+def test_current_user_authenticates_without_loading_the_user(db, django_assert_num_queries):
+	user = User.objects.create_user(email='lazy@example.com', user_type=UserType.CUSTOMER, is_verified=True)
+	token = get_obtain_token_pair(user)['access_token']
+	client = AsyncClient()
+
+	# without Redis: epoch and blacklist reads, then the user with their profile for the payload
+	headers = {'Authorization': f'Bearer {token}'}
+	with django_assert_num_queries(3):
+		response = async_to_sync(client.get)('/api/auth/current_user/', headers=headers)
+
+	assert response.status_code == 200
+	assert response.json()['data']['email'] == user.email
@@ -0,0 +1,238 @@
+"""
+Read-through cache of serialised `UserOut` payloads: a per-process L1 in front of the default Redis cache
+"""
+
+from collections.abc import Awaitable, Callable
+from functools import partial
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.shortcuts import aget_object_or_404
+from django.utils.http import parse_etags
+from redis import asyncio as aioredis
+
+from accounts.models import AdminProfile, CustomerProfile, User, VendorProfile
+from accounts.schema.auth import AdminProfileOut, CustomerProfileOut, UserOut, VendorProfileOut
+from common.cache import PerLoop, TTLCache
+from common.fieldsets import pick
+from services.accounts.accounts_service import (
+	PROFILE_MODELS,
+	PROFILE_RELATIONS,
+	get_user_profile_instance,
+	with_profiles,
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SCHEMAS = {
+	CustomerProfile: CustomerProfileOut,
+	VendorProfile: VendorProfileOut,
+	AdminProfile: AdminProfileOut,
+}
+
+
+def build_user_out(user) -> dict | None:
+	"""JSON-ready `UserOut` for the user, or None when they have no profile"""
+	profile = get_user_profile_instance(user)
+	if profile is None:
+		return None
+	user_out = UserOut.from_orm(user)
+	user_out.profile = PROFILE_SCHEMAS[type(profile)].from_orm(profile)
+	return user_out.model_dump(mode='json')
+
+
+async def abuild_user_out(user_id) -> dict | None:
+	"""`build_user_out` for a user id, loading the user and their profile in one query (404 if missing)"""
+	return build_user_out(await aget_object_or_404(with_profiles(User.objects), id=user_id))
+
+
+# what `?fields=` may select from a UserOut
+USER_OUT_FIELDS = ('id', 'email', 'full_name', 'phone_number', 'user_type', 'profile')
+
+
+def project_user_out(queryset, fields: tuple[str, ...] | None, keep: tuple[str, ...] = ()):
+	"""
+	Load only the columns the requested UserOut `fields` need, plus `keep`
+	(e.g. pagination keys); the full UserOut with profiles when `fields` is None.
+	"""
+	if fields is None:
+		return with_profiles(queryset)
+	columns = {'id', *keep, *(name for name in fields if name != 'profile')}
+	if 'profile' in fields:
+		# select_related cannot follow a deferred relation, so name the profile columns too
+		columns.add('user_type')
+		for user_type, model in PROFILE_MODELS.items():
+			relation = PROFILE_RELATIONS[user_type]
+			columns.update(f'{relation}__{name}' for name in ('id', *PROFILE_SCHEMAS[model].model_fields))
+		queryset = with_profiles(queryset)
+	return queryset.only(*columns)
+
+
+def sparse_user_out(user, fields: tuple[str, ...]) -> dict:
+	"""The requested UserOut `fields` of a user loaded with `project_user_out`"""
+	data = {name: getattr(user, name) for name in fields if name != 'profile'}
+	if 'profile' in fields:
+		data['profile'] = get_user_profile_instance(user)
+	return data
+
+
+def sparse_entry(entry: dict, fields: tuple[str, ...] | None) -> dict:
+	"""A cached entry trimmed to `fields`, with an ETag of its own"""
+	if fields is None:
+		return entry
+	data = pick(entry['data'], fields)
+	return {'etag': make_etag(data), 'data': data}
+
+
+def make_etag(data: dict) -> str:
+	body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+	return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+	"""Whether the request's If-None-Match already names `etag` (weak comparison)"""
+	header = request.headers.get('If-None-Match')
+	if not header:
+		return False
+	return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(header))
+
+
+class UserOutCache:
+	"""
+	Entries are `{'etag': ..., 'data': ...}` keyed by user id.
+
+	Writes invalidate Redis and the local tier right away and again on
+	commit, so no reader re-caches data from before the commit. Other
+	processes may serve their local copy for up to USER_OUT_CACHE_LOCAL_TTL
+	seconds after a change.
+
+	The async reads use an asyncio Redis client with django-redis's key and
+	value encoding, so async views never wait on a worker thread. It connects
+	with the cache's own OPTIONS and is kept per event loop.
+	"""
+
+	KEY = 'accounts:user_out:{user_id}'
+
+	def __init__(self):
+		self._local: TTLCache | None = None
+		self._async_redis = PerLoop(self._connect_async)
+
+	@property
+	def local(self) -> TTLCache:
+		if self._local is None:
+			self._local = TTLCache(
+				maxsize=getattr(settings, 'USER_OUT_CACHE_LOCAL_SIZE', 10_000),
+				ttl=getattr(settings, 'USER_OUT_CACHE_LOCAL_TTL', 5),
+			)
+		return self._local
+
+	@property
+	def ttl(self) -> int:
+		return getattr(settings, 'USER_OUT_CACHE_TTL', 300)
+
+	@property
+	def cache(self):
+		return caches['default']
+
+	def _connect_async(self) -> aioredis.Redis:
+		# the server django-redis writes to, with its credentials, timeouts and pool options
+		location = settings.CACHES['default']['LOCATION']
+		server = (location.split(',') if isinstance(location, str) else location)[0]
+		factory = self.cache.client.connection_factory
+		params = factory.make_connection_params(server)
+		params.pop('parser_class')  # a sync parser; the asyncio client picks its own
+		return aioredis.from_url(
+			params.pop('url'), **params, **factory.pool_cls_kwargs, **factory.redis_client_cls_kwargs
+		)
+
+	def get_async_redis(self) -> aioredis.Redis:
+		"""Get or create the asyncio connection to the default cache's Redis for the running loop"""
+		return self._async_redis.get()
+
+	def get(self, user_id) -> dict | None:
+		entry = self.local.get(user_id)
+		if entry is None:
+			try:
+				entry = self.cache.get(self.KEY.format(user_id=user_id))
+			except Exception as e:
+				logger.error(f'❌ Error reading cached user {user_id}: {e}')
+				return None
+			if entry is not None:
+				self.local.set(user_id, entry)
+		return entry
+
+	def set(self, user_id, data: dict) -> dict:
+		entry = {'etag': make_etag(data), 'data': data}
+		try:
+			self.cache.set(self.KEY.format(user_id=user_id), entry, timeout=self.ttl)
+		except Exception as e:
+			logger.error(f'❌ Error caching user {user_id}: {e}')
+		self.local.set(user_id, entry)
+		return entry
+
+	def get_or_set(self, user_id, builder: Callable[[], dict | None]) -> dict | None:
+		"""Return the cached entry, building and caching it on a miss; None if `builder` returns None"""
+		entry = self.get(user_id)
+		if entry is None:
+			data = builder()
+			if data is None:
+				return None
+			entry = self.set(user_id, data)
+		return entry
+
+	async def aget(self, user_id) -> dict | None:
+		"""Async counterpart of `get()`"""
+		entry = self.local.get(user_id)
+		if entry is None:
+			client = self.cache.client
+			try:
+				value = await self.get_async_redis().get(client.make_key(self.KEY.format(user_id=user_id)))
+			except Exception as e:
+				logger.error(f'❌ Error reading cached user {user_id}: {e}')
+				return None
+			if value is not None:
+				entry = client.decode(value)
+				self.local.set(user_id, entry)
+		return entry
+
+	async def aset(self, user_id, data: dict) -> dict:
+		"""Async counterpart of `set()`"""
+		entry = {'etag': make_etag(data), 'data': data}
+		client = self.cache.client
+		try:
+			await self.get_async_redis().set(
+				client.make_key(self.KEY.format(user_id=user_id)), client.encode(entry), ex=self.ttl
+			)
+		except Exception as e:
+			logger.error(f'❌ Error caching user {user_id}: {e}')
+		self.local.set(user_id, entry)
+		return entry
+
+	async def aget_or_set(self, user_id, builder: Callable[[], Awaitable[dict | None]]) -> dict | None:
+		"""Async counterpart of `get_or_set()`; `builder` is a coroutine function"""
+		entry = await self.aget(user_id)
+		if entry is None:
+			data = await builder()
+			if data is None:
+				return None
+			entry = await self.aset(user_id, data)
+		return entry
+
+	def invalidate(self, user_id) -> None:
+		self.local.discard(user_id)
+		try:
+			self.cache.delete(self.KEY.format(user_id=user_id))
+		except Exception as e:
+			logger.error(f'❌ Error invalidating cached user {user_id}: {e}')
+
+	def invalidate_on_commit(self, user_id) -> None:
+		self.invalidate(user_id)
+		transaction.on_commit(partial(self.invalidate, user_id))
+
+
+# Global instance
+user_out_cache = UserOutCache()
@@ -0,0 +1,152 @@
+"""
+Maintenance of the monthly `tracked_tokens` partitions created in tokens migration 0005
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+import logging
+import re
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = 'tracked_tokens'
+DEFAULT_PARTITION = 'tracked_tokens_default'
+PARTITION_PATTERN = re.compile(r'^tracked_tokens_p(\d{4})_(\d{2})$')
+
+MONTHS_AHEAD = 3
+EXPIRED_GRACE = timedelta(days=7)
+
+
+@dataclass(frozen=True)
+class Partition:
+	name: str
+	start: datetime | None = None  # None for the default partition
+	end: datetime | None = None
+
+	@property
+	def is_default(self) -> bool:
+		return self.start is None
+
+
+def month_start(value: datetime) -> datetime:
+	value = value.astimezone(UTC)
+	return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+	month = value.month - 1 + months
+	return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_for(start: datetime) -> Partition:
+	return Partition(f'{PARENT_TABLE}_p{start:%Y_%m}', start, add_months(start, 1))
+
+
+def list_partitions() -> list[Partition]:
+	"""Return the partitions attached to tracked_tokens, oldest first, default last"""
+	with connection.cursor() as cursor:
+		cursor.execute(
+			'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+			'WHERE i.inhparent = %s::regclass',
+			[PARENT_TABLE],
+		)
+		names = [row[0] for row in cursor.fetchall()]
+
+	partitions = []
+	for name in names:
+		match = PARTITION_PATTERN.match(name)
+		if match:
+			partitions.append(partition_for(datetime(int(match[1]), int(match[2]), 1, tzinfo=UTC)))
+		elif name == DEFAULT_PARTITION:
+			partitions.append(Partition(name))
+	return sorted(partitions, key=lambda partition: (partition.is_default, partition.start or datetime.max))
+
+
+def _bounds(partition: Partition) -> str:
+	return f"FOR VALUES FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+
+
+def _create_partition(cursor, partition: Partition) -> None:
+	qn = connection.ops.quote_name
+	cursor.execute(
+		f'SELECT EXISTS (SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE exp >= %s AND exp < %s)',
+		[partition.start, partition.end],
+	)
+	if not cursor.fetchone()[0]:
+		cursor.execute(
+			f'CREATE TABLE {qn(partition.name)} PARTITION OF {qn(PARENT_TABLE)} {_bounds(partition)}'
+		)
+		return
+
+	# Postgres refuses a new partition whose range already has rows in the
+	# default partition, so move them into a standalone table and attach it.
+	cursor.execute(
+		f'CREATE TABLE {qn(partition.name)} (LIKE {qn(PARENT_TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+	)
+	cursor.execute(
+		f'WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE exp >= %s AND exp < %s RETURNING *) '
+		f'INSERT INTO {qn(partition.name)} SELECT * FROM moved',
+		[partition.start, partition.end],
+	)
+	logger.info(f'🔑 Moved {cursor.rowcount} tracked tokens from {DEFAULT_PARTITION} to {partition.name}')
+	cursor.execute(f'ALTER TABLE {qn(PARENT_TABLE)} ATTACH PARTITION {qn(partition.name)} {_bounds(partition)}')
+
+
+def ensure_partitions(months_ahead: int = MONTHS_AHEAD, dry_run: bool = False) -> list[Partition]:
+	"""
+	Create the partitions for the current month and the next `months_ahead`.
+
+	Returns the partitions that were (or, with `dry_run`, would be) created.
+	"""
+	existing = {partition.name for partition in list_partitions()}
+	current = month_start(timezone.now())
+	missing = [
+		partition
+		for partition in (partition_for(add_months(current, offset)) for offset in range(months_ahead + 1))
+		if partition.name not in existing
+	]
+	if dry_run:
+		return missing
+
+	for partition in missing:
+		with transaction.atomic(), connection.cursor() as cursor:
+			_create_partition(cursor, partition)
+		logger.info(f'🔑 Created token partition {partition.name}')
+	return missing
+
+
+def drop_expired_partitions(grace: timedelta = EXPIRED_GRACE, dry_run: bool = False) -> list[Partition]:
+	"""
+	Drop partitions whose tokens all expired more than `grace` ago.
+
+	Expired rows in the default partition and blacklist entries of expired
+	tokens are purged as well; neither can authenticate anything any more.
+	Returns the partitions that were (or, with `dry_run`, would be) dropped.
+	"""
+	cutoff = month_start(timezone.now() - grace)
+	expired = [
+		partition for partition in list_partitions() if not partition.is_default and partition.end <= cutoff
+	]
+	if dry_run:
+		return expired
+
+	qn = connection.ops.quote_name
+	with transaction.atomic(), connection.cursor() as cursor:
+		# blacklisted_tokens has no foreign key to the partitions, so clean it up by hand
+		cursor.execute('DELETE FROM blacklisted_tokens WHERE exp < %s', [cutoff])
+		purged_blacklist = cursor.rowcount
+		cursor.execute(f'DELETE FROM {qn(DEFAULT_PARTITION)} WHERE exp < %s', [cutoff])
+		purged_default = cursor.rowcount
+		for partition in expired:
+			cursor.execute(f'DROP TABLE {qn(partition.name)}')
+
+	for partition in expired:
+		logger.info(f'🔑 Dropped expired token partition {partition.name}')
+	if purged_blacklist or purged_default:
+		logger.info(
+			f'🔑 Purged {purged_blacklist} blacklisted and {purged_default} default-partition tokens expired before {cutoff:%Y-%m-%d}'
+		)
+	return expired
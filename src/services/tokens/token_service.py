@@ -0,0 +1,51 @@
+from datetime import UTC, datetime
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from tokens.models import BlacklistedToken, TrackedToken
+
+User = get_user_model()
+
+
+def persist_refresh_token_writes(records: list[dict]) -> None:
+	"""
+	Apply queued refresh-token rotation records in one transaction.
+
+	Rotations insert the new token and retire the old one; reuse records
+	blacklist every token of the family. Safe to replay.
+	"""
+	rotations = [record for record in records if record['op'] == 'rotate']
+	families = {record['family'] for record in records if record['op'] == 'revoke_family'}
+	user_ids = {record['user_id'] for record in rotations}
+	existing_users = set(User.all_objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+	with transaction.atomic():
+		if rotations:
+			TrackedToken.objects.bulk_create(
+				[
+					TrackedToken(
+						user_id=record['user_id'],
+						jti=record['jti'],
+						exp=datetime.fromtimestamp(record['exp'], tz=UTC),
+						access_token=record['access_token'],
+						refresh_token=record['refresh_token'],
+						family=record['family'],
+					)
+					for record in rotations
+					if record['user_id'] in existing_users
+				],
+				ignore_conflicts=True,
+			)
+			TrackedToken.objects.filter(jti__in=[record['old'] for record in rotations]).soft_delete()
+
+		if families:
+			family_tokens = TrackedToken.all_objects.filter(family__in=families, blacklisted_token__isnull=True)
+			BlacklistedToken.objects.bulk_create(
+				[
+					BlacklistedToken(user_id=user_id, token_id=token_id, jti=jti, exp=exp)
+					for token_id, user_id, jti, exp in family_tokens.values_list('id', 'user_id', 'jti', 'exp')
+				],
+				ignore_conflicts=True,
+			)
+			TrackedToken.objects.filter(family__in=families).soft_delete()
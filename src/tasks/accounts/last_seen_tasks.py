@@ -0,0 +1,19 @@
+import logging
+
+from procrastinate.contrib.django import app
+
+from services.accounts.last_seen import last_seen_store
+
+logger = logging.getLogger('procrastinate')
+
+
+@app.periodic(cron='* * * * *')
+@app.task(queue='accounts', queueing_lock='flush_last_seen')
+def flush_last_seen(timestamp: int, batch_size: int = 1000) -> int:
+	"""
+	Persist the last-seen times recorded in Redis to User.last_seen.
+	"""
+	flushed = last_seen_store.flush(batch_size)
+	if flushed:
+		logger.info(f'Persisted last seen for {flushed} users')
+	return flushed
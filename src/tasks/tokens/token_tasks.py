@@ -0,0 +1,58 @@
+import json
+import logging
+
+from procrastinate.contrib.django import app
+
+from middlewares.jwt.rotation import refresh_token_store
+from services.tokens.partition_service import drop_expired_partitions, ensure_partitions
+from services.tokens.token_service import persist_refresh_token_writes
+
+logger = logging.getLogger('procrastinate')
+
+
+def _persist_each(items: list[bytes]) -> list[bytes]:
+	"""Persist queued writes one at a time; returns the ones that failed"""
+	dead = []
+	for item in items:
+		try:
+			persist_refresh_token_writes([json.loads(item)])
+		except Exception as e:
+			logger.error(f'❌ Dropping refresh token write {item[:200]!r} to the dead-letter list: {e}')
+			dead.append(item)
+	return dead
+
+
+@app.periodic(cron='* * * * *')
+# `lock` keeps a run from starting while another worker is still flushing
+@app.task(queue='tokens', lock='flush_refresh_token_writes', queueing_lock='flush_refresh_token_writes')
+def flush_refresh_token_writes(timestamp: int, batch_size: int = 1000) -> int:
+	"""
+	Persist refresh-token rotations queued in Redis to TrackedToken.
+
+	A batch that fails is retried record by record, and records that still
+	fail go to the dead-letter list, so one bad record cannot stall the queue.
+	"""
+	flushed = 0
+	while items := refresh_token_store.claim_pending(batch_size):
+		try:
+			persist_refresh_token_writes([json.loads(item) for item in items])
+			dead = []
+		except Exception as e:
+			logger.error(f'❌ Error persisting {len(items)} refresh token writes, retrying one by one: {e}')
+			dead = _persist_each(items)
+		refresh_token_store.ack_pending(items, dead)
+		flushed += len(items) - len(dead)
+	if flushed:
+		logger.info(f'Persisted {flushed} refresh token writes')
+	return flushed
+
+
+@app.periodic(cron='30 3 * * *')
+@app.task(queue='tokens', queueing_lock='maintain_token_partitions')
+def maintain_token_partitions(timestamp: int) -> None:
+	"""
+	Create the coming months' tracked_tokens partitions and drop expired ones.
+	"""
+	created = ensure_partitions()
+	dropped = drop_expired_partitions()
+	logger.info(f'Token partitions: {len(created)} created, {len(dropped)} dropped')
@@ -1,10 +1,12 @@
 from django.contrib import admin
 
+from common.admin import LargeTableAdminMixin
+
 from .models import BlacklistedToken, TrackedToken
 
 
 @admin.register(TrackedToken)
-class TrackedTokenAdmin(admin.ModelAdmin):
+class TrackedTokenAdmin(LargeTableAdminMixin, admin.ModelAdmin):
 	list_display = ('user', 'refresh_token', 'created_at', 'modified')
 	search_fields = ('user__email',)
 	list_filter = ('created_at', 'modified')
@@ -14,8 +16,10 @@ class TrackedTokenAdmin(admin.ModelAdmin):
 
 
 @admin.register(BlacklistedToken)
-class BlacklistedTokenAdmin(admin.ModelAdmin):
+class BlacklistedTokenAdmin(LargeTableAdminMixin, admin.ModelAdmin):
 	list_display = ('user', 'token', 'created_at', 'modified')
+	# the token's __str__ reads its user
+	list_select_related = ('user', 'token__user')
 	search_fields = ('user__email',)
 	list_filter = ('created_at', 'modified')
 
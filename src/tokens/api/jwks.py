@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.http import HttpResponse
+from ninja import Router
+
+from middlewares.jwt.keys import key_ring
+
+jwks_router = Router(tags=['Tokens'], auth=None)
+
+
+@jwks_router.get('/jwks.json', include_in_schema=False)
+def jwks(request):
+	"""Public keys for verifying our access tokens without calling this service."""
+	response = HttpResponse(key_ring.jwks(), content_type='application/json')
+	response['Cache-Control'] = f'public, max-age={settings.JWT_JWKS_MAX_AGE}'
+	return response
@@ -0,0 +1,100 @@
+"""
+Benchmarks for token issuance, verification and revocation
+"""
+
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+from common.benchmark import BenchmarkContext, register
+from middlewares.jwt.revocation import revocation_store
+from middlewares.jwt.token import (
+	TokenTypes,
+	blacklist_all_tokens,
+	decode_token,
+	get_access_token_from_refresh_token,
+	get_obtain_token_pair,
+	rotate_refresh_token,
+)
+from tokens.models import BlacklistedToken, TrackedToken
+
+User = get_user_model()
+
+EMAIL_PREFIX = 'benchmark+tokens-'
+
+
+def cleanup() -> None:
+	User.all_objects.filter(email__startswith=EMAIL_PREFIX).delete()
+
+
+def reset_process_state() -> None:
+	"""Drop in-process caches and database connections so the next call starts cold"""
+	revocation_store.cache.clear()
+	revocation_store.epochs.clear()
+	revocation_store.verified.clear()
+	connections.close_all()
+
+
+def make_user(token_count: int):
+	"""Create a user holding `token_count` tracked tokens, a tenth of them blacklisted"""
+	user = User.objects.create_user(email=f'{EMAIL_PREFIX}{token_count}@example.com')
+	exp = timezone.now() + timedelta(days=1)
+	tracked = TrackedToken.objects.bulk_create(
+		(
+			TrackedToken(
+				user=user,
+				jti=TrackedToken.hasher(uuid4().hex),
+				exp=exp,
+				access_token=TrackedToken.hasher(uuid4().hex),
+				refresh_token=TrackedToken.hasher(uuid4().hex),
+			)
+			for _ in range(max(token_count - 1, 0))
+		),
+		batch_size=1000,
+	)
+	BlacklistedToken.objects.bulk_create(
+		(BlacklistedToken(user=user, token=token, jti=token.jti, exp=token.exp) for token in tracked[::10]),
+		batch_size=1000,
+	)
+	# the last token is a real one, used by the decode and refresh cases
+	return user, get_obtain_token_pair(user)
+
+
+def measure_cases(ctx: BenchmarkContext, user, pair: dict, label: str, setup) -> None:
+	ctx.measure(
+		f'decode_token{label}',
+		lambda: decode_token(pair['access_token'], token_type=TokenTypes.ACCESS),
+		setup=setup,
+	)
+	ctx.measure(
+		f'get_access_token_from_refresh_token{label}',
+		lambda: get_access_token_from_refresh_token(pair['refresh_token']),
+		setup=setup,
+	)
+	ctx.measure(f'get_obtain_token_pair{label}', lambda: get_obtain_token_pair(user), setup=setup)
+
+	# each rotation spends the token, so keep following the chain
+	chain = {'refresh': get_obtain_token_pair(user)['refresh_token']}
+
+	def rotate():
+		chain['refresh'] = rotate_refresh_token(chain['refresh'])['refresh_token']
+
+	ctx.measure(f'rotate_refresh_token{label}', rotate, setup=setup)
+	# invalidates every token above, so it runs last
+	ctx.measure(f'blacklist_all_tokens{label}', lambda: blacklist_all_tokens(user), setup=setup)
+
+
+@register('tokens')
+def tokens_suite(ctx: BenchmarkContext) -> None:
+	cleanup()
+	try:
+		for token_count in ctx.token_counts:
+			user, pair = make_user(token_count)
+			for state, setup in (('warm', None), ('cold', reset_process_state)):
+				measure_cases(ctx, user, pair, f'[{state}, {token_count} tokens]', setup)
+				pair = get_obtain_token_pair(user)
+	finally:
+		cleanup()
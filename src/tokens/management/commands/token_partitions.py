@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from services.tokens.partition_service import (
+	EXPIRED_GRACE,
+	MONTHS_AHEAD,
+	drop_expired_partitions,
+	ensure_partitions,
+	list_partitions,
+)
+
+
+class Command(BaseCommand):
+	help = 'Create upcoming monthly tracked_tokens partitions and drop expired ones'
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			'--ahead', type=int, default=MONTHS_AHEAD, help='Months to create beyond the current one'
+		)
+		parser.add_argument('--drop-expired', action='store_true', help='Drop partitions of expired tokens')
+		parser.add_argument(
+			'--grace-days',
+			type=int,
+			default=EXPIRED_GRACE.days,
+			help='With --drop-expired, keep partitions until their tokens expired this many days ago',
+		)
+		parser.add_argument('--dry-run', action='store_true', help='Show what would change without changing it')
+		parser.add_argument('--list', action='store_true', help='List the current partitions and exit')
+
+	def handle(self, *args, **options):
+		"""Main command handler"""
+		if options['list']:
+			for partition in list_partitions():
+				bounds = 'DEFAULT' if partition.is_default else f'{partition.start:%Y-%m-%d} → {partition.end:%Y-%m-%d}'
+				self.stdout.write(f'{partition.name:<32} {bounds}')
+			return
+
+		dry_run = options['dry_run']
+		verb = 'Would create' if dry_run else 'Created'
+		created = ensure_partitions(options['ahead'], dry_run=dry_run)
+		for partition in created:
+			self.stdout.write(self.style.SUCCESS(f'✅ {verb} {partition.name}'))
+
+		dropped = []
+		if options['drop_expired']:
+			verb = 'Would drop' if dry_run else 'Dropped'
+			dropped = drop_expired_partitions(timedelta(days=options['grace_days']), dry_run=dry_run)
+			for partition in dropped:
+				self.stdout.write(self.style.WARNING(f'🗑️ {verb} {partition.name}'))
+
+		if not created and not dropped:
+			self.stdout.write('Partitions are up to date')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tokens', '0003_remove_trackedtoken_token_trackedtoken_access_token_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trackedtoken',
+            name='family',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,205 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import common.fields
+
+# tracked_tokens becomes a table range-partitioned by exp, one partition per
+# month plus a default partition. Digests move from hex text to 32-byte bytea.
+# Partitioned tables need the partition key in every unique key, hence
+# PRIMARY KEY (id, exp); `id` keeps its own sequence so Django still sees a
+# single-column primary key.
+PARTITION_TRACKED_TOKENS = """
+ALTER TABLE tracked_tokens RENAME TO tracked_tokens_unpartitioned;
+
+CREATE SEQUENCE tracked_tokens_pk_seq;
+CREATE TABLE tracked_tokens (
+    id bigint NOT NULL DEFAULT nextval('tracked_tokens_pk_seq'),
+    created_at timestamp with time zone NOT NULL,
+    modified timestamp with time zone NOT NULL,
+    is_deleted boolean NOT NULL,
+    deleted_at timestamp with time zone NULL,
+    jti bytea NOT NULL,
+    exp timestamp with time zone NOT NULL,
+    access_token bytea NULL,
+    refresh_token bytea NULL,
+    family varchar(64) NULL,
+    user_id bigint NOT NULL REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED,
+    CONSTRAINT tracked_tokens_partitioned_pkey PRIMARY KEY (id, exp)
+) PARTITION BY RANGE (exp);
+ALTER SEQUENCE tracked_tokens_pk_seq OWNED BY tracked_tokens.id;
+
+CREATE TABLE tracked_tokens_default PARTITION OF tracked_tokens DEFAULT;
+DO $$
+DECLARE
+    bound timestamp with time zone := date_trunc('month', now());
+BEGIN
+    WHILE bound <= date_trunc('month', now()) + interval '3 months' LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF tracked_tokens FOR VALUES FROM (%L) TO (%L)',
+            'tracked_tokens_p' || to_char(bound, 'YYYY_MM'), bound, bound + interval '1 month'
+        );
+        bound := bound + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO tracked_tokens (
+    id, created_at, modified, is_deleted, deleted_at, jti, exp, access_token, refresh_token, family, user_id
+)
+SELECT
+    id, created_at, modified, is_deleted, deleted_at, decode(jti, 'hex'), exp,
+    decode(access_token, 'hex'), decode(refresh_token, 'hex'), family, user_id
+FROM tracked_tokens_unpartitioned;
+SELECT setval('tracked_tokens_pk_seq', coalesce((SELECT max(id) FROM tracked_tokens), 0) + 1, false);
+-- run the deferred foreign key checks now; indexes cannot be built with them pending
+SET CONSTRAINTS ALL IMMEDIATE;
+
+DROP TABLE tracked_tokens_unpartitioned;
+ALTER SEQUENCE tracked_tokens_pk_seq RENAME TO tracked_tokens_id_seq;
+ALTER TABLE tracked_tokens RENAME CONSTRAINT tracked_tokens_partitioned_pkey TO tracked_tokens_pkey;
+"""
+
+UNPARTITION_TRACKED_TOKENS = """
+CREATE TABLE tracked_tokens_unpartitioned (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    created_at timestamp with time zone NOT NULL,
+    modified timestamp with time zone NOT NULL,
+    is_deleted boolean NOT NULL,
+    deleted_at timestamp with time zone NULL,
+    jti varchar(255) NOT NULL UNIQUE,
+    exp timestamp with time zone NOT NULL,
+    access_token text NULL,
+    refresh_token text NULL,
+    family varchar(64) NULL,
+    user_id bigint NOT NULL REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED
+);
+INSERT INTO tracked_tokens_unpartitioned (
+    id, created_at, modified, is_deleted, deleted_at, jti, exp, access_token, refresh_token, family, user_id
+)
+SELECT
+    id, created_at, modified, is_deleted, deleted_at, encode(jti, 'hex'), exp,
+    encode(access_token, 'hex'), encode(refresh_token, 'hex'), family, user_id
+FROM tracked_tokens;
+SET CONSTRAINTS ALL IMMEDIATE;
+
+DROP TABLE tracked_tokens;
+ALTER TABLE tracked_tokens_unpartitioned RENAME TO tracked_tokens;
+ALTER TABLE tracked_tokens RENAME CONSTRAINT tracked_tokens_unpartitioned_pkey TO tracked_tokens_pkey;
+ALTER TABLE tracked_tokens RENAME CONSTRAINT tracked_tokens_unpartitioned_jti_key TO tracked_tokens_jti_key;
+SELECT setval(
+    pg_get_serial_sequence('tracked_tokens', 'id'), coalesce((SELECT max(id) FROM tracked_tokens), 0) + 1, false
+);
+CREATE INDEX tracked_tokens_user_id ON tracked_tokens (user_id);
+CREATE INDEX tracked_tokens_family ON tracked_tokens (family);
+"""
+
+COPY_BLACKLISTED_DIGESTS = """
+UPDATE blacklisted_tokens AS b
+SET jti = decode(t.jti, 'hex'), exp = t.exp
+FROM tracked_tokens AS t
+WHERE t.id = b.token_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tokens', '0004_trackedtoken_family'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='blacklistedtoken',
+            options={'verbose_name': 'Blacklisted Token', 'verbose_name_plural': 'Blacklisted Tokens'},
+        ),
+        migrations.AlterModelOptions(
+            name='trackedtoken',
+            options={'verbose_name': 'Tracked Token', 'verbose_name_plural': 'Tracked Tokens'},
+        ),
+        # the foreign key has to go before tracked_tokens is partitioned
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='token',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='blacklisted_token', to='tokens.trackedtoken'),
+        ),
+        migrations.AddField(
+            model_name='blacklistedtoken',
+            name='exp',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='blacklistedtoken',
+            name='jti',
+            field=common.fields.DigestField(null=True),
+        ),
+        migrations.RunSQL(COPY_BLACKLISTED_DIGESTS, reverse_sql=migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='exp',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='blacklistedtoken',
+            name='jti',
+            field=common.fields.DigestField(),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION_TRACKED_TOKENS, reverse_sql=UNPARTITION_TRACKED_TOKENS),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='trackedtoken',
+                    name='access_token',
+                    field=common.fields.DigestField(blank=True, default=None, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='trackedtoken',
+                    name='family',
+                    field=models.CharField(blank=True, max_length=64, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='trackedtoken',
+                    name='jti',
+                    field=common.fields.DigestField(),
+                ),
+                migrations.AlterField(
+                    model_name='trackedtoken',
+                    name='refresh_token',
+                    field=common.fields.DigestField(blank=True, default=None, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='trackedtoken',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tracked_models', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='blacklistedtoken',
+            index=models.Index(fields=['jti', 'user'], name='blacklisted_tokens_jti_user'),
+        ),
+        migrations.AddIndex(
+            model_name='blacklistedtoken',
+            index=models.Index(fields=['exp'], name='blacklisted_tokens_exp'),
+        ),
+        migrations.AddIndex(
+            model_name='trackedtoken',
+            index=models.Index(fields=['jti'], include=('user', 'is_deleted'), name='tracked_tokens_jti_cov'),
+        ),
+        migrations.AddIndex(
+            model_name='trackedtoken',
+            index=models.Index(fields=['user', 'is_deleted'], name='tracked_tokens_user_active'),
+        ),
+        migrations.AddIndex(
+            model_name='trackedtoken',
+            index=models.Index(fields=['family'], name='tracked_tokens_family'),
+        ),
+        migrations.AddConstraint(
+            model_name='trackedtoken',
+            constraint=models.UniqueConstraint(fields=('jti', 'exp'), name='tracked_tokens_jti_exp_uniq'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tokens', '0005_token_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blacklistedtoken',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='blacklisted_tokens_live'),
+        ),
+        migrations.AddIndex(
+            model_name='trackedtoken',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['created_at', 'id'], name='tracked_tokens_live'),
+        ),
+    ]
@@ -4,7 +4,8 @@ from datetime import timezone
 from django.conf import settings
 from django.db import models
 
-from common.base_model import TimeStampedSoftDeleteModel
+from common.base_model import TimeStampedSoftDeleteModel, live_rows_index
+from common.fields import DigestField
 
 # Create your models here.
 
@@ -18,11 +19,14 @@ class TrackedToken(TimeStampedSoftDeleteModel):
 		settings.AUTH_USER_MODEL,
 		on_delete=models.CASCADE,
 		related_name='tracked_models',
+		db_index=False,  # covered by tracked_tokens_user_active
 	)
-	jti = models.CharField(max_length=255, unique=True)
+	jti = DigestField()
 	exp = models.DateTimeField()
-	access_token = models.TextField(blank=True, null=True, default=None)
-	refresh_token = models.TextField(blank=True, null=True, default=None)
+	access_token = DigestField(blank=True, null=True, default=None)
+	refresh_token = DigestField(blank=True, null=True, default=None)
+	# refresh-token rotation chain this token belongs to (the `fid` claim)
+	family = models.CharField(max_length=64, blank=True, null=True)
 
 	def __str__(self):
 		return f'Token {self.jti} for user {self.user.email}'
@@ -45,8 +49,19 @@ class TrackedToken(TimeStampedSoftDeleteModel):
 	class Meta:
 		verbose_name = 'Tracked Token'
 		verbose_name_plural = 'Tracked Tokens'
-		ordering = ['-created_at']
 		db_table = 'tracked_tokens'
+		# The table is range-partitioned by exp (see migration 0005 and the
+		# `token_partitions` command), so unique keys must include exp.
+		constraints = [
+			models.UniqueConstraint(fields=['jti', 'exp'], name='tracked_tokens_jti_exp_uniq'),
+		]
+		indexes = [
+			# index-only lookups by jti (rotation fallback, blacklist_token)
+			models.Index(fields=['jti'], include=['user', 'is_deleted'], name='tracked_tokens_jti_cov'),
+			models.Index(fields=['user', 'is_deleted'], name='tracked_tokens_user_active'),
+			models.Index(fields=['family'], name='tracked_tokens_family'),
+			live_rows_index('tracked_tokens'),
+		]
 
 
 class BlacklistedToken(TimeStampedSoftDeleteModel):
@@ -60,15 +75,24 @@ class BlacklistedToken(TimeStampedSoftDeleteModel):
 		related_name='blacklisted_tokens',
 	)
 	blacklisted_at = models.DateTimeField(auto_now_add=True)
+	# no database constraint: tracked_tokens is partitioned, so its id alone is not a unique key
 	token = models.OneToOneField(
-		TrackedToken, on_delete=models.CASCADE, related_name='blacklisted_token'
+		TrackedToken, on_delete=models.CASCADE, related_name='blacklisted_token', db_constraint=False
 	)
+	# copied from the token so revocation checks need no join
+	jti = DigestField()
+	exp = models.DateTimeField()
 
 	def __str__(self):
-		return f'Blacklisted Token {self.token.jti} for user {self.user.email}'
+		return f'Blacklisted Token {self.jti} for user {self.user.email}'
 
 	class Meta:
 		verbose_name = 'Blacklisted Token'
 		verbose_name_plural = 'Blacklisted Tokens'
-		ordering = ['-created_at']
 		db_table = 'blacklisted_tokens'
+		indexes = [
+			# index-only check in _verify_jti
+			models.Index(fields=['jti', 'user'], name='blacklisted_tokens_jti_user'),
+			models.Index(fields=['exp'], name='blacklisted_tokens_exp'),
+			live_rows_index('blacklisted_tokens'),
+		]
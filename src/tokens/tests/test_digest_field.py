@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from tokens.models import TrackedToken
+
+
+def test_digests_are_stored_as_raw_bytes_and_read_back_as_hex(db):
+	user = User.objects.create_user(email='digest@example.com')
+	jti = TrackedToken.hasher('some-jti')
+	token = TrackedToken.objects.create(user=user, jti=jti, exp=timezone.now() + timedelta(days=1))
+
+	with connection.cursor() as cursor:
+		cursor.execute('SELECT jti, access_token FROM tracked_tokens WHERE id = %s', [token.pk])
+		stored, access_token = cursor.fetchone()
+	assert bytes(stored) == bytes.fromhex(jti)
+	assert access_token is None
+
+	token = TrackedToken.objects.get(jti=jti)
+	assert token.jti == jti
+	assert token.access_token is None
+	assert list(TrackedToken.objects.filter(jti__in=[jti]).values_list('jti', flat=True)) == [jti]
+	assert TrackedToken._meta.get_field('jti').value_to_string(token) == jti
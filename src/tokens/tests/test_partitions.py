@@ -0,0 +1,72 @@
+from datetime import UTC, datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from services.tokens.partition_service import (
+	DEFAULT_PARTITION,
+	add_months,
+	drop_expired_partitions,
+	ensure_partitions,
+	list_partitions,
+	month_start,
+	partition_for,
+)
+from tokens.models import BlacklistedToken, TrackedToken
+
+
+def partition_of(token: TrackedToken) -> str:
+	with connection.cursor() as cursor:
+		cursor.execute('SELECT tableoid::regclass::text FROM tracked_tokens WHERE id = %s', [token.pk])
+		return cursor.fetchone()[0]
+
+
+def create_token(user, exp: datetime) -> TrackedToken:
+	return TrackedToken.all_objects.create(user=user, jti=TrackedToken.hasher(str(exp)), exp=exp)
+
+
+def test_partitions_are_created_ahead_and_take_over_rows_from_the_default(db):
+	ensure_partitions()
+	user = User.objects.create_user(email='partitions@example.com')
+	current = month_start(timezone.now())
+	far = partition_for(add_months(current, 6))
+	stranded = create_token(user, far.start + timedelta(days=2))
+	assert partition_of(stranded) == DEFAULT_PARTITION
+
+	planned = ensure_partitions(months_ahead=6, dry_run=True)
+	assert [partition.name for partition in planned][-1] == far.name
+	assert far.name not in {partition.name for partition in list_partitions()}
+
+	assert ensure_partitions(months_ahead=6) == planned
+	assert ensure_partitions(months_ahead=6) == []
+	assert far.name in {partition.name for partition in list_partitions()}
+	assert partition_of(stranded) == far.name
+	assert partition_of(create_token(user, far.start + timedelta(days=3))) == far.name
+
+
+def test_expired_partitions_and_blacklist_entries_are_dropped(db):
+	ensure_partitions()
+	user = User.objects.create_user(email='expired@example.com')
+	old = partition_for(datetime(2020, 1, 1, tzinfo=UTC))
+	with connection.cursor() as cursor:
+		cursor.execute(
+			f'CREATE TABLE {old.name} PARTITION OF tracked_tokens '
+			f"FOR VALUES FROM ('{old.start.isoformat()}') TO ('{old.end.isoformat()}')"
+		)
+	expired = create_token(user, old.start + timedelta(days=1))
+	BlacklistedToken.objects.create(user=user, token=expired, jti=expired.jti, exp=expired.exp)
+	live = create_token(user, timezone.now() + timedelta(days=1))
+	with connection.cursor() as cursor:
+		# run the deferred foreign key checks now, as a commit would; a table
+		# with pending trigger events cannot be dropped
+		cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+	assert drop_expired_partitions(dry_run=True) == [old]
+	assert TrackedToken.all_objects.filter(pk=expired.pk).exists()
+
+	assert drop_expired_partitions() == [old]
+	assert old.name not in {partition.name for partition in list_partitions()}
+	assert not TrackedToken.all_objects.filter(pk=expired.pk).exists()
+	assert not BlacklistedToken.all_objects.filter(user=user).exists()
+	assert TrackedToken.all_objects.filter(pk=live.pk).exists()